@@ -1,179 +1,26 @@
-from tkinter import Tk, StringVar, Entry, Label, Button, Text, Frame, END, DISABLED, NORMAL
-from math import sin, cos, tan, log, log10, pi
-import sys
-print(sys.executable)
+from tkinter import Tk, Toplevel, StringVar, Entry, Label, Button, Text, Frame, END, DISABLED, NORMAL
 
+import calc_engine
 
-class CalculatorLogic:
-    def __init__(self):
-        self.operand = ""
-        self.operands = []
-        self.z_error = False
-
-    def search_char(self, char, lst):
-        for element in lst:
-            if type(element) != int and type(element) != float:
-                if element in char:
-                    return True
-        return False
-
-    def simplify_pow(self, expression_list):
-        reverse_list = expression_list[::-1]
-        while self.search_char("^", reverse_list):
-            for element in reverse_list:
-                if type(element) == int or type(element) == float:
-                    continue
-                elif element == "^":
-                    index = reverse_list.index(element)
-                    result = reverse_list[index+1] ** reverse_list[index-1]
-                    del reverse_list[index-1], reverse_list[index-1]
-                    reverse_list[index-1] = result
-                    break
-        return reverse_list[::-1]
 
-    def simplify_mult_div(self, expression_list):
-        while self.search_char("*/%", expression_list):
-            for element in expression_list:
-                if type(element) == int or type(element) == float:
-                    continue
-                elif element in "*/%":
-                    index = expression_list.index(element)
-                    if element == "*":
-                        result = expression_list[index-1] * expression_list[index+1]
-                    elif element == "/":
-                        try:
-                            result = expression_list[index-1] / expression_list[index+1]
-                        except ZeroDivisionError:
-                            self.z_error = True
-                            return ()
-                    elif element == "%":
-                        result = expression_list[index-1] % expression_list[index+1]
-                    del expression_list[index-1], expression_list[index-1]
-                    expression_list[index-1] = result
-                    break
-        return expression_list
-
-    def simplify_add_sub(self, expression_list):
-        while self.search_char("+-", expression_list):
-            for element in expression_list:
-                if type(element) == int or type(element) == float:
-                    continue
-                elif element in "+-":
-                    index = expression_list.index(element)
-                    if element == "+":
-                        result = expression_list[index-1] + expression_list[index+1]
-                    elif element == "-":
-                        result = expression_list[index-1] - expression_list[index+1]
-                    del expression_list[index-1], expression_list[index-1]
-                    expression_list[index-1] = result
-                    break
-        return expression_list
+class CalculatorLogic:
+    """Evaluates calculator input; parsing and evaluation live in calc_engine"""
 
     def evaluate(self, expression):
-        expression_list = list(expression)
-        if expression_list[0] == "-":
-            expression_list.insert(0, "0")
-        self.operands = []
-        self.operand = ""
-        self.z_error = False
-
-        for index in range(len(expression_list)):
-            char = expression_list[index]
-            try:
-                if char == " ":
-                    continue
-                elif char == ".":
-                    self.operand += char
-                elif float(char) or char == "0":
-                    self.operand += char
-            except:
-                if char not in "+-*^/%":
-                    return "ERROR: INVALID FUNCTION USED"
-                if char == "-" and expression_list[index-1] in "+-*/%^":
-                    self.operand += char
-                else:
-                    self.operands += [float(self.operand), char]
-                    self.operand = ""
-        self.operands += [float(self.operand)]
-        expression_list = self.operands
-        expression_list = self.simplify_pow(expression_list)
-        expression_list = self.simplify_mult_div(expression_list)
-        expression_list = self.simplify_add_sub(expression_list)
-        if self.z_error:
-            return "ERROR: CANNOT DIVIDE BY ZERO"
-        return expression_list[0]
+        return calc_engine.evaluate(expression, calc_engine.RAD)
 
     def calculator(self, expression, mode=0):
-        try:
-            while True:
-                start_index = end_index = index = 0
-                found_end = False
-                for element in expression:
-                    if element == ")":
-                        end_index = index
-                        found_end = True
-                        found_start = False
-                        reverse = expression[end_index::-1]
-                        break
-                    index += 1
-                else:
-                    if not found_end:
-                        break
+        return calc_engine.evaluate(expression, mode)
 
-                index = 0
-                for element in expression[:end_index]:
-                    if element == "(":
-                        start_index = index
-                        found_start = True
-                    index += 1
-                else:
-                    if not found_start:
-                        return "Error: Unmatched Parenthesis"
-                arg = self.evaluate(expression[start_index+1:end_index])
-                if start_index >= 3:
-                    funct_id = expression[start_index-3:start_index]
-                    if funct_id in ["sin", "cos", "tan"]:
-                        if mode == 1:
-                            arg *= (pi/180)
-                        if funct_id == "sin":
-                            val = sin(arg)
-                        elif funct_id == "cos":
-                            val = cos(arg)
-                        else:
-                            val = tan(arg)
-                    elif funct_id == "qrt":
-                        val = (arg) ** 0.5
-                        funct_id = "sqrt"
-                    elif funct_id == "log":
-                        val = log10(arg)
-                    elif funct_id[1:] == "ln":
-                        funct_id = funct_id[1:]
-                        val = log(arg)
-                    elif funct_id[2] in "+-/**(":
-                        funct_id = ""
-                        val = arg
-                    else:
-                        return "Error: Invalid Function Used"
-                else:
-                    if "ln" in expression:
-                        expression = str(log(arg))
-                        continue
-                    else:
-                        funct_id = ''
-                        val = arg
-                expression = expression.replace(funct_id + "("+ expression[start_index+1:end_index] + ")", str(val))
-        except ZeroDivisionError:
-            return("Error: Cannot Divide By Zero")
-        except:
-            return("Error: Unmatched Parenthesis")
-        return self.evaluate(expression)
 
 class CalculatorUI:
-    def __init__(self):
-        self.app_window = Tk()
+    def __init__(self, master=None):
+        # hosted by the launcher as a Toplevel; standalone it owns the Tk root
+        self.app_window = Tk() if master is None else Toplevel(master)
         self.app_window.title("Calculator")
         self.app_window.geometry("600x600")
 
+        self.logic = CalculatorLogic()
         self.result_var = StringVar()
 
         self.result_frame = Frame(self.app_window, bg="#000000")
@@ -229,13 +76,14 @@ class CalculatorUI:
             self.app_window.grid_columnconfigure(i, weight=1)
 
         self.entry_box.bind("<Return>", self.on_return_pressed)
-        self.app_window.mainloop()
+        if master is None:
+            self.app_window.mainloop()
 
     def on_button_click(self, text):
         if text == "=":
             expression = self.entry_var.get()
             mode = self.mode_var.get()[-3::]
-            result = CalculatorLogic().calculator(expression, int(self.mode_var.get()[-1]))
+            result = self.logic.calculator(expression, int(self.mode_var.get()[-1]))
             self.result_var.set(result)
             expression_no_space=""
             for char in expression:
@@ -4,11 +4,30 @@
 
 from __future__ import annotations
 import tkinter as tk
-from tkinter import ttk, messagebox
-from dataclasses import dataclass, field
+from tkinter import ttk, messagebox, filedialog
+from dataclasses import dataclass
 from typing import List, Dict
 import math
-import pickle
+import os
+from datetime import date, datetime
+
+from alerts import Alert, AlertEngine
+from budget_engine import BudgetEngine, BudgetError, Category
+from periods import current_month, month_label, month_of
+from search import SEARCH_LIMIT
+from storage import open_storage, SNAPSHOT_FILE, StorageLocked
+from startup_profile import StartupProfile
+import shared_state
+
+# Saved_Data.DAT uses the journal; point this at a .db file to use SQLite
+STORAGE_PATH = os.environ.get("BUDGET_STORAGE", SNAPSHOT_FILE)
+# set to 1 to share one state daemon per budget file between windows (and processes);
+# by default a window opens the file itself
+SHARED_STATE = os.environ.get("BUDGET_SHARED_STATE", "0") == "1"
+POLL_MS = 100
+ALERT_MS = 10_000          # how long an alert stays on the dashboard
+SEARCH_MS = 120            # search-as-you-type waits this long after the last keystroke
+ALL_CATEGORIES = "All categories"
 
 
 BG_APP = "#f6f5ff"         # app background (very light purple)
@@ -18,6 +37,8 @@ FG_TEXT = "#1f2937"        # slate-800
 FG_SUBTLE = "#6b7280"      # slate-500
 FG_SUCCESS = "#16a34a"     # green-600
 FG_ACCENT = "#2563eb"      # blue-600
+FG_WARNING = "#d97706"     # amber-600
+FG_DANGER = "#dc2626"      # red-600
 BORDER = "#e5e7eb"         # gray-200
 
 DOT_COLORS = ["#22c55e", "#3b82f6", "#f59e0b", "#ef4444", "#8b5cf6", "#06b6d4"]
@@ -31,55 +52,78 @@ def pct(n: float) -> str:
 def clamp01(x: float) -> float:
     return max(0.0, min(1.0, x))
 
-@dataclass
-class Category:
-    name: str
-    limit: float
-    color: str = "#22c55e"
-    spent: float = 0.0
-
-@dataclass
-class AppState:
-    income: float = 0.0
-    categories: List[Category] = field(default_factory=list)
-    # transactions: list of dicts {cat, desc, amount}
-    transactions: List[Dict] = field(default_factory=list)
+class BudgetApp(tk.Toplevel):
+    """The budget tracker window.
 
+    It is a Toplevel so the launcher can host it in its own process; run
+    standalone, it sits on a withdrawn root. `on_close` is called after the
+    window has been closed and its storage released."""
 
-class BudgetApp(tk.Tk):
-    def __init__(self):
-        super().__init__()
+    def __init__(self, master: tk.Misc, on_close=None):
+        super().__init__(master)
+        self.on_close = on_close
+        self.protocol("WM_DELETE_WINDOW", self.close_window)
+        self.bind("<Control-z>", lambda e: self.undo())
+        self.bind("<Control-y>", lambda e: self.redo())
+        self.bind("<Control-Shift-Z>", lambda e: self.redo())
         self.title("Budget Tracker")
         self.geometry("1100x740")
         self.configure(bg=BG_APP)
-        try:
-            file = open("Saved_Data.DAT", "rb")
-            self.data = pickle.load(file)
-            file.close()
-            print(self.data)
-            '''
-            self.state = AppState(
-                income = self.data["income"],
-                categories = [
-                    
-                ]
-            )
-            '''
-            self.state = AppState(
-                income=self.data.get("income", 0.0),
-                categories=[Category(**c) for c in self.data.get("categories", [])],
-                transactions=self.data.get("transactions", [])
-                )
-        except:
-            self.state = AppState(
-                income=0.0,
-                categories=[
-                    Category("Food", 500, DOT_COLORS[0]),
-                    Category("Rent", 1200, DOT_COLORS[1]),
-                    Category("Entertainment", 300, DOT_COLORS[2]),
-                ],
-            )
+        self.profile = StartupProfile()
+        self.alerts = AlertEngine("Total budget")
+        self.alerts.subscribe(self.on_alert)
+        with self.profile.phase("load"):
+            try:
+                self._open()
+            except (BudgetError, StorageLocked) as e:
+                # the file is open in another window without a shared daemon, or the daemon failed
+                messagebox.showerror("Budget Tracker", str(e), parent=master)
+                self.destroy()
+                if self.on_close:
+                    self.on_close()
+                return
+        with self.profile.phase("deserialize"):
+            self._build_state()
+        with self.profile.phase("styles"):
+            self._configure_styles()
+
+        # container
+        self.container = tk.Frame(self, bg=BG_APP)
+        self.container.pack(fill="both", expand=True)
+
+        # pages are built the first time they are shown
+        self.frames = {}
+        self.show("DashboardPage" if self.loaded else "SetupPage")
+        self.after_idle(self.profile.report)
+        self._rollover_job = self.after(60_000, self.check_rollover)
+        self._poll_job = self.after(POLL_MS, self.poll_shared) if self.shared else None
+
+    def _open(self):
+        self.shared = None
+        if SHARED_STATE:
+            self.shared = shared_state.attach(STORAGE_PATH, self._defaults(), alerts=self.alerts)
+        else:
+            self.storage = open_storage(STORAGE_PATH)
+            self.data = self.storage.load()
+
+    @staticmethod
+    def _defaults() -> List[Category]:
+        return [
+            Category("Food", 500, DOT_COLORS[0]),
+            Category("Rent", 1200, DOT_COLORS[1]),
+            Category("Entertainment", 300, DOT_COLORS[2]),
+        ]
+
+    def _build_state(self):
+        if self.shared is not None:
+            # the daemon holds the budget; self.state mirrors it
+            self.state = self.shared
+            self.loaded = self.shared.loaded
+        else:
+            self.state = BudgetEngine(self.storage, self.data, defaults=self._defaults(), alerts=self.alerts)
+            self.loaded = self.data is not None
 
+    def _configure_styles(self):
         # ttk theme setup
         style = ttk.Style(self)
         try:
@@ -104,79 +148,223 @@ class BudgetApp(tk.Tk):
                   background=[("active", "#15803d")])
         style.configure("Thin.Horizontal.TProgressbar", thickness=8)
         style.configure("Summary.TLabel", font=("Segoe UI", 11, "bold"))
-
-        # container
-        self.container = tk.Frame(self, bg=BG_APP)
-        self.container.pack(fill="both", expand=True)
-
-        self.frames = {}
-        for F in (SetupPage, DashboardPage):
-            frame = F(parent=self.container, controller=self)
-            self.frames[F.__name__] = frame
-            frame.place(relx=0, rely=0, relwidth=1, relheight=1)
-
-        try:
-            file = open("Saved_Data.DAT", "rb")
-            self.data = pickle.load(file)
-            file.close()
-            self.show("DashboardPage")
-        except:
-            self.show("SetupPage")
+        style.configure("Warning.TLabel", foreground=FG_WARNING, font=("Segoe UI", 11, "bold"))
+        style.configure("Danger.TLabel", foreground=FG_DANGER, font=("Segoe UI", 11, "bold"))
+
+    def page(self, name: str):
+        frame = self.frames.get(name)
+        if frame is None:
+            F = {"SetupPage": SetupPage, "DashboardPage": DashboardPage}[name]
+            with self.profile.phase(f"build {name}"):
+                frame = self.frames[name] = F(parent=self.container, controller=self)
+                frame.place(relx=0, rely=0, relwidth=1, relheight=1)
+            if hasattr(frame, "refresh"):
+                with self.profile.phase(f"first refresh {name}"):
+                    frame.refresh()
+        return frame
 
     def show(self, name: str):
-        self.frames[name].tkraise()
+        self.page(name).tkraise()
+        self.current = name
+
+    def refresh_dashboard(self):
+        frame = self.frames.get("DashboardPage")
+        if frame is not None:
+            frame.refresh()
 
-    # ---------- state operations ----------
+    # ---------- state operations (the budget itself lives in BudgetEngine) ----------
     def set_income(self, value: float):
-        self.state.income = max(0.0, value)
+        self.state.set_income(value)
 
     def add_category(self, name="Category", limit=0.0):
         color = DOT_COLORS[len(self.state.categories) % len(DOT_COLORS)]
-        self.state.categories.append(Category(name, limit, color))
+        self.state.add_category(name, limit, color)
 
     def delete_category(self, cat: Category):
-        self.state.categories = [c for c in self.state.categories if c is not cat]
+        self.state.delete_category(cat)
+
+    def rename_category(self, cat: Category, name: str):
+        self.state.rename_category(cat, name)
 
     def save_setup(self, cats_data: List[Dict], income: float):
-        self.state.income = income
-        # rebuild categories preserving spent if same name
-        spent_map = {c.name: c.spent for c in self.state.categories}
-        self.state.categories = []
-        for d in cats_data:
-            c = Category(d["name"].strip() or "Category", max(0.0, d["limit"]), d["color"])
-            c.spent = spent_map.get(c.name, 0.0)
-            self.state.categories.append(c)
+        self.state.save_setup(cats_data, income)
         messagebox.showinfo("Saved", "Budget setup saved.")
         self.show("DashboardPage")
-        self.frames["DashboardPage"].refresh()
-        self.data = app.export_for_mysql()
+        self.refresh_dashboard()
 
-    def add_transaction(self, cat_name: str, desc: str, amount: float):
-        cat = next((c for c in self.state.categories if c.name == cat_name), None)
-        if not cat:
-            messagebox.showerror("Error", "Category not found.")
+    def add_transaction(self, cat_name: str, desc: str, amount: float, day: int | None = None):
+        try:
+            tx = self.state.add_transaction(cat_name, desc, amount, day)
+        except BudgetError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        if month_of(tx["day"]) == self.state.month:
+            frame = self.frames.get("DashboardPage")
+            if frame is not None:
+                frame.on_transaction(self.state.categories.get(tx["category_id"]), tx)
+
+    # ---------- months ----------
+    def show_month(self, month: int):
+        """Switch the dashboard to another month; reads the precomputed totals only"""
+        self.state.set_month(month)
+        self.refresh_dashboard()
+
+    def month_transactions(self):
+        return self.state.month_transactions()
+
+    def search(self, text: str, cat_name: str | None = None, lo: float | None = None,
+               hi: float | None = None, limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """Newest transactions of any month matching `text` and the filters"""
+        cat_ids = None
+        if cat_name is not None:
+            cat = self.state.categories.by_name(cat_name)
+            cat_ids = [cat.id] if cat is not None else []
+        return self.state.search(text, cat_ids, lo, hi, limit)
+
+    def check_rollover(self):
+        if self.state.check_rollover():
+            self.refresh_dashboard()
+        self._rollover_job = self.after(60_000, self.check_rollover)
+
+    def import_statement(self, path: str, default_cat_name: str):
+        try:
+            result = self.state.import_statement(path, default_cat_name)
+        except BudgetError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        except (OSError, ValueError, UnicodeDecodeError) as e:
+            messagebox.showerror("Import failed", str(e))
+            return
+        self.refresh_dashboard()
+        msg = f"Imported {result.imported:,} transactions."
+        if result.skipped:
+            msg += f"\nSkipped {result.skipped:,} credits."
+        if result.rejected:
+            msg += f"\nRejected {result.rejected:,} rows that could not be read."
+        messagebox.showinfo("Import", msg)
+
+    def export(self, path: str):
+        """Write the history to `path` and the monthly category summary next to it"""
+        stem, ext = os.path.splitext(path)
+        try:
+            txs = self.state.export_transactions(path)
+            summary = self.state.export_summary(f"{stem}_summary{ext}")
+        except BudgetError as e:
+            messagebox.showerror("Error", str(e))
+            return
+        except (OSError, ValueError, ImportError) as e:
+            messagebox.showerror("Export failed", str(e))
             return
-        amount = max(0.0, amount)
-        cat.spent += amount
-        self.state.transactions.insert(0, {"category": cat_name, "desc": desc.strip() or "(no description)", "amount": amount})
-        self.frames["DashboardPage"].refresh()
-        self.data = app.export_for_mysql()
+        messagebox.showinfo("Export", f"Exported {txs.rows:,} transactions to {os.path.basename(txs.path)}"
+                                      f"\nand {summary.rows:,} summary rows to {os.path.basename(summary.path)}.")
+
+    def reconcile_spent(self) -> Dict[int, float]:
+        """Recompute the shown month's spent from its transactions (needs numpy)"""
+        fixed = self.state.reconcile_spent()
+        if fixed:
+            self.refresh_dashboard()
+        return fixed
+
+    def poll_shared(self):
+        """Apply changes other windows made through the state daemon"""
+        events = self.shared.poll()
+        if events:
+            self.apply_remote(events)
+        self._poll_job = self.after(POLL_MS, self.poll_shared)
+
+    def apply_remote(self, events: List[Dict]):
+        dash = self.frames.get("DashboardPage")
+        redraw = False
+        for event in events:
+            if event["event"] == "setup":
+                # the setup page's rows are stale; rebuild it next time it is shown
+                if self.current != "SetupPage" and "SetupPage" in self.frames:
+                    self.frames.pop("SetupPage").destroy()
+                redraw = True
+            elif event["event"] == "txs" and dash is not None and not redraw:
+                for tx in event["txs"]:
+                    cat = self.state.categories.get(tx["category_id"])
+                    if cat is not None and month_of(tx["day"]) == self.state.month:
+                        dash.on_transaction(cat, tx)
+            else:
+                redraw = True
+        if redraw:
+            self.refresh_dashboard()
+
+    # ---------- undo ----------
+    def undo(self):
+        self._after_history(self.state.undo())
+
+    def redo(self):
+        self._after_history(self.state.redo())
+
+    def _after_history(self, label: str | None):
+        if label is None:
+            self.bell()
+            return
+        # the setup page's rows were built from the old categories
+        setup = self.frames.pop("SetupPage", None)
+        if setup is not None:
+            setup.destroy()
+            if self.current == "SetupPage":
+                self.show("SetupPage")
+        self.refresh_dashboard()
+
+    def on_alert(self, alert: Alert):
+        frame = self.frames.get("DashboardPage")
+        if frame is not None:
+            frame.show_alert(alert)
+
+    def close(self):
+        """Close the budget; journal writes still queued are finished first"""
+        self.state.close()
+
+    def close_window(self):
+        self.after_cancel(self._rollover_job)
+        if self._poll_job is not None:
+            self.after_cancel(self._poll_job)
+        try:
+            self.close()
+        except OSError as e:
+            messagebox.showerror("Save failed", f"Recent changes could not be saved:\n{e}")
+        self.destroy()
+        if self.on_close:
+            self.on_close()
 
     def export_for_mysql(self):
-        """Prepare clean dicts/lists for MySQL insertion"""
-        return {"income": self.state.income, "categories": [ {
-                    "name": c.name,
-                    "limit": c.limit,
-                    "color": c.color,
-                    "spent": c.spent
-                }
-                for c in self.state.categories
-            ],
-            "transactions": self.state.transactions
-        }
+        return self.state.export_for_mysql()
+
+
+@dataclass
+class SetupEntry:
+    """One category as edited on the setup page (the rows only display these)"""
+    name: str
+    limit_text: str
+    color: str
+    cat_id: int | None = None    # id of the category it edits; None for a new one
+    limit: float = 0.0           # limit_text parsed; 0 while it is not a number
+
+    def __post_init__(self):
+        self.limit = parse_limit(self.limit_text)
+
+
+def parse_limit(text: str) -> float:
+    try:
+        return float(text or 0)
+    except ValueError:
+        return 0.0
 
 
 class SetupPage(tk.Frame):
+    """Income and category editor.
+
+    Categories live in a list of SetupEntry objects; a fixed pool of CatRow
+    widgets is bound to whichever entries are scrolled into view, so the
+    page costs the same with 5,000 categories as with 5. The budget total is
+    kept as a running sum: an edited row only contributes the change in its
+    own limit, and a burst of keystrokes is folded into one idle-time update."""
+    ROWS = 10
+
     def __init__(self, parent, controller: BudgetApp):
         super().__init__(parent, bg=BG_APP)
         self.controller = controller
@@ -191,6 +379,7 @@ class SetupPage(tk.Frame):
         self.income_var = tk.StringVar(value="0")
         self.income_entry = ttk.Entry(sec, textvariable=self.income_var, width=40)
         self.income_entry.grid(row=1, column=0, sticky="we", pady=8)
+        self.income_entry.bind("<KeyRelease>", lambda e: self.schedule_summary())
         sec.columnconfigure(0, weight=1)
 
         # Categories header row
@@ -198,10 +387,22 @@ class SetupPage(tk.Frame):
         cat_header.pack(fill="x", padx=28, pady=(16, 6))
         ttk.Label(cat_header, text="Budget Categories").pack(side="left")
         ttk.Button(cat_header, text="+  Add Category", command=self.add_row).pack(side="right")
-
-        # Category rows container
-        self.rows_frame = tk.Frame(self, bg=BG_APP)
-        self.rows_frame.pack(fill="x", padx=28)
+        self.count_lbl = ttk.Label(cat_header, style="Subtle.TLabel")
+        self.count_lbl.pack(side="right", padx=12)
+
+        # Category rows container: a recycled pool of rows plus a scrollbar
+        list_frame = tk.Frame(self, bg=BG_APP)
+        list_frame.pack(fill="x", padx=28)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient="vertical", command=self.on_scrollbar)
+        self.rows_frame = tk.Frame(list_frame, bg=BG_APP)
+        self.rows_frame.pack(side="left", fill="x", expand=True)
+        self.rows = [CatRow(self.rows_frame, on_change=self.on_row_change, on_delete=self.delete_row)
+                     for _ in range(self.ROWS)]
+        for row in self.rows:
+            row.bind_wheel(self.on_wheel)
+        list_frame.bind("<MouseWheel>", self.on_wheel)
+        list_frame.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        list_frame.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
 
         # Summary bar
         self.summary = ttk.Label(self, text="", style="Summary.TLabel")
@@ -213,30 +414,102 @@ class SetupPage(tk.Frame):
         save = ttk.Button(btns, text="Save Budget Setup", style="Success.TButton", command=self.on_save)
         save.pack(fill="x")
 
-        self.rows: List[CatRow] = []
-        for c in self.controller.state.categories:
-            self.add_row(prefill=c)
-        self.recompute_summary()
+        self.entries: List[SetupEntry] = [SetupEntry(c.name, str(c.limit), c.color, c.id)
+                                          for c in self.controller.state.categories]
+        self.total = sum(e.limit for e in self.entries)
+        self.offset = 0               # index of the entry shown in the top row
+        self.dirty = set()            # rows edited since the last summary update
+        self._summary_job = None
+        self.render()
+        self.update_summary()
+
+    # ---------- virtual list ----------
+    def render(self):
+        n = len(self.entries)
+        for i, row in enumerate(self.rows):
+            index = self.offset + i
+            if index < n:
+                row.show(self.entries[index])
+                if not row.winfo_manager():
+                    row.pack(fill="x", pady=6)
+            elif row.winfo_manager():
+                row.clear()
+                row.pack_forget()
+        if n > self.ROWS:
+            if not self.scrollbar.winfo_manager():
+                self.scrollbar.pack(side="right", fill="y", before=self.rows_frame)
+            self.scrollbar.set(self.offset / n, (self.offset + self.ROWS) / n)
+        elif self.scrollbar.winfo_manager():
+            self.scrollbar.pack_forget()
+        self.count_lbl.configure(text=f"{n:,} categories" if n > self.ROWS else "")
+
+    def scroll_to(self, offset: int):
+        self.flush_edits()
+        last = max(0, len(self.entries) - self.ROWS)
+        offset = max(0, min(last, int(offset)))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.entries))
+        elif action == "scroll":
+            step = self.ROWS if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self.scroll_to(self.offset - 3)
+        else:
+            self.scroll_to(self.offset + 3)
 
-    def add_row(self, prefill: Category | None = None):
-        row = CatRow(self.rows_frame, on_change=self.recompute_summary, on_delete=self.delete_row)
-        if prefill:
-            row.set_values(prefill.name, prefill.limit, prefill.color)
-        self.rows.append(row)
-        row.pack(fill="x", pady=6)
+    # ---------- editing ----------
+    def add_row(self):
+        self.flush_edits()
+        color = DOT_COLORS[len(self.entries) % len(DOT_COLORS)]
+        self.entries.append(SetupEntry("Category", "0", color))
+        self.offset = max(0, len(self.entries) - self.ROWS)
+        self.render()
+        self.update_summary()
 
     def delete_row(self, row: "CatRow"):
-        self.rows.remove(row)
-        row.destroy()
-        self.recompute_summary()
-
-    def recompute_summary(self, *_):
-        total = 0.0
-        for r in self.rows:
-            try:
-                total += float(r.limit_var.get() or 0)
-            except ValueError:
-                pass
+        self.flush_edits()
+        entry = row.entry
+        self.entries.remove(entry)
+        self.total -= entry.limit
+        self.offset = max(0, min(self.offset, len(self.entries) - self.ROWS))
+        self.render()
+        self.update_summary()
+
+    def on_row_change(self, row: "CatRow"):
+        self.dirty.add(row)
+        self.schedule_summary()
+
+    def schedule_summary(self):
+        # key repeat and fast typing queue many events; handle them all in one pass
+        if self._summary_job is None:
+            self._summary_job = self.after_idle(self.update_summary)
+
+    def flush_edits(self):
+        """Copy edited rows into their entries and move the total by each change"""
+        for row in self.dirty:
+            entry = row.entry
+            if entry is None:
+                continue
+            entry.name = row.name_var.get()
+            text = row.limit_var.get()
+            if text != entry.limit_text:
+                entry.limit_text = text
+                limit = parse_limit(text)
+                self.total += limit - entry.limit
+                entry.limit = limit
+        self.dirty.clear()
+
+    def update_summary(self):
+        self._summary_job = None
+        self.flush_edits()
+        total = self.total
         try:
             income = float(self.income_var.get() or 0)
         except ValueError:
@@ -249,6 +522,7 @@ class SetupPage(tk.Frame):
         self.summary.configure(text=f"Total Budget: {money(total)}  {pct_txt}")
 
     def on_save(self):
+        self.flush_edits()
         try:
             income = float(self.income_var.get() or 0)
         except ValueError:
@@ -256,28 +530,35 @@ class SetupPage(tk.Frame):
             return
         cats = []
         seen = set()
-        for r in self.rows:
-            name = r.name_var.get().strip() or "Category"
+        for e in self.entries:
+            name = e.name.strip() or "Category"
             if name in seen:
                 messagebox.showerror("Duplicate name", f"Category '{name}' appears more than once.")
                 return
             seen.add(name)
             try:
-                limit = float(r.limit_var.get() or 0)
+                limit = float(e.limit_text or 0)
             except ValueError:
                 messagebox.showerror("Invalid amount", f"Limit for '{name}' must be a number.")
                 return
-            cats.append({"name": name, "limit": max(0.0, limit), "color": r.color})
+            cats.append({"id": e.cat_id, "name": name, "limit": max(0.0, limit), "color": e.color})
         if not cats:
             messagebox.showerror("No categories", "Add at least one category.")
             return
         self.controller.save_setup(cats, max(0.0, income))
+        # new entries now edit the categories that were just created
+        for e, c in zip(self.entries, self.controller.state.categories):
+            e.cat_id = c.id
+
 
 class CatRow(tk.Frame):
+    """One recycled editor row; show() binds it to a SetupEntry"""
+
     def __init__(self, parent, on_change, on_delete):
         super().__init__(parent, bg=BG_APP)
         self.on_change = on_change
         self.on_delete = on_delete
+        self.entry: SetupEntry | None = None
         self.color = DOT_COLORS[0]
 
         # color dot
@@ -293,28 +574,47 @@ class CatRow(tk.Frame):
         self.name_entry.grid(row=0, column=1, sticky="we")
         self.limit_entry = ttk.Entry(self, textvariable=self.limit_var, width=14, justify="right")
         self.limit_entry.grid(row=0, column=2, padx=(10, 0))
-        self.name_entry.bind("<KeyRelease>", self.on_change)
-        self.limit_entry.bind("<KeyRelease>", self.on_change)
+        for widget in (self.name_entry, self.limit_entry):
+            widget.bind("<KeyRelease>", lambda e: self.on_change(self))
+            widget.bind("<<Paste>>", lambda e: self.after_idle(self.on_change, self))
 
-        del_btn = ttk.Button(self, text="🗑", width=3, command=lambda: self.on_delete(self))
-        del_btn.grid(row=0, column=3, padx=6)
+        self.del_btn = ttk.Button(self, text="🗑", width=3, command=lambda: self.on_delete(self))
+        self.del_btn.grid(row=0, column=3, padx=6)
 
         self.columnconfigure(1, weight=1)
 
-    def set_values(self, name: str, limit: float, color: str):
-        self.name_var.set(name)
-        self.limit_var.set(str(limit))
-        self.color = color
-        self.dot.itemconfigure(self._dot_id, fill=self.color, outline=self.color)
+    def bind_wheel(self, callback):
+        for widget in (self, self.dot, self.name_entry, self.limit_entry, self.del_btn):
+            widget.bind("<MouseWheel>", callback)
+            widget.bind("<Button-4>", callback)
+            widget.bind("<Button-5>", callback)
+
+    def show(self, entry: SetupEntry):
+        self.entry = entry
+        self.name_var.set(entry.name)
+        self.limit_var.set(entry.limit_text)
+        self._set_color(entry.color)
+
+    def clear(self):
+        self.entry = None
+
+    def _set_color(self, color: str):
+        if color != self.color:
+            self.color = color
+            self.dot.itemconfigure(self._dot_id, fill=color, outline=color)
 
     def cycle_color(self, *_):
+        if self.entry is None:
+            return
         i = (DOT_COLORS.index(self.color) + 1) % len(DOT_COLORS)
-        self.color = DOT_COLORS[i]
-        self.dot.itemconfigure(self._dot_id, fill=self.color, outline=self.color)
-        self.on_change()
+        self._set_color(DOT_COLORS[i])
+        self.entry.color = self.color
 
 
 class DashboardPage(tk.Frame):
+    COLS = 3        # category cards per grid row
+    RECENT = 10     # transactions shown under "Recent Transactions"
+
     def __init__(self, parent, controller: BudgetApp):
         super().__init__(parent, bg=BG_APP)
         self.controller = controller
@@ -327,14 +627,34 @@ class DashboardPage(tk.Frame):
 
         btns = tk.Frame(topbar, bg=BG_APP)
         btns.pack(side="right")
+        ttk.Button(btns, text="Undo", command=controller.undo).pack(side="left", padx=6)
+        ttk.Button(btns, text="Redo", command=controller.redo).pack(side="left", padx=6)
+        ttk.Button(btns, text="Import", command=self.open_import).pack(side="left", padx=6)
+        ttk.Button(btns, text="Export", command=self.open_export).pack(side="left", padx=6)
+        ttk.Button(btns, text="History", command=self.open_history).pack(side="left", padx=6)
         ttk.Button(btns, text="Settings", command=lambda: controller.show("SetupPage")).pack(side="left", padx=6)
         ttk.Button(btns, text="+  Add Expense", style="Accent.TButton",
                    command=self.open_add_expense).pack(side="left", padx=6)
 
-        # Monthly income line
+        # month switcher and monthly income line
+        month_bar = tk.Frame(self, bg=BG_APP)
+        month_bar.pack(fill="x", padx=28, pady=(0, 4))
+        ttk.Button(month_bar, text="‹", width=3,
+                   command=lambda: controller.show_month(controller.state.month - 1)).pack(side="left")
+        self.month_lbl = ttk.Label(month_bar, style="Summary.TLabel", width=16, anchor="center")
+        self.month_lbl.pack(side="left", padx=6)
+        ttk.Button(month_bar, text="›", width=3,
+                   command=lambda: controller.show_month(controller.state.month + 1)).pack(side="left")
+        ttk.Button(month_bar, text="This Month",
+                   command=lambda: controller.show_month(current_month())).pack(side="left", padx=10)
+
         self.income_line = ttk.Label(self, text="", style="Subtle.TLabel")
         self.income_line.pack(anchor="w", padx=28, pady=(0, 8))
 
+        # latest threshold alert; packed only while one is showing
+        self.alert_lbl = ttk.Label(self)
+        self._alert_job = None
+
         # cards container
         self.cards_frame = tk.Frame(self, bg=BG_APP)
         self.cards_frame.pack(fill="x", padx=28)
@@ -343,90 +663,183 @@ class DashboardPage(tk.Frame):
         trans_card = ttk.Frame(self, style="Card.TFrame")
         trans_card.pack(fill="both", expand=True, padx=28, pady=(18, 26))
         tk.Frame(trans_card, height=16, bg=BG_CARD).pack()  # top spacing
-        ttk.Label(trans_card, text="Recent Transactions", style="H2.TLabel").pack(anchor="w", padx=18)
+        trans_head = tk.Frame(trans_card, bg=BG_CARD)
+        trans_head.pack(fill="x", padx=18)
+        self.trans_title = ttk.Label(trans_head, text="Recent Transactions", style="H2.TLabel")
+        self.trans_title.pack(side="left")
+
+        # search-as-you-type over the whole history; any non-empty field switches the list to results
+        self.search_var = tk.StringVar()
+        self.search_cat = tk.StringVar(value=ALL_CATEGORIES)
+        self.search_min = tk.StringVar()
+        self.search_max = tk.StringVar()
+        self.max_entry = ttk.Entry(trans_head, textvariable=self.search_max, width=8)
+        self.max_entry.pack(side="right")
+        ttk.Label(trans_head, text="to").pack(side="right", padx=4)
+        self.min_entry = ttk.Entry(trans_head, textvariable=self.search_min, width=8)
+        self.min_entry.pack(side="right")
+        ttk.Label(trans_head, text="$").pack(side="right", padx=(10, 2))
+        self.cat_filter = ttk.Combobox(trans_head, textvariable=self.search_cat, state="readonly", width=16)
+        self.cat_filter.pack(side="right", padx=(10, 0))
+        ttk.Entry(trans_head, textvariable=self.search_var, width=24).pack(side="right", padx=(18, 0))
+        ttk.Label(trans_head, text="Search", style="Subtle.TLabel").pack(side="right")
+        self._search_job = None
+        for var in (self.search_var, self.search_cat, self.search_min, self.search_max):
+            var.trace_add("write", lambda *_: self.schedule_search())
         tk.Frame(trans_card, height=8, bg=BG_CARD).pack()
 
         self.trans_container = tk.Frame(trans_card, bg=BG_CARD)
         self.trans_container.pack(fill="both", expand=True, padx=18, pady=(0, 18))
 
-        self.refresh()
+        # retained widgets: refresh() and on_transaction() update these in place
+        self.cards: Dict[int, CategoryCard] = {}
+        self.card_slots: Dict[int, tuple] = {}    # category id -> (row, column) it is gridded at
+        self.empty_cards_lbl = ttk.Label(self.cards_frame, text="No categories. Add them in Settings.")
+        self.tx_rows: List[TransactionRow] = []
+        self.history: HistoryWindow | None = None
+        self.empty_tx_lbl = ttk.Label(self.trans_container, text="No transactions yet. Add your first expense!",
+                                      style="Subtle.TLabel")
+        for j in range(self.COLS):
+            self.cards_frame.columnconfigure(j, weight=1)
 
     def refresh(self):
+        """Bring the page in line with the state, touching only what changed"""
         # income line
         inc = self.controller.state.income
         self.income_line.configure(text=f"Monthly Income: {money(inc)}")
-
-        # rebuild cards
-        for child in self.cards_frame.winfo_children():
-            child.destroy()
+        self.month_lbl.configure(text=month_label(self.controller.state.month))
 
         cats = self.controller.state.categories
-        if not cats:
-            ttk.Label(self.cards_frame, text="No categories. Add them in Settings.").pack()
-            return
-
-        # grid: 3 columns
-        cols = 3
+        # diff the cards: drop removed ones, create added ones, update the rest
+        for cat_id in [i for i in self.cards if cats.get(i) is None]:
+            self.cards.pop(cat_id).destroy()
+            self.card_slots.pop(cat_id, None)
         for i, c in enumerate(cats):
-            card = self._category_card(self.cards_frame, c)
-            r, col = divmod(i, cols)
-            card.grid(row=r, column=col, sticky="nsew", padx=14, pady=10)
-        for j in range(cols):
-            self.cards_frame.columnconfigure(j, weight=1)
-
-        # transactions
-        for child in self.trans_container.winfo_children():
-            child.destroy()
-        txs = self.controller.state.transactions[:10]
-        if not txs:
-            ttk.Label(self.trans_container, text="No transactions yet. Add your first expense!",
-                      style="Subtle.TLabel").pack(anchor="w")
+            card = self.cards.get(c.id)
+            if card is None:
+                card = self.cards[c.id] = CategoryCard(self.cards_frame)
+            card.show(c)
+            slot = divmod(i, self.COLS)
+            if self.card_slots.get(c.id) != slot:
+                card.grid(row=slot[0], column=slot[1], sticky="nsew", padx=14, pady=10)
+                self.card_slots[c.id] = slot
+        if cats:
+            self.empty_cards_lbl.pack_forget()
         else:
-            for t in txs:
-                row = tk.Frame(self.trans_container, bg=BG_CARD)
-                row.pack(fill="x", pady=4)
-                left = tk.Frame(row, bg=BG_CARD)
-                left.pack(side="left", fill="x", expand=True)
-                ttk.Label(left, text=t["desc"]).pack(anchor="w")
-                ttk.Label(left, text=t["category"], style="Subtle.TLabel").pack(anchor="w")
-                ttk.Label(row, text=money(t["amount"]), style="Summary.TLabel").pack(side="right")
-
-    def _category_card(self, parent, cat: Category) -> ttk.Frame:
-        card = ttk.Frame(parent, style="Card.TFrame")
-        # internal padding wrapper to get a “rounded” feel via spacing
-        inner = tk.Frame(card, bg=BG_CARD)
-        inner.pack(fill="both", expand=True, padx=16, pady=16)
-
-        # Title with colored dot
-        top = tk.Frame(inner, bg=BG_CARD)
-        top.pack(fill="x")
-        dot = tk.Canvas(top, width=14, height=14, bg=BG_CARD, highlightthickness=0)
-        dot.create_oval(2, 2, 12, 12, fill=cat.color, outline=cat.color)
-        dot.pack(side="right")
-        ttk.Label(top, text=cat.name, font=("Segoe UI", 14, "bold")).pack(side="left")
+            self.empty_cards_lbl.pack()
+
+        names = [ALL_CATEGORIES] + [c.name for c in cats]
+        self.cat_filter.configure(values=names)
+        if self.search_cat.get() not in names:
+            self.search_cat.set(ALL_CATEGORIES)
+
+        # transactions: category names may have changed, so re-show the visible rows
+        self.show_transactions()
+        if self._history_open():
+            self.history.render()
+
+    # ---------- transactions list ----------
+    def _search_query(self):
+        """(text, category, min, max) from the search bar, or None when it is empty"""
+        text = self.search_var.get().strip()
+        cat = self.search_cat.get()
+        cat = None if cat == ALL_CATEGORIES else cat
+        bounds = []
+        for var, entry in ((self.search_min, self.min_entry), (self.search_max, self.max_entry)):
+            raw = var.get().strip().lstrip("$").replace(",", "")
+            try:
+                bound = float(raw) if raw else None
+                if bound is not None and not math.isfinite(bound):
+                    raise ValueError(raw)
+                bounds.append(bound)
+                entry.state(["!invalid"])
+            except ValueError:
+                # ignore a half-typed bound rather than flash an error on every keystroke
+                bounds.append(None)
+                entry.state(["invalid"])
+        if not text and cat is None and bounds == [None, None]:
+            return None
+        return text, cat, bounds[0], bounds[1]
+
+    def schedule_search(self):
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(SEARCH_MS, self.show_transactions)
+
+    def show_transactions(self):
+        """The month's latest transactions, or the search results while searching"""
+        self._search_job = None
+        query = self._search_query()
+        if query is None:
+            self.trans_title.configure(text="Recent Transactions")
+            self.empty_tx_lbl.configure(text="No transactions yet. Add your first expense!")
+            txs = self.controller.month_transactions()[:self.RECENT]
+        else:
+            self.trans_title.configure(text="Search Results")
+            self.empty_tx_lbl.configure(text="No matching transactions.")
+            txs = self.controller.search(*query, limit=self.RECENT)
+        while len(self.tx_rows) > len(txs):
+            self.tx_rows.pop().destroy()
+        for row, t in zip(self.tx_rows, txs):
+            row.show(t)
+        for t in txs[len(self.tx_rows):]:
+            row = TransactionRow(self.trans_container)
+            row.show(t)
+            row.pack(fill="x", pady=4)
+            self.tx_rows.append(row)
+        self._toggle_empty_tx()
+
+    def on_transaction(self, cat: Category, tx: Dict):
+        """One expense was added: update its card and put one row on top"""
+        card = self.cards.get(cat.id)
+        if card is not None:
+            card.show(cat)
+        if self._history_open():
+            self.history.on_new_transaction()
+        if self._search_query() is not None:
+            # the new expense may or may not match; let the index decide
+            self.schedule_search()
+            return
+        row = TransactionRow(self.trans_container)
+        row.show({**tx, "category": cat.name, "date": date.fromordinal(tx["day"])})
+        if self.tx_rows:
+            row.pack(fill="x", pady=4, before=self.tx_rows[0])
+        else:
+            row.pack(fill="x", pady=4)
+        self.tx_rows.insert(0, row)
+        if len(self.tx_rows) > self.RECENT:
+            self.tx_rows.pop().destroy()
+        self._toggle_empty_tx()
+
+    def show_alert(self, alert: Alert):
+        """Show the latest alert under the income line for a few seconds"""
+        self.alert_lbl.configure(text=("⚠  " if alert.over else "") + alert.message,
+                                 style="Danger.TLabel" if alert.over else "Warning.TLabel")
+        if self._alert_job is None:
+            self.alert_lbl.pack(anchor="w", padx=28, pady=(0, 8), after=self.income_line)
+        else:
+            self.after_cancel(self._alert_job)
+        self._alert_job = self.after(ALERT_MS, self.hide_alert)
 
-        # Spent line
-        spent_line = ttk.Label(inner, text=f"Spent   {money(cat.spent)} / {money(cat.limit)}",
-                               style="Subtle.TLabel")
-        spent_line.pack(anchor="w", pady=(8, 6))
+    def hide_alert(self):
+        self._alert_job = None
+        self.alert_lbl.pack_forget()
 
-        # progress bar
-        progress = ttk.Progressbar(inner, style="Thin.Horizontal.TProgressbar",
-                                   orient="horizontal", mode="determinate", length=300)
-        ratio = 0.0 if cat.limit <= 0 else clamp01(cat.spent / cat.limit)
-        progress["value"] = ratio * 100
-        progress.pack(fill="x")
+    def _toggle_empty_tx(self):
+        if self.tx_rows:
+            self.empty_tx_lbl.pack_forget()
+        else:
+            self.empty_tx_lbl.pack(anchor="w")
 
-        # footer: % used and left
-        footer = tk.Frame(inner, bg=BG_CARD)
-        footer.pack(fill="x", pady=(6, 0))
-        used_pct = 0.0 if cat.limit <= 0 else (cat.spent / cat.limit * 100.0)
-        used_lbl = ttk.Label(footer, text=f"{used_pct:.0f}% used", foreground=FG_SUCCESS)
-        used_lbl.pack(side="left")
+    def _history_open(self) -> bool:
+        return self.history is not None and bool(self.history.winfo_exists())
 
-        left_amt = max(0.0, cat.limit - cat.spent)
-        ttk.Label(footer, text=f"{money(left_amt)} left", style="Subtle.TLabel").pack(side="right")
-        return card
+    def open_history(self):
+        if self._history_open():
+            self.history.lift()
+            self.history.focus_set()
+            return
+        self.history = HistoryWindow(self, self.controller)
 
     def open_add_expense(self):
         cats = [c.name for c in self.controller.state.categories]
@@ -437,7 +850,7 @@ class DashboardPage(tk.Frame):
         dlg = tk.Toplevel(self)
         dlg.title("Add Expense")
         dlg.configure(bg=BG_APP)
-        dlg.geometry("420x280")
+        dlg.geometry("420x340")
         dlg.resizable(False, False)
 
         ttk.Label(dlg, text="Add Expense", style="H2.TLabel").pack(anchor="w", padx=20, pady=(16, 8))
@@ -456,7 +869,11 @@ class DashboardPage(tk.Frame):
 
         ttk.Label(form, text="Amount").grid(row=4, column=0, sticky="w")
         amt_var = tk.StringVar(value="")
-        ttk.Entry(form, textvariable=amt_var).grid(row=5, column=0, sticky="we", pady=(2, 6))
+        ttk.Entry(form, textvariable=amt_var).grid(row=5, column=0, sticky="we", pady=(2, 10))
+
+        ttk.Label(form, text="Date (YYYY-MM-DD)").grid(row=6, column=0, sticky="w")
+        date_var = tk.StringVar(value=date.today().isoformat())
+        ttk.Entry(form, textvariable=date_var).grid(row=7, column=0, sticky="we", pady=(2, 6))
 
         form.columnconfigure(0, weight=1)
 
@@ -466,22 +883,223 @@ class DashboardPage(tk.Frame):
             except ValueError:
                 messagebox.showerror("Invalid amount", "Amount must be a number.")
                 return
-            if amt <= 0:
+            # float() also reads "inf" and "nan", which no expense can be
+            if not math.isfinite(amt) or amt <= 0:
                 messagebox.showerror("Invalid amount", "Amount must be positive.")
                 return
-            self.controller.add_transaction(cat_var.get(), desc_var.get(), amt)
+            try:
+                day = datetime.strptime(date_var.get().strip(), "%Y-%m-%d").toordinal()
+            except ValueError:
+                messagebox.showerror("Invalid date", "Date must look like 2025-01-31.")
+                return
+            self.controller.add_transaction(cat_var.get(), desc_var.get(), amt, day)
             dlg.destroy()
 
         tk.Frame(dlg, height=6, bg=BG_APP).pack()
         ttk.Button(dlg, text="Add Expense", style="Accent.TButton", command=submit).pack(padx=20, pady=12, fill="x")
 
-if __name__ == "__main__":
-    app = BudgetApp()
-    app.mainloop()
-    file = open("Saved_Data.DAT", "wb")
-    pickle.dump(app.data, file)
-    file.close()
+    def open_import(self):
+        cats = [c.name for c in self.controller.state.categories]
+        if not cats:
+            messagebox.showerror("No categories", "Create categories in Settings first.")
+            return
 
+        dlg = tk.Toplevel(self)
+        dlg.title("Import Statement")
+        dlg.configure(bg=BG_APP)
+        dlg.geometry("420x220")
+        dlg.resizable(False, False)
 
+        ttk.Label(dlg, text="Import Statement", style="H2.TLabel").pack(anchor="w", padx=20, pady=(16, 8))
 
+        form = tk.Frame(dlg, bg=BG_APP)
+        form.pack(fill="x", padx=20)
+        ttk.Label(form, text="Category for rows without a known category").grid(row=0, column=0, sticky="w")
+        cat_var = tk.StringVar(value=cats[0])
+        ttk.Combobox(form, values=cats, textvariable=cat_var, state="readonly").grid(row=1, column=0, sticky="we", pady=(2, 10))
+        form.columnconfigure(0, weight=1)
+
+        def choose():
+            path = filedialog.askopenfilename(
+                parent=dlg, title="Choose a bank statement",
+                filetypes=[("Bank statements", "*.csv *.ofx *.qfx"), ("All files", "*.*")])
+            if not path:
+                return
+            dlg.destroy()
+            self.controller.import_statement(path, cat_var.get())
+
+        ttk.Button(dlg, text="Choose File…", style="Accent.TButton", command=choose).pack(padx=20, pady=12, fill="x")
+
+    def open_export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export transactions", defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON Lines", "*.jsonl"), ("Parquet (needs pyarrow)", "*.parquet")])
+        if path:
+            self.controller.export(path)
+
+
+class CategoryCard(ttk.Frame):
+    """Dashboard card for one category; show() only reconfigures what changed"""
+    def __init__(self, parent):
+        super().__init__(parent, style="Card.TFrame")
+        self._shown = None
+        # internal padding wrapper to get a “rounded” feel via spacing
+        inner = tk.Frame(self, bg=BG_CARD)
+        inner.pack(fill="both", expand=True, padx=16, pady=16)
+
+        # Title with colored dot
+        top = tk.Frame(inner, bg=BG_CARD)
+        top.pack(fill="x")
+        self.dot = tk.Canvas(top, width=14, height=14, bg=BG_CARD, highlightthickness=0)
+        self._dot_id = self.dot.create_oval(2, 2, 12, 12)
+        self.dot.pack(side="right")
+        self.name_lbl = ttk.Label(top, font=("Segoe UI", 14, "bold"))
+        self.name_lbl.pack(side="left")
 
+        # Spent line
+        self.spent_line = ttk.Label(inner, style="Subtle.TLabel")
+        self.spent_line.pack(anchor="w", pady=(8, 6))
+
+        # progress bar
+        self.progress = ttk.Progressbar(inner, style="Thin.Horizontal.TProgressbar",
+                                        orient="horizontal", mode="determinate", length=300)
+        self.progress.pack(fill="x")
+
+        # footer: % used and left
+        footer = tk.Frame(inner, bg=BG_CARD)
+        footer.pack(fill="x", pady=(6, 0))
+        self.used_lbl = ttk.Label(footer, foreground=FG_SUCCESS)
+        self.used_lbl.pack(side="left")
+        self.left_lbl = ttk.Label(footer, style="Subtle.TLabel")
+        self.left_lbl.pack(side="right")
+
+    def show(self, cat: Category):
+        shown = (cat.name, cat.color, cat.limit, cat.spent)
+        if shown == self._shown:
+            return
+        old = self._shown or (None, None, None, None)
+        self._shown = shown
+        if cat.name != old[0]:
+            self.name_lbl.configure(text=cat.name)
+        if cat.color != old[1]:
+            self.dot.itemconfigure(self._dot_id, fill=cat.color, outline=cat.color)
+        if (cat.limit, cat.spent) != old[2:]:
+            self.spent_line.configure(text=f"Spent   {money(cat.spent)} / {money(cat.limit)}")
+            ratio = 0.0 if cat.limit <= 0 else clamp01(cat.spent / cat.limit)
+            self.progress["value"] = ratio * 100
+            used_pct = 0.0 if cat.limit <= 0 else (cat.spent / cat.limit * 100.0)
+            over = cat.spent > cat.limit
+            color = FG_DANGER if over else FG_WARNING if used_pct >= 80 else FG_SUCCESS
+            self.used_lbl.configure(text=f"{used_pct:.0f}% used", foreground=color)
+            if over:
+                self.left_lbl.configure(text=f"{money(cat.spent - cat.limit)} over", foreground=FG_DANGER)
+            else:
+                self.left_lbl.configure(text=f"{money(cat.limit - cat.spent)} left", foreground=FG_SUBTLE)
+
+
+class TransactionRow(tk.Frame):
+    def __init__(self, parent):
+        super().__init__(parent, bg=BG_CARD)
+        left = tk.Frame(self, bg=BG_CARD)
+        left.pack(side="left", fill="x", expand=True)
+        self.desc_lbl = ttk.Label(left)
+        self.desc_lbl.pack(anchor="w")
+        self.cat_lbl = ttk.Label(left, style="Subtle.TLabel")
+        self.cat_lbl.pack(anchor="w")
+        self.amount_lbl = ttk.Label(self, style="Summary.TLabel")
+        self.amount_lbl.pack(side="right")
+
+    def show(self, t: Dict):
+        self.desc_lbl.configure(text=t["desc"])
+        self.cat_lbl.configure(text=f"{t['category']}  ·  {t['date']:%b %d, %Y}")
+        self.amount_lbl.configure(text=money(t["amount"]))
+
+    def clear(self):
+        for lbl in (self.desc_lbl, self.cat_lbl, self.amount_lbl):
+            lbl.configure(text="")
+
+
+class HistoryWindow(tk.Toplevel):
+    """Full transaction history.
+
+    A fixed pool of rows is refilled from the transaction store as you
+    scroll, so only one screenful is ever read or drawn however long the
+    history is."""
+    ROWS = 15
+
+    def __init__(self, parent, controller: BudgetApp):
+        super().__init__(parent)
+        self.controller = controller
+        self.offset = 0     # position of the top row, counted from the newest transaction
+        self.title("Transaction History")
+        self.configure(bg=BG_APP)
+        self.geometry("560x760")
+
+        ttk.Label(self, text="Transaction History", style="H2.TLabel").pack(anchor="w", padx=20, pady=(16, 2))
+        self.count_lbl = ttk.Label(self, style="Subtle.TLabel")
+        self.count_lbl.pack(anchor="w", padx=20, pady=(0, 8))
+
+        card = ttk.Frame(self, style="Card.TFrame")
+        card.pack(fill="both", expand=True, padx=20, pady=(0, 20))
+        self.scrollbar = ttk.Scrollbar(card, orient="vertical", command=self.on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        rows_frame = tk.Frame(card, bg=BG_CARD)
+        rows_frame.pack(side="left", fill="both", expand=True, padx=18, pady=12)
+        self.rows = [TransactionRow(rows_frame) for _ in range(self.ROWS)]
+        for row in self.rows:
+            row.pack(fill="x", pady=4)
+
+        self.bind("<MouseWheel>", self.on_wheel)
+        self.bind("<Button-4>", lambda e: self.scroll_to(self.offset - 3))
+        self.bind("<Button-5>", lambda e: self.scroll_to(self.offset + 3))
+        self.bind("<Prior>", lambda e: self.scroll_to(self.offset - self.ROWS))
+        self.bind("<Next>", lambda e: self.scroll_to(self.offset + self.ROWS))
+        self.bind("<Home>", lambda e: self.scroll_to(0))
+        self.bind("<End>", lambda e: self.scroll_to(len(self.controller.state.transactions)))
+        self.render()
+
+    def scroll_to(self, offset: int):
+        last = max(0, len(self.controller.state.transactions) - self.ROWS)
+        offset = max(0, min(last, int(offset)))
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+
+    def on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.controller.state.transactions))
+        elif action == "scroll":
+            step = self.ROWS if unit == "pages" else 1
+            self.scroll_to(self.offset + int(amount) * step)
+
+    def on_wheel(self, event):
+        self.scroll_to(self.offset - (3 if event.delta > 0 else -3))
+
+    def on_new_transaction(self):
+        # keep the same rows in view unless we are following the newest ones
+        if self.offset > 0:
+            self.offset += 1
+        self.render()
+
+    def render(self):
+        txs = self.controller.state.transactions
+        total = len(txs)
+        page = txs[self.offset:self.offset + self.ROWS]
+        for i, row in enumerate(self.rows):
+            if i < len(page):
+                row.show(page[i])
+            else:
+                row.clear()
+        if total:
+            self.scrollbar.set(self.offset / total, (self.offset + len(page)) / total)
+            self.count_lbl.configure(
+                text=f"Showing {self.offset + 1:,}–{self.offset + len(page):,} of {total:,} transactions")
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.count_lbl.configure(text="No transactions yet.")
+
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.withdraw()
+    app = BudgetApp(root, on_close=root.destroy)
+    root.mainloop()
@@ -0,0 +1,126 @@
+# alerts.py
+# Threshold alerts for budgets.
+# Each category (and the budget as a whole) gets its alert levels, e.g. 50%,
+# 80% and 100% of its limit, precomputed as amounts. Only the next level not
+# yet reached is kept handy, so checking a spend is one comparison: nothing
+# is rescanned, and the levels are rebuilt only when limits or the month
+# change. Alerts go to subscribers (the GUI, scripts, the HTTP service), so
+# one process can watch many budgets cheaply.
+
+from __future__ import annotations
+from typing import Callable, Dict, Iterable, List, Tuple
+
+THRESHOLDS = (0.5, 0.8, 1.0)
+NEVER = float("inf")
+
+
+class Alert:
+    """A category (or, with category_id None, the whole budget) reached a threshold"""
+    __slots__ = ("budget", "category_id", "name", "threshold", "spent", "limit", "month")
+
+    def __init__(self, budget: str, category_id: int | None, name: str, threshold: float,
+                 spent: float, limit: float, month: int):
+        self.budget = budget
+        self.category_id = category_id
+        self.name = name
+        self.threshold = threshold
+        self.spent = spent
+        self.limit = limit
+        self.month = month
+
+    @property
+    def over(self) -> bool:
+        return self.threshold >= 1.0
+
+    @property
+    def message(self) -> str:
+        if self.over:
+            return f"{self.name} is over budget: ${self.spent:,.2f} spent of ${self.limit:,.2f}"
+        return f"{self.name} has used {self.threshold:.0%} of its budget (${self.spent:,.2f} of ${self.limit:,.2f})"
+
+    def as_dict(self) -> Dict:
+        return {"budget": self.budget, "category_id": self.category_id, "name": self.name,
+                "threshold": self.threshold, "spent": self.spent, "limit": self.limit, "month": self.month}
+
+    def __repr__(self):
+        return f"Alert({self.budget!r}, {self.name!r}, {self.threshold:.0%}, spent={self.spent!r})"
+
+
+class AlertEngine:
+    """Fires an Alert the first time spending reaches a threshold in a month.
+
+    BudgetEngine calls check() after every spend and rearm() whenever limits,
+    categories or the month being looked at change."""
+
+    BUDGET = None   # key of the whole-budget levels
+
+    def __init__(self, name: str = "", thresholds: Iterable[float] = THRESHOLDS):
+        self.name = name
+        self.thresholds = tuple(sorted(thresholds))
+        self.subscribers: List[Callable[[Alert], None]] = []
+        self.month = 0
+        # key -> (name, limit, level amounts); key -> index of the next level; key -> its amount
+        self.levels: Dict[int | None, Tuple[str, float, Tuple[float, ...]]] = {}
+        self.pending: Dict[int | None, int] = {}
+        self.next_at: Dict[int | None, float] = {}
+
+    def subscribe(self, callback: Callable[[Alert], None]) -> Callable[[], None]:
+        """Call `callback` with every alert; returns a function that unsubscribes it"""
+        self.subscribers.append(callback)
+        return lambda: self.subscribers.remove(callback) if callback in self.subscribers else None
+
+    def _reached(self, key, spent: float) -> int:
+        """Number of levels of `key` that `spent` has reached"""
+        levels = self.levels[key][2]
+        k = 0
+        while k < len(levels) and spent > 0 and spent >= levels[k]:
+            k += 1
+        return k
+
+    def _arm(self, key, name: str, limit: float, spent: float, notify: bool):
+        before = self.pending.get(key) if notify else None
+        self.levels[key] = (name, limit, tuple(limit * t for t in self.thresholds))
+        reached = self._reached(key, spent)
+        self.pending[key] = reached
+        self.next_at[key] = self.levels[key][2][reached] if reached < len(self.thresholds) else NEVER
+        if before is not None and reached > before:
+            self._emit(key, reached - 1, spent)
+
+    def rearm(self, categories, total_limit: float, total_spent: float, month: int, notify: bool = False):
+        """Rebuild every level from current limits and spending.
+
+        Levels already reached count as fired. With `notify`, levels crossed
+        since the last rearm (e.g. by an import or a lowered limit) fire now;
+        a new month always starts silently."""
+        notify = notify and month == self.month
+        self.month = month
+        old = self.levels
+        self.levels, self.pending, self.next_at = {}, dict(self.pending), {}
+        for c in categories:
+            self._arm(c.id, c.name, c.limit, c.spent, notify)
+        self._arm(self.BUDGET, self.name or "Budget", total_limit, total_spent, notify)
+        for key in old.keys() - self.levels.keys():
+            self.pending.pop(key, None)
+
+    def check(self, cat, total_spent: float):
+        """A spend was added to `cat`; O(1) unless a level is reached"""
+        if cat.spent >= self.next_at.get(cat.id, NEVER) and cat.spent > 0:
+            self._advance(cat.id, cat.spent)
+        if total_spent >= self.next_at.get(self.BUDGET, NEVER) and total_spent > 0:
+            self._advance(self.BUDGET, total_spent)
+
+    def _advance(self, key, spent: float):
+        k = self.pending[key]
+        levels = self.levels[key][2]
+        while k < len(levels) and spent >= levels[k]:
+            k += 1
+        self.pending[key] = k
+        self.next_at[key] = levels[k] if k < len(levels) else NEVER
+        # one spend can pass several levels; only the highest is reported
+        self._emit(key, k - 1, spent)
+
+    def _emit(self, key, k: int, spent: float):
+        name, limit, _ = self.levels[key]
+        alert = Alert(self.name, key, name, self.thresholds[k], spent, limit, self.month)
+        for callback in list(self.subscribers):
+            callback(alert)
@@ -0,0 +1,57 @@
+# analytics.py
+# Vectorized rollups over the transaction history.
+# Works on NumPy columns (amounts, category ids and days, oldest first), so
+# rebuilding every category's spent is a couple of array operations instead
+# of a Python loop over every transaction. Requires numpy.
+
+from __future__ import annotations
+from typing import Dict, Iterable
+
+import numpy as np
+
+from periods import month_days
+
+
+class Analytics:
+    def __init__(self, amounts, cat_ids, days=None):
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+        self.cat_ids = np.asarray(cat_ids, dtype=np.int64)
+        self.days = None if days is None else np.asarray(days, dtype=np.int64)
+        self.size = int(self.cat_ids.max()) + 1 if len(self.cat_ids) else 0
+
+    @classmethod
+    def from_transactions(cls, transactions) -> "Analytics":
+        """Build from AppState.transactions (TransactionStore, MappedStore or the SQLite view)"""
+        return cls(*transactions.columns())
+
+    def month(self, month: int) -> "Analytics":
+        """The same rollups restricted to one month"""
+        first, last = month_days(month)
+        mask = (self.days >= first) & (self.days <= last)
+        return Analytics(self.amounts[mask], self.cat_ids[mask], self.days[mask])
+
+    # ---------- per-category rollups ----------
+    def counts_array(self) -> np.ndarray:
+        return np.bincount(self.cat_ids, minlength=self.size)
+
+    def totals_array(self) -> np.ndarray:
+        return np.bincount(self.cat_ids, weights=self.amounts, minlength=self.size)
+
+    def totals(self) -> Dict[int, float]:
+        """Spending per category id, for the ids that have transactions"""
+        totals = self.totals_array()
+        return {int(i): float(totals[i]) for i in np.flatnonzero(self.counts_array())}
+
+
+def reconcile(categories: Iterable, transactions, month: int) -> Dict[int, float]:
+    """Rebuild each category's spent for `month` from the transactions.
+
+    Returns {category id: corrected spent} for the categories that drifted."""
+    totals = Analytics.from_transactions(transactions).month(month).totals()
+    fixed = {}
+    for c in categories:
+        actual = totals.get(c.id, 0.0)
+        if abs(c.spent - actual) > 0.005:
+            c.spent = actual
+            fixed[c.id] = actual
+    return fixed
@@ -1,13 +1,27 @@
+import alerts
+import budget_engine
 import spending_type
 
 class budget:
-    # Constructor for the budget type
-    def __init__(self, budget_name, monthly_budget):
+    # Constructor for the budget type; the categories and totals are kept by a headless BudgetEngine.
+    # Overspending is reported through self.alerts: budget.alerts.subscribe(callback) gets an alerts.Alert
+    # when a category or the whole budget reaches 50%, 80% and 100% of its amount
+    def __init__(self, budget_name, monthly_budget, thresholds=alerts.THRESHOLDS):
         self.budget_name = budget_name
         self.monthly_budget = monthly_budget
-        self.spending_categories = [spending_type.spending_type("Unallocated Spending", "Unallocated Spending", self.monthly_budget)]
-        self.total_spent = 0
-        self.total_remaining = self.monthly_budget
+        self.alerts = alerts.AlertEngine(budget_name, thresholds)
+        self.engine = budget_engine.BudgetEngine(alerts=self.alerts)
+        self.engine.set_income(monthly_budget)
+        self.spending_categories = []
+        self.add_new_spending_category(spending_type.spending_type("Unallocated Spending", "Unallocated Spending", self.monthly_budget))
+
+    @property
+    def total_spent(self):
+        return self.engine.total_spent
+
+    @property
+    def total_remaining(self):
+        return self.monthly_budget - self.engine.total_spent
 
     def get_budget_name(self):
         return self.budget_name
@@ -18,8 +32,27 @@ class budget:
     # Adds a new spending category object to the budget's array of spending objects,
     # and then removes the money allocated to the new spending category from the unallocated spending spending_type
     def add_new_spending_category(self, spending_category):
+        self.engine.categories.add(spending_category.entry)
+        spending_category.engine = self.engine
         self.spending_categories.append(spending_category)
-        self.spending_categories[0].set_amount(self.spending_categories[0].get_amount() - spending_category.get_amount())
+        ops = [("allocate", spending_category.entry.id, spending_category.get_amount())]
+        if len(self.spending_categories) > 1:
+            unallocated = self.spending_categories[0]
+            ops.append(("allocate", unallocated.entry.id, unallocated.get_amount() - spending_category.get_amount()))
+        self.engine.apply(ops)
+
+    # Adds many categories and allocations at once: one engine batch and one recount
+    def add_new_spending_categories(self, spending_categories):
+        unallocated = self.spending_categories[0]
+        ops = []
+        for spending_category in spending_categories:
+            self.engine.categories.add(spending_category.entry)
+            spending_category.engine = self.engine
+            self.spending_categories.append(spending_category)
+            ops.append(("allocate", spending_category.entry.id, spending_category.get_amount()))
+        allocated = sum(s.get_amount() for s in spending_categories)
+        ops.append(("allocate", unallocated.entry.id, unallocated.get_amount() - allocated))
+        self.engine.apply(ops)
 
     # Returns a spending category object from the specified index
     def get_spending_category(self, category_index):
@@ -28,15 +61,18 @@ class budget:
     # Removes a spending_category from the list and frees up some unallocated funds
     def remove_spending_category(self, category_index):
         if category_index == 0:
-            print("You cannot remove the unallocated spending category")
-            return
-        self.total_spent -= self.spending_categories[category_index].get_budget_used()
-        self.total_remaining += self.spending_categories[category_index].get_budget_used()
-        self.spending_categories[0].set_amount(self.spending_categories[0].get_amount() + self.spending_categories[category_index].get_amount())
+            raise budget_engine.BudgetError("You cannot remove the unallocated spending category")
+        removed = self.spending_categories[category_index]
+        unallocated = self.spending_categories[0]
+        self.engine.apply([("remove", removed.entry.id),
+                           ("allocate", unallocated.entry.id, unallocated.get_amount() + removed.get_amount())])
+        removed.engine = None
         self.spending_categories.pop(category_index)
 
-    # Calls spending_category spend function and adds amount spent to total spent and subtracts amount spent from total remaining
+    # Calls spending_category spend function; the engine adds the amount to the budget's totals
     def spend_money(self, spending_category, amount):
         spending_category.spend(amount)
-        self.total_remaining -= amount
-        self.total_spent += amount
+
+    # Records many spends as one engine batch: (spending_category, amount) pairs
+    def spend_many(self, spends):
+        self.engine.apply([("spend", s.entry.id, amount, s.category) for s, amount in spends])
@@ -0,0 +1,517 @@
+# budget_engine.py
+# Headless budget model.
+# Categories, income, the shown month and every mutation of them live here,
+# independent of Tk, so the GUI (NewApp.py), the script API (budget.py) and
+# server-side batch jobs share one implementation. Persistence goes through
+# a storage backend from storage.py; without one, everything stays in memory.
+
+from __future__ import annotations
+import math
+from typing import Dict, Iterable, List
+
+import exporter
+import importer
+from alerts import AlertEngine
+from periods import current_month, month_of, today
+from search import SEARCH_LIMIT, SearchIndex
+from storage import MemoryStorage, Storage, open_storage
+from undo import UNDO_LEVELS, Change, UndoHistory, Version
+
+DEFAULT_COLOR = "#22c55e"
+
+
+class BudgetError(Exception):
+    """A mutation that cannot be applied (the message is meant for the user)"""
+
+
+class Category:
+    __slots__ = ("name", "limit", "color", "spent", "id")
+
+    def __init__(self, name: str, limit: float, color: str = DEFAULT_COLOR, spent: float = 0.0, id: int = 0):
+        self.name = name
+        self.limit = limit
+        self.color = color
+        self.spent = spent      # spending in the engine's current month
+        self.id = id
+
+    def __repr__(self):
+        return (f"Category(name={self.name!r}, limit={self.limit!r}, color={self.color!r}, "
+                f"spent={self.spent!r}, id={self.id!r})")
+
+
+class CategoryRegistry:
+    """Categories in display order, indexed by stable id and by name"""
+    __slots__ = ("by_id", "ids", "next_id")
+
+    def __init__(self, cats: Iterable[Category] = (), next_id: int = 1):
+        self.by_id: Dict[int, Category] = {}
+        self.ids: Dict[str, int] = {}
+        self.next_id = next_id
+        for c in cats:
+            self.add(c)
+
+    def __iter__(self):
+        return iter(self.by_id.values())
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def __bool__(self):
+        return bool(self.by_id)
+
+    def get(self, cat_id: int) -> Category | None:
+        return self.by_id.get(cat_id)
+
+    def by_name(self, name: str) -> Category | None:
+        cat_id = self.ids.get(name)
+        return None if cat_id is None else self.by_id[cat_id]
+
+    def add(self, cat: Category) -> Category:
+        if not cat.id:
+            cat.id = self.next_id
+        self.next_id = max(self.next_id, cat.id + 1)
+        self.by_id[cat.id] = cat
+        self.ids[cat.name] = cat.id
+        return cat
+
+    def remove(self, cat: Category):
+        self.by_id.pop(cat.id, None)
+        if self.ids.get(cat.name) == cat.id:
+            del self.ids[cat.name]
+
+    def rename(self, cat: Category, name: str):
+        if self.ids.get(cat.name) == cat.id:
+            del self.ids[cat.name]
+        cat.name = name
+        self.ids[name] = cat.id
+
+    def restore(self, rows: Iterable[tuple]):
+        """Hold exactly the (id, name, limit, color) rows, reusing the Category objects of known ids"""
+        by_id = {}
+        for cid, name, limit, color in rows:
+            cat = self.by_id.get(cid) or Category(name, limit, color, id=cid)
+            cat.name, cat.limit, cat.color = name, limit, color
+            by_id[cid] = cat
+            self.next_id = max(self.next_id, cid + 1)
+        self.by_id = by_id
+        self.ids = {c.name: c.id for c in by_id.values()}
+
+    def apply_setup(self, cats_data: List[Dict]):
+        """Update, add and drop categories to match the setup rows, in row order.
+
+        Rows carry the id of the category they edit (None for new rows), so a
+        rename keeps the category's spending. A row without an id (from a
+        script or the HTTP service) takes over the category of the same name,
+        unless another row names that category by id."""
+        claimed = {d.get("id") for d in cats_data}
+        by_id = {}
+        for d in cats_data:
+            cat = self.by_id.get(d.get("id"))
+            if cat is None and d.get("id") is None:
+                cid = self.ids.get(d["name"])
+                if cid is not None and cid not in claimed and cid not in by_id:
+                    cat = self.by_id[cid]
+            if cat is None:
+                cat = Category(d["name"], d["limit"], d["color"], id=self.next_id)
+                self.next_id += 1
+            else:
+                cat.name, cat.limit, cat.color = d["name"], d["limit"], d["color"]
+            by_id[cat.id] = cat
+        self.by_id = by_id
+        self.ids = {c.name: c.id for c in by_id.values()}
+
+
+class BudgetEngine:
+    """Income, categories and transactions, plus the operations on them.
+
+    `data` is what storage.load() returned (None for a new budget, in which
+    case `defaults` become the categories). Category.spent and the totals
+    are for `month`, the month being looked at. With an AlertEngine, spends
+    that reach a threshold of a category's or the budget's limit raise alerts.
+    The last `undo_levels` spends, batches and setups can be undone."""
+
+    __slots__ = ("storage", "income", "categories", "transactions", "month", "this_month",
+                 "total_limit", "total_spent", "alerts", "history", "saved_setup", "index")
+
+    def __init__(self, storage: Storage | None = None, data: Dict | None = None,
+                 defaults: Iterable[Category] = (), alerts: AlertEngine | None = None,
+                 undo_levels: int = UNDO_LEVELS):
+        self.storage = storage if storage is not None else MemoryStorage()
+        self.alerts = alerts
+        self.history = UndoHistory(undo_levels)
+        self.index: SearchIndex | None = None    # built by the first search
+        if data is not None:
+            self.income = data.get("income", 0.0)
+            self.categories = CategoryRegistry([Category(**c) for c in data.get("categories", [])],
+                                               data.get("next_category_id", 1))
+            self.transactions = data.get("transactions", [])
+        else:
+            self.income = 0.0
+            self.categories = CategoryRegistry()
+            self.transactions = self.storage.transactions
+        self.month = self.this_month = current_month()
+        self.total_limit = self.total_spent = 0.0
+        if data is None:
+            self.use_defaults(defaults)
+        self._apply_month_totals()
+        self._snapshot_setup()
+
+    @classmethod
+    def open(cls, path: str, defaults: Iterable[Category] = (), alerts: AlertEngine | None = None) -> "BudgetEngine":
+        storage = open_storage(path)
+        return cls(storage, storage.load(), defaults, alerts)
+
+    def _recount(self):
+        self.total_limit = sum(c.limit for c in self.categories)
+        self.total_spent = sum(c.spent for c in self.categories)
+
+    def _rearm(self, notify: bool = True):
+        if self.alerts is not None:
+            self.alerts.rearm(self.categories, self.total_limit, self.total_spent, self.month, notify)
+
+    def _category(self, cat_id: int) -> Category:
+        cat = self.categories.get(cat_id)
+        if cat is None:
+            raise BudgetError("Category not found.")
+        return cat
+
+    # ---------- undo ----------
+    def _snapshot_setup(self):
+        """Freeze the saved categories; versions share this tuple until the next setup change"""
+        self.saved_setup = tuple((c.id, c.name, c.limit, c.color) for c in self.categories)
+
+    def version(self) -> Version:
+        """The saved state as an immutable Version; O(1)"""
+        return Version(self.income, self.saved_setup, len(self.transactions))
+
+    def _remember(self, label: str, before: Version, txs: List[Dict] = ()):
+        self.history.push(Change(label, before, self.version(), list(txs)))
+
+    def undo(self) -> str | None:
+        """Undo the last change; returns its label, or None if there is nothing to undo"""
+        change = self.history.undo()
+        if change is None:
+            return None
+        self._restore(change.after, change.before, ())
+        return change.label
+
+    def redo(self) -> str | None:
+        change = self.history.redo()
+        if change is None:
+            return None
+        self._restore(change.before, change.after, change.txs)
+        return change.label
+
+    def _restore(self, current: Version, target: Version, txs: List[Dict]):
+        # drop transactions first and add them last, so their categories exist while they are stored
+        self.storage.truncate_transactions(target.tx_count)
+        if self.index is not None:
+            self.index.truncate(target.tx_count)
+        if not target.same_setup(current):
+            self.income = target.income
+            self.categories.restore(target.categories)
+            self._save_categories()
+            self.saved_setup = target.categories
+        if txs:
+            self._index(txs, self.storage.add_transactions(txs))
+        self._apply_month_totals()
+
+    def _save_categories(self):
+        self.storage.save_setup(self.income, [{"id": c.id, "name": c.name, "limit": c.limit, "color": c.color}
+                                              for c in self.categories])
+
+    def _setup_changed(self, label: str, before: Version | None):
+        """Persist the income and categories and make the change one undo step"""
+        self._save_categories()
+        self._snapshot_setup()
+        self._recount()
+        self._rearm()
+        if before is not None:
+            self._remember(label, before)
+
+    def use_defaults(self, defaults: Iterable[Category]):
+        """Start a new budget with these categories; saved, but not an undoable change"""
+        for cat in defaults:
+            self.categories.add(cat)
+        if self.categories:
+            # spends are only stored against saved categories
+            self._save_categories()
+            self._snapshot_setup()
+            self._recount()
+
+    # ---------- single mutations ----------
+    def set_income(self, value: float):
+        before = self.version() if self.history else None
+        self.income = max(0.0, value)
+        self._setup_changed("Set income", before)
+
+    def add_category(self, name="Category", limit=0.0, color=DEFAULT_COLOR) -> Category:
+        before = self.version() if self.history else None
+        cat = self.categories.add(Category(name, limit, color))
+        self._setup_changed("Add category", before)
+        return cat
+
+    def delete_category(self, cat: Category):
+        before = self.version() if self.history else None
+        self.categories.remove(cat)
+        self._setup_changed("Delete category", before)
+
+    def rename_category(self, cat: Category, name: str):
+        before = self.version() if self.history else None
+        self.categories.rename(cat, name)
+        self._setup_changed("Rename category", before)
+
+    def save_setup(self, cats_data: List[Dict], income: float):
+        """Replace income and categories with the setup page's rows and persist them"""
+        before = self.version() if self.history else None
+        self.income = income
+        # categories are matched by id (rows without one by name), so they keep their spending
+        self.categories.apply_setup([
+            {"id": d.get("id"), "name": d["name"].strip() or "Category",
+             "limit": max(0.0, d["limit"]), "color": d["color"]}
+            for d in cats_data
+        ])
+        self._setup_changed("Save setup", before)
+
+    def spend(self, cat_id: int, amount: float, desc: str = "", day: int | None = None) -> Dict:
+        """Record one expense and return the stored transaction"""
+        cat = self._category(cat_id)
+        amount = max(0.0, amount)
+        tx = {"category_id": cat.id, "desc": desc.strip() or "(no description)", "amount": amount,
+              "day": day or today()}
+        before = self.version() if self.history else None
+        self.storage.add_transaction(tx)
+        self._index([tx], 1)
+        if before is not None:
+            self._remember("Add expense", before, [tx])
+        if month_of(tx["day"]) == self.month:
+            cat.spent += amount
+            self.total_spent += amount
+            if self.alerts is not None:
+                self.alerts.check(cat, self.total_spent)
+        return tx
+
+    def add_transaction(self, cat_name: str, desc: str, amount: float, day: int | None = None) -> Dict:
+        cat = self.categories.by_name(cat_name)
+        if not cat:
+            raise BudgetError("Category not found.")
+        return self.spend(cat.id, amount, desc, day)
+
+    # ---------- batch mutations ----------
+    def apply(self, ops: Iterable[tuple]) -> List[Dict]:
+        """Apply many changes with one storage write per kind and one recount.
+
+        Each op is a tuple:
+            ("income", value)
+            ("add", name, limit[, color])          new category
+            ("allocate", cat_id, limit)            set a category's limit
+            ("edit", cat_id, {"name", "limit", "color"} subset)
+            ("remove", cat_id)
+            ("spend", cat_id, amount[, desc[, day]])
+        Category changes are saved before the spends, so spends may refer to
+        categories added in the same batch but not to ones it removes. Returns
+        the stored transactions. The whole batch is one undo step, and a batch
+        with a bad op changes nothing."""
+        ops = list(ops)
+        self._check_ops(ops)
+        before = self.version() if self.history else None
+        income, rows = self.income, tuple((c.id, c.name, c.limit, c.color) for c in self.categories)
+        try:
+            setup_changed, txs = self._apply_ops(ops)
+        except Exception:
+            # nothing is stored until every op has been applied in memory
+            self.income = income
+            self.categories.restore(rows)
+            raise
+        if setup_changed:
+            self._save_categories()
+            self._snapshot_setup()
+            self._recount()
+            self._rearm()
+        if txs:
+            self._index(txs, self.storage.add_transactions(txs))
+            for tx in txs:
+                if month_of(tx["day"]) == self.month:
+                    cat = self.categories.get(tx["category_id"])
+                    if cat is not None:
+                        cat.spent += tx["amount"]
+                        self.total_spent += tx["amount"]
+                        if self.alerts is not None:
+                            self.alerts.check(cat, self.total_spent)
+        if before is not None and (setup_changed or txs):
+            self._remember("Batch", before, txs)
+        return txs
+
+    def _check_ops(self, ops: List[tuple]):
+        """Raise BudgetError for an op that names no category (or an unknown kind) before anything changes"""
+        ids = set(self.categories.by_id)
+        next_id = self.categories.next_id
+        removed = set()
+        for op in ops:
+            kind = op[0] if op else None
+            if kind == "add":
+                ids.add(next_id)
+                next_id += 1
+            elif kind in ("allocate", "edit", "remove", "spend"):
+                if len(op) < 2 or op[1] not in ids:
+                    raise BudgetError("Category not found.")
+                if kind == "remove":
+                    ids.discard(op[1])
+                    removed.add(op[1])
+            elif kind != "income":
+                raise BudgetError(f"Unknown operation: {kind}")
+        # spends are stored after the setup, so one on a category removed in the batch would be lost
+        if any(op[0] == "spend" and op[1] in removed for op in ops):
+            raise BudgetError("A batch cannot spend on a category it removes.")
+
+    def _apply_ops(self, ops: List[tuple]):
+        """Apply the setup ops in memory and collect the spends; (setup changed, transactions)"""
+        setup_changed = False
+        txs = []
+        for op in ops:
+            kind = op[0]
+            if kind == "spend":
+                cat = self._category(op[1])
+                desc = op[3] if len(op) > 3 else ""
+                day = op[4] if len(op) > 4 else None
+                txs.append({"category_id": cat.id, "desc": desc.strip() or "(no description)",
+                            "amount": max(0.0, op[2]), "day": day or today()})
+                continue
+            setup_changed = True
+            if kind == "income":
+                self.income = max(0.0, op[1])
+            elif kind == "add":
+                self.categories.add(Category(op[1], max(0.0, op[2]), op[3] if len(op) > 3 else DEFAULT_COLOR))
+            elif kind == "allocate":
+                self._category(op[1]).limit = max(0.0, op[2])
+            elif kind == "edit":
+                cat = self._category(op[1])
+                changes = op[2]
+                if "name" in changes:
+                    self.categories.rename(cat, changes["name"].strip() or "Category")
+                if "limit" in changes:
+                    cat.limit = max(0.0, changes["limit"])
+                if "color" in changes:
+                    cat.color = changes["color"]
+            elif kind == "remove":
+                self.categories.remove(self._category(op[1]))
+        return setup_changed, txs
+
+    # ---------- months ----------
+    def set_month(self, month: int):
+        """Look at another month; reads the precomputed totals only"""
+        self.month = month
+        self._apply_month_totals()
+
+    def _apply_month_totals(self, notify: bool = False):
+        totals = self.storage.month_totals(self.month)
+        for c in self.categories:
+            c.spent = totals.get(c.id, 0.0)
+        self._recount()
+        self._rearm(notify)
+
+    def month_transactions(self):
+        return self.storage.month_transactions(self.month)
+
+    def check_rollover(self) -> bool:
+        """Follow the calendar into a new month if the current one is being looked at.
+
+        Returns True if the month being looked at changed."""
+        now = current_month()
+        moved = False
+        if now != self.this_month:
+            if self.month == self.this_month:
+                self.set_month(now)
+                moved = True
+            self.this_month = now
+        return moved
+
+    # ---------- bulk work ----------
+    def import_statement(self, path: str, default_cat_name: str) -> importer.ImportResult:
+        """Import a CSV/OFX statement; raises OSError/ValueError for unreadable files"""
+        default = self.categories.by_name(default_cat_name)
+        if not default:
+            raise BudgetError("Category not found.")
+        try:
+            return importer.import_statement(path, self.storage, self.categories.ids.get, default.id)
+        finally:
+            # batches stored before a failure are kept
+            self._imported()
+
+    def import_transactions(self, txs: List[Dict]):
+        """Store one batch of statement rows parsed elsewhere (by a shared window)"""
+        for tx in txs:
+            self._category(tx["category_id"])
+            if not math.isfinite(tx["amount"]) or tx["amount"] <= 0:
+                raise BudgetError("Imported amounts must be positive numbers.")
+        self.storage.add_transactions(txs)
+        self._imported()
+
+    def _imported(self):
+        # a statement can be huge; rather than keep it for redo, imports end the undo history
+        self.history.clear()
+        self.index = None
+        # storage kept the monthly totals up to date while streaming
+        self._apply_month_totals(notify=True)
+
+    # ---------- search ----------
+    def _index(self, txs: List[Dict], stored: int):
+        """Index rows storage has just confirmed; if it holds anything else, rebuild on the next search"""
+        if self.index is None:
+            return
+        if stored != len(txs) or len(self.index) + stored != len(self.transactions):
+            self.index = None
+            return
+        for tx in txs:
+            self.index.add(tx["category_id"], tx["desc"], tx["amount"])
+
+    def search(self, text: str = "", category_ids: Iterable[int] | None = None,
+               min_amount: float | None = None, max_amount: float | None = None,
+               limit: int = SEARCH_LIMIT) -> List[Dict]:
+        """Newest transactions whose description matches `text`, optionally filtered.
+
+        The first search indexes the history (O(n)); later ones only read their matches."""
+        if self.index is None:
+            self.index = SearchIndex.build(self.transactions)
+        n = len(self.transactions)
+        return [self.transactions[n - 1 - pos]
+                for pos in self.index.search(text, category_ids, min_amount, max_amount, limit)]
+
+    def reconcile_spent(self) -> Dict[int, float]:
+        """Recompute the month's spent from its transactions (needs numpy)"""
+        import analytics
+        fixed = analytics.reconcile(self.categories, self.transactions, self.month)
+        if fixed:
+            self.storage.set_month_totals(self.month, fixed)
+            self._recount()
+            self._rearm()
+        return fixed
+
+    # ---------- export ----------
+    def export_transactions(self, path: str, fmt: str | None = None) -> exporter.ExportResult:
+        """Stream the history, oldest first, to a CSV, JSON Lines or Parquet file.
+
+        Raises OSError/ValueError, or ImportError for Parquet without pyarrow."""
+        return exporter.export_transactions(path, self.transactions, self.storage.category_names(), fmt)
+
+    def export_summary(self, path: str, fmt: str | None = None) -> exporter.ExportResult:
+        """Stream spent and remaining per category for every month with spending"""
+        return exporter.export_summary(path, self.storage.all_month_totals(), self.categories,
+                                       self.storage.category_names(), fmt)
+
+    def export_for_mysql(self):
+        """Prepare clean dicts/lists for MySQL insertion"""
+        return {"income": self.income, "categories": [{
+                    "id": c.id,
+                    "name": c.name,
+                    "limit": c.limit,
+                    "color": c.color,
+                    "spent": c.spent
+                }
+                for c in self.categories
+            ],
+            "transactions": self.transactions
+        }
+
+    def close(self):
+        self.storage.close()
@@ -0,0 +1,123 @@
+# budget_loadtest.py
+# Load generator for budget_service.py.
+# Opens --connections keep-alive connections and sends a mix of
+# transaction posts, summary reads and history pages across --budgets
+# budget files, then reports throughput, latency percentiles and errors.
+#
+#   python budget_service.py --root /tmp/budgets &
+#   python budget_loadtest.py --budgets 20 --connections 64 --requests 50000
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List, Tuple
+
+from budget_service import DEFAULT_PORT
+
+CATEGORIES = [{"name": "Food", "limit": 500}, {"name": "Rent", "limit": 1200},
+              {"name": "Transport", "limit": 200}, {"name": "Fun", "limit": 150}]
+
+
+class Client:
+    """One keep-alive HTTP/1.1 connection"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, payload=None) -> Tuple[int, object]:
+        body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+        self.writer.write(f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\n"
+                          f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+                          .encode("latin-1") + body)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            key, _, value = line.decode("latin-1").partition(":")
+            if key.strip().lower() == "content-length":
+                length = int(value)
+        return status, json.loads(await self.reader.readexactly(length))
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+
+
+async def worker(client: Client, budgets: List[str], jobs: asyncio.Queue, write_ratio: float,
+                 latencies: List[float], errors: List[int]):
+    rng = random.Random()
+    while True:
+        try:
+            jobs.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        name = rng.choice(budgets)
+        roll = rng.random()
+        t0 = time.perf_counter()
+        if roll < write_ratio:
+            status, _ = await client.request("POST", f"/budgets/{name}/transactions", {
+                "category": rng.choice(CATEGORIES)["name"], "amount": round(rng.uniform(1, 80), 2),
+                "desc": "load test"})
+        elif roll < write_ratio + (1 - write_ratio) / 2:
+            status, _ = await client.request("GET", f"/budgets/{name}/categories")
+        else:
+            status, _ = await client.request("GET", f"/budgets/{name}/transactions?offset={rng.randrange(200)}&limit=20")
+        latencies.append(time.perf_counter() - t0)
+        if status >= 400:
+            errors.append(status)
+
+
+async def run(host: str, port: int, n_budgets: int, connections: int, requests: int, write_ratio: float):
+    budgets = [f"load{i}" for i in range(n_budgets)]
+    setup = Client(host, port)
+    await setup.connect()
+    for name in budgets:
+        await setup.request("PUT", f"/budgets/{name}", {"income": 5000, "categories": CATEGORIES})
+    await setup.close()
+
+    clients = [Client(host, port) for _ in range(connections)]
+    await asyncio.gather(*(c.connect() for c in clients))
+    jobs: asyncio.Queue = asyncio.Queue()
+    for _ in range(requests):
+        jobs.put_nowait(None)
+    latencies: List[float] = []
+    errors: List[int] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(worker(c, budgets, jobs, write_ratio, latencies, errors) for c in clients))
+    elapsed = time.perf_counter() - start
+    await asyncio.gather(*(c.close() for c in clients))
+
+    latencies.sort()
+
+    def pct(q):
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+
+    print(f"{len(latencies):,} requests in {elapsed:.2f} s: {len(latencies) / elapsed:,.0f} req/s")
+    print(f"latency p50 {pct(0.50):.2f} ms  p90 {pct(0.90):.2f} ms  p99 {pct(0.99):.2f} ms")
+    print(f"errors: {len(errors):,}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test a running budget_service.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--budgets", type=int, default=10)
+    parser.add_argument("--connections", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=20_000)
+    parser.add_argument("--write-ratio", type=float, default=0.5, help="share of requests that post a transaction")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.host, args.port, args.budgets, args.connections, args.requests, args.write_ratio))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,419 @@
+# budget_service.py
+# Local HTTP/JSON service over many budget files.
+# Runs on asyncio with a small built-in HTTP/1.1 server (keep-alive,
+# Content-Length bodies), so it needs nothing beyond the standard library.
+#
+# Each budget is one file in --root (<name>.db for SQLite, <name>.DAT for the
+# binary journal) behind a BudgetEngine. Open budgets are held in a bounded
+# pool; each owns a single worker thread that does all of its storage work,
+# which keeps SQLite connections on one thread and serializes writes to a
+# budget without blocking the event loop. Transactions posted while a write
+# is in flight are queued and committed together as one engine batch, so
+# throughput does not hinge on one commit per request.
+#
+#   GET  /budgets
+#   PUT  /budgets/<name>                    {"income", "categories": [{"name", "limit", "color"?, "id"?}]}
+#   GET  /budgets/<name>/categories         ?month=YYYY-MM
+#   POST /budgets/<name>/transactions       {"category" or "category_id", "amount", "desc"?, "date"?}
+#   GET  /budgets/<name>/transactions       ?offset=0&limit=50&month=YYYY-MM
+#   GET  /budgets/<name>/alerts             thresholds reached since the budget was opened
+#   GET  /budgets/<name>/search             ?q=uber&category_id=1,2&min=5&max=50&limit=50
+#
+#   python budget_service.py --root budgets --port 8765
+
+from __future__ import annotations
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from typing import Dict, List, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from alerts import Alert, AlertEngine
+from budget_engine import BudgetEngine, BudgetError
+from periods import month_label, month_of_date
+from storage import StorageLocked, open_storage
+
+DEFAULT_PORT = 8765
+MAX_OPEN = 64          # budgets kept open at once
+MAX_PAGE = 500         # history rows per request
+MAX_BODY = 1 << 20
+MAX_ALERTS = 100       # recent alerts kept per open budget
+BACKENDS = {"db": ".db", "journal": ".DAT"}
+NAME = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+DEFAULT_COLOR = "#22c55e"
+
+REASONS = {200: "OK", 201: "Created", 400: "Bad Request", 404: "Not Found",
+           405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_month(text: str) -> int:
+    try:
+        year, month = text.split("-")
+        return month_of_date(date(int(year), int(month), 1))
+    except ValueError:
+        raise HTTPError(400, "month must be YYYY-MM")
+
+
+def tx_json(row: Dict) -> Dict:
+    return {"category": row["category"], "category_id": row["category_id"], "desc": row["desc"],
+            "amount": row["amount"], "date": row["date"].isoformat()}
+
+
+class Budget:
+    """One open budget: its engine, its worker thread and its write queue"""
+
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"budget-{name}")
+        self.engine: BudgetEngine | None = None
+        self.pending: List[Tuple[Dict, asyncio.Future]] = []
+        self.flushing = False
+        self.users = 0
+        self.recent_alerts: deque = deque(maxlen=MAX_ALERTS)
+
+    async def call(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    # ---------- worker thread ----------
+    def _open(self):
+        storage = open_storage(self.path, legacy_snapshot=None)
+        alerts = AlertEngine(self.name)
+        alerts.subscribe(self._on_alert)
+        # nobody undoes over HTTP, so skip keeping versions
+        self.engine = BudgetEngine(storage, storage.load(), alerts=alerts, undo_levels=0)
+
+    def _on_alert(self, alert: Alert):
+        entry = alert.as_dict()
+        entry["month"] = month_label(alert.month)
+        entry["message"] = alert.message
+        self.recent_alerts.append(entry)
+
+    def _close(self):
+        if self.engine is not None:
+            self.engine.close()
+            self.engine = None
+
+    def _setup(self, body: Dict) -> Dict:
+        try:
+            income = float(body.get("income", 0))
+            cats = [{"id": c.get("id"), "name": str(c["name"]), "limit": float(c.get("limit", 0)),
+                     "color": c.get("color", DEFAULT_COLOR)} for c in body["categories"]]
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(400, "expected {income, categories: [{name, limit}]}")
+        if not all(math.isfinite(v) for v in [income] + [c["limit"] for c in cats]):
+            raise HTTPError(400, "income and limits must be numbers")
+        self.engine.save_setup(cats, max(0.0, income))
+        return self._summary(self.engine.month)
+
+    def _summary(self, month: int) -> Dict:
+        engine = self.engine
+        totals = engine.storage.month_totals(month)
+        cats = []
+        for c in engine.categories:
+            spent = totals.get(c.id, 0.0)
+            cats.append({"id": c.id, "name": c.name, "limit": c.limit, "color": c.color,
+                         "spent": spent, "remaining": c.limit - spent})
+        return {"budget": self.name, "income": engine.income, "month": month_label(month),
+                "total_limit": sum(c["limit"] for c in cats), "total_spent": sum(c["spent"] for c in cats),
+                "categories": cats}
+
+    def _history(self, offset: int, limit: int, month: int | None) -> Dict:
+        engine = self.engine
+        rows = engine.transactions if month is None else engine.storage.month_transactions(month)
+        return {"budget": self.name, "total": len(rows), "offset": offset,
+                "transactions": [tx_json(r) for r in rows[offset:offset + limit]]}
+
+    def _search(self, text: str, category_ids: List[int] | None, lo: float | None, hi: float | None,
+                limit: int) -> Dict:
+        rows = self.engine.search(text, category_ids, lo, hi, limit)
+        return {"budget": self.name, "query": text, "transactions": [tx_json(r) for r in rows]}
+
+    def _spend_batch(self, requests: List[Dict]) -> List[object]:
+        """Commit every valid request as one engine batch; a result or an exception per request"""
+        engine = self.engine
+        results: List[object] = []
+        ops = []
+        for req in requests:
+            cat = (engine.categories.get(req["category_id"]) if req.get("category_id") is not None
+                   else engine.categories.by_name(req.get("category", "")))
+            if cat is None:
+                results.append(BudgetError("Category not found."))
+                continue
+            results.append(None)
+            ops.append(("spend", cat.id, req["amount"], req["desc"], req["day"]))
+        txs = iter(engine.apply(ops) if ops else ())
+        for i, res in enumerate(results):
+            if res is None:
+                tx = next(txs)
+                results[i] = {"category": engine.categories.get(tx["category_id"]).name,
+                              "category_id": tx["category_id"], "desc": tx["desc"], "amount": tx["amount"],
+                              "date": date.fromordinal(tx["day"]).isoformat()}
+        return results
+
+    # ---------- event loop ----------
+    async def spend(self, req: Dict) -> Dict:
+        fut = asyncio.get_running_loop().create_future()
+        self.pending.append((req, fut))
+        if not self.flushing:
+            self.flushing = True
+            asyncio.create_task(self._flush())
+        return await fut
+
+    async def _flush(self):
+        # requests that arrive while a batch is being committed form the next batch
+        try:
+            while self.pending:
+                batch, self.pending = self.pending, []
+                try:
+                    results = await self.call(self._spend_batch, [req for req, _ in batch])
+                except Exception as e:
+                    results = [e] * len(batch)
+                for (_, fut), res in zip(batch, results):
+                    if fut.done():
+                        continue
+                    if isinstance(res, Exception):
+                        fut.set_exception(res)
+                    else:
+                        fut.set_result(res)
+        finally:
+            self.flushing = False
+
+
+class BudgetPool:
+    """Open budgets by name, at most `max_open` at a time (least recently used are closed)"""
+
+    def __init__(self, root: str, suffix: str = ".db", max_open: int = MAX_OPEN):
+        self.root = root
+        self.suffix = suffix
+        self.max_open = max_open
+        self.open: "OrderedDict[str, Budget]" = OrderedDict()
+        self.lock = asyncio.Lock()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.root, name + self.suffix)
+
+    def names(self) -> List[str]:
+        return sorted(f[:-len(self.suffix)] for f in os.listdir(self.root) if f.endswith(self.suffix))
+
+    async def acquire(self, name: str, create: bool = False) -> Budget:
+        if not NAME.match(name):
+            raise HTTPError(400, "budget names are letters, digits, _ and -")
+        budget = self.open.get(name)
+        if budget is None:
+            async with self.lock:
+                budget = self.open.get(name)
+                if budget is None:
+                    if not create and not os.path.exists(self.path(name)):
+                        raise HTTPError(404, f"no budget named {name}")
+                    budget = Budget(name, self.path(name))
+                    try:
+                        await budget.call(budget._open)
+                    except StorageLocked as e:
+                        budget.executor.shutdown(wait=False)
+                        raise HTTPError(409, str(e))
+                    self.open[name] = budget
+                    budget.users += 1
+                    await self._evict()
+                    return budget
+        self.open.move_to_end(name)
+        budget.users += 1
+        return budget
+
+    def release(self, budget: Budget):
+        budget.users -= 1
+
+    async def _evict(self):
+        idle = [b for b in self.open.values() if not b.users and not b.flushing and not b.pending]
+        for budget in idle[:max(0, len(self.open) - self.max_open)]:
+            del self.open[budget.name]
+            await budget.call(budget._close)
+            budget.executor.shutdown(wait=False)
+
+    async def close(self):
+        for budget in list(self.open.values()):
+            await budget.call(budget._close)
+            budget.executor.shutdown(wait=True)
+        self.open.clear()
+
+
+class BudgetService:
+    def __init__(self, pool: BudgetPool):
+        self.pool = pool
+
+    # ---------- routing ----------
+    async def dispatch(self, method: str, target: str, body: bytes) -> Tuple[int, object]:
+        url = urlsplit(target)
+        parts = [p for p in url.path.split("/") if p]
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if not parts or parts[0] != "budgets" or len(parts) > 3:
+            raise HTTPError(404, "not found")
+        if len(parts) == 1:
+            if method != "GET":
+                raise HTTPError(405, "use GET")
+            return 200, {"budgets": self.pool.names()}
+
+        name = parts[1]
+        resource = parts[2] if len(parts) == 3 else None
+        if resource is None and method == "PUT":
+            payload = self.json_body(body)
+            budget = await self.pool.acquire(name, create=True)
+            try:
+                return 200, await budget.call(budget._setup, payload)
+            finally:
+                self.pool.release(budget)
+        if resource not in (None, "categories", "transactions", "alerts", "search"):
+            raise HTTPError(404, "not found")
+
+        budget = await self.pool.acquire(name)
+        try:
+            if resource == "alerts":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                return 200, {"budget": name, "alerts": list(budget.recent_alerts)}
+            if resource == "search":
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                try:
+                    cats = [int(c) for c in query["category_id"].split(",")] if "category_id" in query else None
+                    lo = float(query["min"]) if "min" in query else None
+                    hi = float(query["max"]) if "max" in query else None
+                    limit = max(0, min(MAX_PAGE, int(query.get("limit", 50))))
+                    if not all(math.isfinite(v) for v in (lo, hi) if v is not None):
+                        raise ValueError
+                except ValueError:
+                    raise HTTPError(400, "category_id, min, max and limit must be numbers")
+                return 200, await budget.call(budget._search, query.get("q", ""), cats, lo, hi, limit)
+            if resource in (None, "categories"):
+                if method != "GET":
+                    raise HTTPError(405, "use GET")
+                month = parse_month(query["month"]) if "month" in query else budget.engine.month
+                return 200, await budget.call(budget._summary, month)
+            if method == "POST":
+                return 201, await budget.spend(self.transaction(self.json_body(body)))
+            if method == "GET":
+                try:
+                    offset = max(0, int(query.get("offset", 0)))
+                    limit = max(0, min(MAX_PAGE, int(query.get("limit", 50))))
+                except ValueError:
+                    raise HTTPError(400, "offset and limit must be integers")
+                month = parse_month(query["month"]) if "month" in query else None
+                return 200, await budget.call(budget._history, offset, limit, month)
+            raise HTTPError(405, "use GET or POST")
+        finally:
+            self.pool.release(budget)
+
+    @staticmethod
+    def json_body(body: bytes):
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise HTTPError(400, "body must be JSON")
+        if not isinstance(payload, dict):
+            raise HTTPError(400, "body must be a JSON object")
+        return payload
+
+    @staticmethod
+    def transaction(payload: Dict) -> Dict:
+        try:
+            amount = float(payload["amount"])
+            day = date.fromisoformat(payload["date"]).toordinal() if payload.get("date") else None
+            cid = payload.get("category_id")
+            tx = {"category_id": int(cid) if cid is not None else None,
+                  "category": str(payload.get("category", "")),
+                  "desc": str(payload.get("desc", "")), "amount": amount, "day": day}
+        except (KeyError, TypeError, ValueError):
+            raise HTTPError(400, "expected {category or category_id, amount, desc?, date: YYYY-MM-DD?}")
+        if not math.isfinite(amount) or amount <= 0:
+            raise HTTPError(400, "amount must be a positive number")
+        return tx
+
+    # ---------- HTTP ----------
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                keep_alive = (request_line.rstrip().endswith(b"HTTP/1.1")
+                              and headers.get("connection", "").lower() != "close")
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                    length = int(headers.get("content-length") or 0)
+                    if length > MAX_BODY:
+                        raise HTTPError(413, "body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    status, payload = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    # the body of a 413 was not read, so the connection cannot be reused
+                    status, payload, keep_alive = e.status, {"error": str(e)}, keep_alive and e.status != 413
+                except BudgetError as e:
+                    status, payload = 400, {"error": str(e)}
+                except ValueError:
+                    status, payload, keep_alive = 400, {"error": "malformed request"}, False
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, payload, keep_alive = 500, {"error": repr(e)}, False
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(b"HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n%s\r\n"
+                             % (status, REASONS[status].encode(), len(data),
+                                b"" if keep_alive else b"Connection: close\r\n") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+async def serve(root: str, host: str = "127.0.0.1", port: int = DEFAULT_PORT, backend: str = "db",
+                max_open: int = MAX_OPEN):
+    os.makedirs(root, exist_ok=True)
+    pool = BudgetPool(root, BACKENDS[backend], max_open)
+    service = BudgetService(pool)
+    server = await asyncio.start_server(service.handle, host, port, backlog=1024)
+    print(f"Serving budgets from {os.path.abspath(root)} on http://{host}:{port}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await pool.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve budget files over a local HTTP/JSON API.")
+    parser.add_argument("--root", default="budgets", help="directory holding the budget files")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="db")
+    parser.add_argument("--max-open", type=int, default=MAX_OPEN, help="budgets kept open at once")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args.root, args.host, args.port, args.backend, args.max_open))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
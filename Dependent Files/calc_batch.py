@@ -0,0 +1,94 @@
+# calc_batch.py
+# Headless batch evaluation for the calculator engine.
+# Streams expressions (one per line) from a file or stdin, evaluates them in
+# chunks on a process pool and writes one result per line, in input order.
+# Lines that fail get the calculator's error message in place of a result
+# and are also reported on stderr. No display is needed.
+#
+#   python calc_batch.py formulas.txt -o results.txt
+#   some_command | python calc_batch.py --deg
+
+from __future__ import annotations
+import argparse
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Tuple
+
+import calc_engine
+
+CHUNK_SIZE = 2_000
+
+
+def chunks(lines: Iterable[str], size: int) -> Iterator[List[str]]:
+    lines = iter(lines)
+    while True:
+        chunk = list(islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def evaluate_chunk(job: Tuple[List[str], int]) -> List[Tuple[str, bool]]:
+    """(output text, ok) for each expression in the chunk"""
+    lines, mode = job
+    results = []
+    for line in lines:
+        text = line.strip()
+        if not text:
+            results.append(("", True))
+            continue
+        value = calc_engine.evaluate(text, mode)
+        results.append((value, False) if isinstance(value, str) else (str(value), True))
+    return results
+
+
+def evaluate_stream(lines: Iterable[str], mode: int = calc_engine.RAD, jobs: int | None = None,
+                    chunk_size: int = CHUNK_SIZE) -> Iterator[Tuple[str, bool]]:
+    """Results for `lines` in order; at most 2 chunks per worker are in flight"""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for chunk in chunks(lines, chunk_size):
+            yield from evaluate_chunk((chunk, mode))
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        pending = deque()
+        for chunk in chunks(lines, chunk_size):
+            pending.append(pool.submit(evaluate_chunk, (chunk, mode)))
+            if len(pending) >= 2 * jobs:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Evaluate calculator expressions, one per line.")
+    parser.add_argument("input", nargs="?", default="-", help="file of expressions (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="where to write results (default: stdout)")
+    parser.add_argument("--deg", action="store_true", help="trig functions take degrees")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    mode = calc_engine.DEG if args.deg else calc_engine.RAD
+    errors = 0
+    try:
+        for number, (text, ok) in enumerate(evaluate_stream(source, mode, args.jobs, args.chunk_size), 1):
+            out.write(text + "\n")
+            if not ok:
+                errors += 1
+                print(f"line {number}: {text}", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
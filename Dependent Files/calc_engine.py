@@ -0,0 +1,255 @@
+# calc_engine.py
+# Expression engine behind the calculator.
+# One pass over the text produces tokens, a shunting-yard parser turns them
+# into postfix steps, and the steps are run on a value stack. Every stage is
+# linear in the length of the expression and none of them recurses, so long
+# or deeply nested pasted expressions are handled as quickly as short ones.
+#
+# Compiled expressions are kept in an LRU cache keyed by (text, angle mode),
+# may use named variables, and can be evaluated over whole NumPy arrays in
+# one call (numpy is only imported for that).
+
+from __future__ import annotations
+import math
+import operator
+import re
+from functools import lru_cache
+from typing import Dict, List, Tuple
+
+RAD, DEG = 0, 1
+
+# the calculator's existing error messages
+DIVIDE_BY_ZERO = "ERROR: CANNOT DIVIDE BY ZERO"
+INVALID_FUNCTION = "ERROR: INVALID FUNCTION USED"
+UNMATCHED_PARENTHESIS = "Error: Unmatched Parenthesis"
+CANNOT_DIVIDE = "Error: Cannot Divide By Zero"
+INVALID_FUNCTION_CALL = "Error: Invalid Function Used"
+NUMBER_TOO_LARGE = "Error: Number Too Large"
+MATH_DOMAIN = "Error: Outside The Function's Domain"
+
+TOKEN = re.compile(r"\s*(?:(\d+\.?\d*(?:[eE][-+]?\d+)?|\.\d+)|([A-Za-z_]\w*)|(.))")
+
+NUMBER, NAME, OP, END = "number", "name", "op", "end"
+
+# infix operators: symbol -> (left binding power, right binding power)
+# ^ binds right-to-left, so its right power is the lower one
+INFIX = {"+": (10, 11), "-": (10, 11), "*": (20, 21), "/": (20, 21), "%": (20, 21), "^": (41, 40)}
+PREFIX_POWER = 30    # unary minus: -2^2 is -(2^2), 2*-3 is 2*(-3)
+
+FUNCTIONS = ("sin", "cos", "tan", "log", "ln", "sqrt")
+TRIG = ("sin", "cos", "tan")
+
+CACHE_SIZE = 512
+
+# postfix step kinds
+CONST, UNARY_OP, BINARY_OP, VAR = range(4)
+
+
+class CalcError(Exception):
+    """Raised with one of the calculator's error messages"""
+
+
+# ---------- tokenizer ----------
+def tokenize(text: str) -> List[Tuple[str, object]]:
+    tokens = []
+    # trailing blanks are not a token (the catch-all group would read them as an operator)
+    pos, n = 0, len(text.rstrip())
+    while pos < n:
+        m = TOKEN.match(text, pos)
+        pos = m.end()
+        number, name, op = m.groups()
+        if number is not None:
+            tokens.append((NUMBER, float(number)))
+        elif name is not None:
+            tokens.append((NAME, name))
+        elif op is not None:
+            if op not in INFIX and op not in "()":
+                raise CalcError(INVALID_FUNCTION)
+            tokens.append((OP, op))
+    tokens.append((END, None))
+    return tokens
+
+
+# ---------- parser ----------
+# operator stack entries
+PAREN, CALL, NEGATE, INFIX_OP = range(4)
+
+
+def parse(text: str, mode: int = RAD) -> List[Tuple[int, object]]:
+    """Postfix steps (kind, value / name / operator) for `text`, by shunting-yard.
+
+    Pending operators and open parentheses wait on an explicit stack, so the
+    nesting depth is only limited by memory. An operator leaves the stack once
+    one with a lower binding power follows it, which gives the same grouping
+    as the precedence table above."""
+    tokens = tokenize(text)
+    program: List[Tuple[int, object]] = []
+    stack: List[Tuple[int, object, int]] = []    # (entry kind, operator or function, right power)
+    emit = program.append
+    operand = True                               # expecting a value rather than an operator
+    i = 0
+    while True:
+        kind, value = tokens[i]
+        i += 1
+        if operand:
+            if kind is NUMBER:
+                emit((CONST, value))
+                operand = False
+            elif kind is NAME:
+                if tokens[i] != (OP, "("):
+                    emit((VAR, value))
+                    operand = False
+                elif value not in FUNCTIONS:
+                    raise CalcError(INVALID_FUNCTION_CALL)
+                else:
+                    stack.append((CALL, value, 0))
+                    i += 1
+            elif kind is OP and value == "(":
+                stack.append((PAREN, None, 0))
+            elif kind is OP and value == "-":
+                stack.append((NEGATE, "-", PREFIX_POWER))
+            elif kind is not OP or value != "+":    # unary plus changes nothing
+                raise CalcError(UNMATCHED_PARENTHESIS)
+            continue
+        if kind is OP and value in INFIX:
+            lbp, rbp = INFIX[value]
+            while stack and stack[-1][0] >= NEGATE and stack[-1][2] > lbp:
+                _emit_operator(emit, stack.pop())
+            stack.append((INFIX_OP, value, rbp))
+            operand = True
+        elif kind is OP and value == ")":
+            while stack and stack[-1][0] >= NEGATE:
+                _emit_operator(emit, stack.pop())
+            if not stack:
+                raise CalcError(UNMATCHED_PARENTHESIS)
+            entry, name, _ = stack.pop()
+            if entry == CALL:
+                if mode == DEG and name in TRIG:
+                    # the angle mode is fixed when the expression is parsed
+                    emit((CONST, math.pi / 180))
+                    emit((BINARY_OP, "*"))
+                emit((UNARY_OP, name))
+        elif kind is END:
+            while stack:
+                entry = stack.pop()
+                if entry[0] < NEGATE:
+                    raise CalcError(UNMATCHED_PARENTHESIS)
+                _emit_operator(emit, entry)
+            return program
+        else:
+            # two operands in a row
+            raise CalcError(UNMATCHED_PARENTHESIS)
+
+
+def _emit_operator(emit, entry: Tuple[int, object, int]):
+    emit((UNARY_OP if entry[0] == NEGATE else BINARY_OP, entry[1]))
+
+
+# ---------- evaluation ----------
+def _divide(a, b):
+    if b == 0:
+        raise CalcError(DIVIDE_BY_ZERO)
+    return a / b
+
+
+def _power(a, b):
+    result = a ** b
+    if isinstance(result, complex):
+        # a fractional power of a negative number
+        raise CalcError(MATH_DOMAIN)
+    return result
+
+
+BINARY = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": _divide,
+         "%": operator.mod, "^": _power}
+UNARY = {"-": operator.neg, "sin": math.sin, "cos": math.cos, "tan": math.tan,
+        "log": math.log10, "ln": math.log, "sqrt": math.sqrt}
+
+
+def bind(program: List[Tuple[int, object]], unary: Dict, binary: Dict) -> List[Tuple[int, object]]:
+    """Replace operator names with the functions that implement them"""
+    table = {UNARY_OP: unary, BINARY_OP: binary}
+    return [(kind, table[kind][value] if kind in table else value) for kind, value in program]
+
+
+def run(steps: List[Tuple[int, object]], variables: Dict):
+    stack = []
+    push, pop = stack.append, stack.pop
+    for kind, step in steps:
+        if kind == CONST:
+            push(step)
+        elif kind == UNARY_OP:
+            stack[-1] = step(stack[-1])
+        elif kind == BINARY_OP:
+            b = pop()
+            stack[-1] = step(stack[-1], b)
+        else:
+            value = variables.get(step)
+            if value is None:
+                raise CalcError(INVALID_FUNCTION)
+            push(value)
+    return stack[0]
+
+
+def _array_tables():
+    import numpy as np
+    binary = {"+": np.add, "-": np.subtract, "*": np.multiply, "/": np.true_divide,
+              "%": np.mod, "^": np.power}
+    unary = {"-": np.negative, "sin": np.sin, "cos": np.cos, "tan": np.tan,
+             "log": np.log10, "ln": np.log, "sqrt": np.sqrt}
+    return np, unary, binary
+
+
+class Compiled:
+    """A parsed expression, ready to be evaluated any number of times.
+
+    Calling it with variable values returns a float and raises CalcError on
+    failure. `over` evaluates the same program element-wise over arrays."""
+
+    __slots__ = ("text", "mode", "program", "names", "_steps", "_array_steps")
+
+    def __init__(self, text: str, mode: int = RAD):
+        self.text = text
+        self.mode = mode
+        self.program = parse(text, mode)
+        self.names = frozenset(value for kind, value in self.program if kind == VAR)
+        self._steps = bind(self.program, UNARY, BINARY)
+        self._array_steps = None
+
+    def __call__(self, **variables):
+        return run(self._steps, variables)
+
+    def over(self, **arrays):
+        """Evaluate once over NumPy arrays (or anything np.asarray accepts).
+
+        Invalid points (division by zero, log or square root of a negative)
+        come back as inf / nan where calling would raise."""
+        np, unary, binary = _array_tables()
+        if self._array_steps is None:
+            self._array_steps = bind(self.program, unary, binary)
+        values = {name: np.asarray(v, dtype=np.float64) for name, v in arrays.items()}
+        with np.errstate(all="ignore"):
+            result = run(self._array_steps, values)
+        shape = np.broadcast(*values.values()).shape if values else ()
+        return np.broadcast_to(np.asarray(result, dtype=np.float64), shape).copy()
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def compile_expression(text: str, mode: int = RAD) -> Compiled:
+    """Compiled form of `text`, reused while it stays in the LRU cache"""
+    return Compiled(text, mode)
+
+
+def evaluate(text: str, mode: int = RAD, **variables):
+    """Value of `text`, or the calculator's error message for it"""
+    try:
+        return compile_expression(text, mode)(**variables)
+    except CalcError as e:
+        return str(e)
+    except ZeroDivisionError:
+        return CANNOT_DIVIDE
+    except OverflowError:
+        return NUMBER_TOO_LARGE
+    except ValueError:
+        # log, ln or sqrt outside its domain
+        return MATH_DOMAIN
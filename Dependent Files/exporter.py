@@ -0,0 +1,157 @@
+# exporter.py
+# Streaming export of the transaction history and of monthly category
+# summaries to CSV, JSON Lines or Parquet (Parquet needs pyarrow).
+# Rows are read from the storage backend through generators and written a
+# chunk at a time, so memory stays flat however long the history is. Each
+# file is written under a temporary name and renamed into place when it is
+# complete, so a failed export never leaves a half-written file behind.
+
+from __future__ import annotations
+import csv
+import json
+import os
+from dataclasses import dataclass
+from datetime import date
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from importer import batches
+
+CHUNK_SIZE = 10_000
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl", ".parquet": "parquet"}
+
+# (column, type) pairs; the types only matter for Parquet
+Columns = Sequence[Tuple[str, str]]
+
+TRANSACTION_COLUMNS: Columns = (("date", "date"), ("category_id", "int"), ("category", "str"),
+                                ("description", "str"), ("amount", "float"))
+SUMMARY_COLUMNS: Columns = (("month", "str"), ("category_id", "int"), ("category", "str"),
+                            ("limit", "float"), ("spent", "float"), ("remaining", "float"))
+
+
+@dataclass
+class ExportResult:
+    path: str
+    rows: int = 0
+
+
+def export_format(path: str, fmt: str | None = None) -> str:
+    """Format named by `fmt`, or else by the file extension"""
+    fmt = (fmt or FORMATS.get(os.path.splitext(path)[1].lower(), "")).lower()
+    if fmt not in WRITERS:
+        raise ValueError("Export to .csv, .jsonl or .parquet files.")
+    return fmt
+
+
+# ---------- readers: yield lists of row tuples, oldest first ----------
+def transaction_chunks(transactions, names: Dict[int, str], size: int = CHUNK_SIZE) -> Iterator[List[tuple]]:
+    """(date, category id, category, description, amount) rows of a newest-first history"""
+    raw_rows = getattr(transactions, "raw_rows", None)
+    if raw_rows is None:
+        # a plain sequence: read it a page at a time from the oldest end
+        for stop in range(len(transactions), 0, -size):
+            page = transactions[max(0, stop - size):stop]
+            yield [(t["date"], t["category_id"], t["category"], t["desc"], t["amount"])
+                   for t in reversed(page)]
+        return
+    days: Dict[int, date] = {}     # histories have far fewer days than transactions
+    chunk = []
+    for amount, cid, day, desc in raw_rows():
+        d = days.get(day)
+        if d is None:
+            d = days[day] = date.fromordinal(day)
+        chunk.append((d, cid, names.get(cid, ""), bytes(desc).decode("utf-8"), amount))
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def summary_rows(month_totals: Iterable[Tuple[int, Dict[int, float]]], categories,
+                 names: Dict[int, str]) -> Iterator[tuple]:
+    """(month, category id, category, limit, spent, remaining) per month and category.
+
+    Every current category gets a row each month; removed ones only where they have spending."""
+    current = list(categories)
+    for month, totals in month_totals:
+        year, m = divmod(month, 12)
+        label = f"{year:04d}-{m + 1:02d}"
+        for c in current:
+            spent = totals.pop(c.id, 0.0)
+            yield label, c.id, c.name, c.limit, spent, c.limit - spent
+        for cid in sorted(totals):
+            if totals[cid]:
+                yield label, cid, names.get(cid, ""), None, totals[cid], None
+
+
+# ---------- writers: return the number of rows written ----------
+def write_csv(path: str, columns: Columns, chunks: Iterable[List[tuple]]) -> int:
+    rows = 0
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow([name for name, _ in columns])
+        for chunk in chunks:
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def write_jsonl(path: str, columns: Columns, chunks: Iterable[List[tuple]]) -> int:
+    rows = 0
+    names = [name for name, _ in columns]
+    encode = json.JSONEncoder(ensure_ascii=False, default=date.isoformat).encode
+    with open(path, "w", encoding="utf-8") as file:
+        for chunk in chunks:
+            file.write("".join(encode(dict(zip(names, row))) + "\n" for row in chunk))
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(path: str, columns: Columns, chunks: Iterable[List[tuple]]) -> int:
+    """One row group per chunk"""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export needs pyarrow (pip install pyarrow).") from None
+    types = {"date": pa.date32(), "int": pa.int64(), "str": pa.string(), "float": pa.float64()}
+    schema = pa.schema([(name, types[kind]) for name, kind in columns])
+    rows = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            arrays = [pa.array(values, type=field.type) for values, field in zip(zip(*chunk), schema)]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            rows += len(chunk)
+    return rows
+
+
+WRITERS: Dict[str, Callable[[str, Columns, Iterable[List[tuple]]], int]] = {
+    "csv": write_csv, "jsonl": write_jsonl, "parquet": write_parquet}
+
+
+def write(path: str, columns: Columns, chunks: Iterable[List[tuple]], fmt: str | None = None) -> ExportResult:
+    """Write chunks of rows to `path` via a temporary file"""
+    writer = WRITERS[export_format(path, fmt)]
+    tmp = path + ".tmp"
+    try:
+        rows = writer(tmp, columns, chunks)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+    return ExportResult(path, rows)
+
+
+def export_transactions(path: str, transactions, names: Dict[int, str], fmt: str | None = None,
+                        size: int = CHUNK_SIZE) -> ExportResult:
+    return write(path, TRANSACTION_COLUMNS, transaction_chunks(transactions, names, size), fmt)
+
+
+def export_summary(path: str, month_totals: Iterable[Tuple[int, Dict[int, float]]], categories,
+                   names: Dict[int, str], fmt: str | None = None, size: int = CHUNK_SIZE) -> ExportResult:
+    rows = summary_rows(month_totals, categories, names)
+    return write(path, SUMMARY_COLUMNS, batches(rows, size), fmt)
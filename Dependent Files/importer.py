@@ -0,0 +1,165 @@
+# importer.py
+# Bulk import of bank statements (CSV or OFX) into a storage backend.
+# Files are read line by line through generators and committed in batches,
+# so a statement of any size is imported with a flat memory footprint.
+
+from __future__ import annotations
+import csv
+import math
+import re
+from dataclasses import dataclass
+from datetime import datetime
+from itertools import islice
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from periods import today
+
+BATCH_SIZE = 10_000
+
+DESC_COLUMNS = ("description", "desc", "memo", "payee", "name", "details")
+AMOUNT_COLUMNS = ("amount", "debit", "value")
+CATEGORY_COLUMNS = ("category",)
+DATE_COLUMNS = ("date", "posted", "posting date", "transaction date")
+DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%Y/%m/%d", "%Y%m%d", "%m/%d/%y")
+
+OFX_TAG = re.compile(r"<(/?)([A-Z0-9.]+)>([^<\r\n]*)", re.IGNORECASE)
+
+
+@dataclass
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0       # rows that could not be parsed
+    skipped: int = 0        # credits (money coming in) are not spending
+
+
+# ---------- readers: yield {"desc", "amount", "category", "date", "signed"} with raw strings ----------
+# "signed" rows use the bank convention: negative amounts are money going out.
+# CSV rows are not signed: spending is positive and a negative amount is a credit.
+def read_csv(path: str) -> Iterator[Dict]:
+    with open(path, newline="", encoding="utf-8-sig") as file:
+        reader = csv.reader(file)
+        header = [h.strip().lower() for h in next(reader, [])]
+
+        def column(names):
+            return next((header.index(n) for n in names if n in header), None)
+
+        desc_i, amount_i, cat_i = column(DESC_COLUMNS), column(AMOUNT_COLUMNS), column(CATEGORY_COLUMNS)
+        date_i = column(DATE_COLUMNS)
+        if amount_i is None:
+            raise ValueError("The CSV file needs an 'Amount' column.")
+
+        def cell(rec, i):
+            return rec[i] if i is not None and i < len(rec) else ""
+
+        for rec in reader:
+            if not rec:
+                continue
+            yield {"desc": cell(rec, desc_i), "amount": cell(rec, amount_i), "category": cell(rec, cat_i),
+                   "date": cell(rec, date_i), "signed": False}
+
+
+def read_ofx(path: str) -> Iterator[Dict]:
+    """Stream <STMTTRN> entries; works for both SGML (unclosed tags) and XML OFX"""
+    with open(path, encoding="utf-8", errors="replace") as file:
+        current = None
+        for line in file:
+            for closing, tag, value in OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    if closing and current is not None:
+                        yield current
+                        current = None
+                    elif not closing:
+                        current = {"desc": "", "amount": "", "category": "", "date": "", "signed": True}
+                elif current is not None and not closing:
+                    value = value.strip()
+                    if tag == "TRNAMT":
+                        current["amount"] = value
+                    elif tag == "DTPOSTED":
+                        current["date"] = value[:8]    # YYYYMMDD[HHMMSS[.XXX][TZ]]
+                    elif tag == "NAME" or (tag == "MEMO" and not current["desc"]):
+                        current["desc"] = value
+
+
+def read_statement(path: str) -> Iterator[Dict]:
+    if path.lower().endswith((".ofx", ".qfx")):
+        return read_ofx(path)
+    return read_csv(path)
+
+
+# ---------- parsing ----------
+def parse_amount(text: str) -> float:
+    """Amount in a statement cell; raises ValueError for text that is not a finite number"""
+    text = text.strip().replace("$", "").replace(",", "")
+    if text.startswith("(") and text.endswith(")"):
+        text = "-" + text[1:-1]
+    amount = float(text)
+    if not math.isfinite(amount):
+        # float() also reads "inf" and "nan"
+        raise ValueError(f"Not an amount: {text}")
+    return amount
+
+
+def parse_day(text: str, cache: Dict[str, int]) -> int:
+    """Day ordinal for a statement date; an empty date means today.
+
+    Statements repeat the same few dates many times, so results are cached."""
+    day = cache.get(text)
+    if day is None:
+        value = text.strip()
+        if not value:
+            day = today()
+        else:
+            for fmt in DATE_FORMATS:
+                try:
+                    day = datetime.strptime(value, fmt).toordinal()
+                    break
+                except ValueError:
+                    pass
+            else:
+                raise ValueError(f"Unrecognized date: {value}")
+        cache[text] = day
+    return day
+
+
+def batches(rows: Iterable, size: int = BATCH_SIZE) -> Iterator[List]:
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+def import_statement(path: str, storage, resolve: Callable[[str], Optional[int]], default_id: int,
+                     batch_size: int = BATCH_SIZE) -> ImportResult:
+    """Parse, validate and store a statement batch by batch.
+
+    `resolve` maps a category name from the file to an id (or None); rows
+    without a known category go to `default_id`. Credits are income and are
+    skipped: a positive OFX TRNAMT or a negative CSV amount. Batches stored
+    before an error stay stored."""
+    result = ImportResult()
+    days: Dict[str, int] = {}
+    for raw_batch in batches(read_statement(path), batch_size):
+        txs = []
+        for raw in raw_batch:
+            try:
+                amount = parse_amount(raw["amount"])
+                day = parse_day(raw["date"], days)
+            except ValueError:
+                result.rejected += 1
+                continue
+            if amount == 0:
+                result.rejected += 1
+                continue
+            if raw["signed"]:
+                amount = -amount
+            if amount < 0:
+                result.skipped += 1
+                continue
+            cid = (resolve(raw["category"].strip()) if raw["category"] else None) or default_id
+            txs.append({"category_id": cid, "desc": raw["desc"].strip() or "(no description)",
+                        "amount": amount, "day": day})
+        result.imported += storage.add_transactions(txs)
+    return result
@@ -0,0 +1,434 @@
+# journal.py
+# Append-only persistence for the budget app.
+# Every change is written as one small binary record at the end of the
+# journal file. The full snapshot (Saved_Data.DAT, in the binary format of
+# snapshot.py) is only rewritten when the journal is compacted, so a normal
+# write costs the same no matter how long the history is.
+#
+# Writes are write-behind: append() encodes the record and queues it, and a
+# background thread writes whatever has queued up with one write and one
+# fsync, so callers (the Tk thread, the state daemon's event loop) never wait
+# for the disk. Compaction also happens on that thread, from a frozen copy
+# of the transactions: the new snapshot is written to a temporary file, the
+# owner swaps it in by rename at its next call, and the journal is then
+# rewritten the same way without the records the snapshot folded in.
+# flush() and close() wait for everything queued; an exit hook drains
+# journals nobody closed.
+#
+# Layout: HEADER, then one record after another, each a FRAME (body length,
+# CRC-32 of the body) and a body of RECORD (sequence number, op) followed by
+# the op's fixed-width fields, with any text as UTF-8 right after the struct
+# it belongs to. Replaying only unpacks structs, so reading a journal never
+# runs code, and a record torn by a crash fails its length or CRC check.
+# Journals from before this format (pickled records) are replayed once and
+# then folded into the snapshot by JournalStorage.
+
+from __future__ import annotations
+import atexit
+import os
+import pickle
+import queue
+import struct
+import threading
+import weakref
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+import snapshot
+
+SNAPSHOT_FILE = "Saved_Data.DAT"
+
+# Compact once the journal holds at least this many records, or as many
+# records as the last snapshot held transactions (whichever is larger).
+# Growing the threshold with the snapshot keeps the rewrite cost amortized
+# O(1) per record.
+COMPACT_MIN_RECORDS = 256
+
+_writing: "weakref.WeakSet[Journal]" = weakref.WeakSet()    # journals with a writer thread
+
+MAGIC = b"BUDGJRNL"
+VERSION = 1
+
+HEADER = struct.Struct("<8sI")
+FRAME = struct.Struct("<II")
+# sequence number, op
+RECORD = struct.Struct("<qB")
+# income, category count; then per category: id, limit, name length, colour length
+SETUP = struct.Struct("<dI")
+CATEGORY = struct.Struct("<idII")
+# category id, amount, day ordinal, description length
+ROW = struct.Struct("<idiI")
+COUNT = struct.Struct("<I")
+# month, total count; then per total: category id, spent
+MONTH_TOTALS = struct.Struct("<iI")
+TOTAL = struct.Struct("<id")
+TRUNCATE = struct.Struct("<q")
+
+OPS = {"setup": 1, "transaction": 2, "transactions": 3, "month_totals": 4, "truncate": 5}
+OP_NAMES = {code: name for name, code in OPS.items()}
+
+
+class JournalError(ValueError):
+    """The journal was written by a newer version"""
+
+
+def journal_path_for(snapshot_path: str) -> str:
+    return os.path.splitext(snapshot_path)[0] + ".journal"
+
+
+# ---------- record format ----------
+def _text(value: str) -> bytes:
+    return value.encode("utf-8")
+
+
+def _row(cid: int, desc: str, amount: float, day: int) -> bytes:
+    desc = _text(desc)
+    return ROW.pack(cid, amount, day, len(desc)) + desc
+
+
+def encode(record: Dict) -> bytes:
+    """One framed record, ready to append"""
+    op = record["op"]
+    parts = [RECORD.pack(record["seq"], OPS[op])]
+    if op == "setup":
+        parts.append(SETUP.pack(record["income"], len(record["categories"])))
+        for c in record["categories"]:
+            name, color = _text(c["name"]), _text(c["color"])
+            parts += (CATEGORY.pack(c["id"], c["limit"], len(name), len(color)), name, color)
+    elif op == "transaction":
+        parts.append(_row(record["category_id"], record["desc"], record["amount"], record["day"]))
+    elif op == "transactions":
+        parts.append(COUNT.pack(len(record["rows"])))
+        parts += (_row(*row) for row in record["rows"])
+    elif op == "month_totals":
+        parts.append(MONTH_TOTALS.pack(record["month"], len(record["totals"])))
+        parts += (TOTAL.pack(cid, spent) for cid, spent in record["totals"].items())
+    else:
+        parts.append(TRUNCATE.pack(record["count"]))
+    body = b"".join(parts)
+    return FRAME.pack(len(body), zlib.crc32(body)) + body
+
+
+def decode(body: bytes) -> Dict:
+    """The record in one frame's body; raises struct.error or KeyError if it is malformed"""
+    seq, code = RECORD.unpack_from(body)
+    op = OP_NAMES[code]
+    pos = RECORD.size
+
+    def text(length):
+        nonlocal pos
+        pos += length
+        return body[pos - length:pos].decode("utf-8")
+
+    def row():
+        nonlocal pos
+        cid, amount, day, desc_len = ROW.unpack_from(body, pos)
+        pos += ROW.size
+        return cid, text(desc_len), amount, day
+
+    record = {"op": op, "seq": seq}
+    if op == "setup":
+        record["income"], count = SETUP.unpack_from(body, pos)
+        pos += SETUP.size
+        record["categories"] = categories = []
+        for _ in range(count):
+            cid, limit, name_len, color_len = CATEGORY.unpack_from(body, pos)
+            pos += CATEGORY.size
+            categories.append({"id": cid, "name": text(name_len), "limit": limit, "color": text(color_len)})
+    elif op == "transaction":
+        record["category_id"], record["desc"], record["amount"], record["day"] = row()
+    elif op == "transactions":
+        count, = COUNT.unpack_from(body, pos)
+        pos += COUNT.size
+        record["rows"] = [row() for _ in range(count)]
+    elif op == "month_totals":
+        record["month"], count = MONTH_TOTALS.unpack_from(body, pos)
+        pos += MONTH_TOTALS.size
+        record["totals"] = dict(TOTAL.unpack_from(body, pos + k * TOTAL.size) for k in range(count))
+    else:
+        record["count"], = TRUNCATE.unpack_from(body, pos)
+    return record
+
+
+class Journal:
+    def __init__(self, snapshot_path: str = SNAPSHOT_FILE, journal_path: Optional[str] = None,
+                 compact_min: int = COMPACT_MIN_RECORDS, write_behind: bool = True):
+        self.snapshot_path = snapshot_path
+        self.journal_path = journal_path or journal_path_for(snapshot_path)
+        self.compact_min = compact_min
+        self.write_behind = write_behind
+        self.seq = 0             # sequence number of the last record written or replayed
+        self.pending = 0         # rows written to the journal since the last snapshot
+        self.snapshot_size = 0   # transactions held by the last snapshot
+        self._file = None        # owned by the writer thread while there is one
+        # write-behind state
+        self._queue: queue.Queue | None = None
+        self._thread: threading.Thread | None = None
+        self._error: OSError | None = None
+        self.compacting = False  # a background compaction has not been swapped in yet
+        self._live = None        # the store being compacted
+        self._compacted = None   # (rows in the new snapshot, journal offset it covers), set by the writer
+        self.legacy = False      # load() read pickled records; the owner compacts before appending
+
+    # ---------- reading ----------
+    def load(self) -> Tuple[Optional[Dict], List[Dict]]:
+        """Return (snapshot dict or None, journal records newer than the snapshot)"""
+        data = None
+        if os.path.exists(self.snapshot_path):
+            if snapshot.is_snapshot(self.snapshot_path):
+                data = snapshot.load(self.snapshot_path)
+            else:
+                # pickle snapshots from before snapshot.py; JournalStorage converts them
+                with open(self.snapshot_path, "rb") as file:
+                    data = pickle.load(file)
+        snap_seq = data.get("journal_seq", 0) if data else 0
+        self.snapshot_size = len(data.get("transactions", [])) if data else 0
+
+        records = []
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "rb") as file:
+                head = file.read(HEADER.size)
+                if len(head) == HEADER.size and head.startswith(MAGIC):
+                    version = HEADER.unpack(head)[1]
+                    if version > VERSION:
+                        raise JournalError(f"{self.journal_path} was written by a newer version (format {version})")
+                    read = self._read_records
+                else:
+                    file.seek(0)
+                    self.legacy = bool(head)
+                    read = self._read_pickled
+                good_end = file.tell()
+                for rec, good_end in read(file):
+                    # records already folded into the snapshot are skipped
+                    if rec.get("seq", 0) > snap_seq:
+                        records.append(rec)
+            if good_end < os.path.getsize(self.journal_path):
+                with open(self.journal_path, "r+b") as file:
+                    file.truncate(good_end)
+
+        self.seq = records[-1]["seq"] if records else snap_seq
+        self.pending = sum(len(r.get("rows", ())) or 1 for r in records)
+        return data, records
+
+    @staticmethod
+    def _read_records(file):
+        """(record, offset after it) for every intact record"""
+        while True:
+            frame = file.read(FRAME.size)
+            if len(frame) < FRAME.size:
+                return
+            length, crc = FRAME.unpack(frame)
+            body = file.read(length)
+            if len(body) < length or zlib.crc32(body) != crc:
+                # torn write from a crash; everything before it is intact
+                return
+            try:
+                rec = decode(body)
+            except (struct.error, KeyError, UnicodeDecodeError):
+                return
+            yield rec, file.tell()
+
+    @staticmethod
+    def _read_pickled(file):
+        """Records of a journal from before the binary format; only ever read to migrate it"""
+        while True:
+            try:
+                rec = pickle.load(file)
+            except EOFError:
+                return
+            except (pickle.UnpicklingError, ValueError, AttributeError, IndexError):
+                return
+            yield rec, file.tell()
+
+    # ---------- writing ----------
+    def append(self, record: Dict, rows: int = 1):
+        """Write one record (covering `rows` changes) to the end of the journal.
+
+        With write-behind the record is only queued; a failed background
+        write is raised by the next call."""
+        self._check()
+        self.seq += 1
+        record["seq"] = self.seq
+        if self.write_behind:
+            self._put(("append", encode(record)))
+        else:
+            if self._file is None:
+                self._file = self._open()
+            self._file.write(encode(record))
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self.pending += rows
+
+    def flush(self):
+        """Wait until every queued record is on disk"""
+        self._drain()
+        self._check()
+
+    def needs_compaction(self) -> bool:
+        return not self.compacting and self.pending >= max(self.compact_min, self.snapshot_size)
+
+    def compact_behind(self, data: Dict):
+        """Like compact(), but write the snapshot on the writer thread.
+
+        `data["transactions"]` must be a MappedStore; it is copied now and
+        moved onto the new snapshot at a later call, keeping rows added
+        meanwhile."""
+        store = data["transactions"]
+        data = dict(data)
+        data["journal_seq"] = self.seq
+        data["transactions"] = store.frozen()
+        self.compacting = True
+        self._live = store
+        self._put(("compact", data))
+        self.pending = 0
+        self.snapshot_size = len(store)
+
+    def compact(self, data: Dict):
+        """Replace the snapshot with `data` and empty the journal.
+
+        `data` must already include every record written so far."""
+        self._stop()
+        data = dict(data)
+        data["journal_seq"] = self.seq
+        tmp_path = self.snapshot_path + ".tmp"
+        snapshot.write(tmp_path, data)
+        store = data.get("transactions")
+        mapped = isinstance(store, snapshot.MappedStore)
+        if mapped:
+            # the old file cannot be replaced while it is mapped (Windows)
+            store.close()
+        os.replace(tmp_path, self.snapshot_path)
+        if mapped:
+            store.remap(self.snapshot_path)
+        # the snapshot now carries journal_seq, so a crash before this
+        # truncate only leaves records that load() will skip
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        open(self.journal_path, "wb").close()
+        self.legacy = False
+        self.pending = 0
+        self.snapshot_size = len(data.get("transactions", []))
+
+    def close(self):
+        self._stop()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._check()
+
+    # ---------- write-behind ----------
+    def _put(self, item: tuple):
+        if self._thread is None:
+            self._queue = queue.Queue()
+            self._thread = threading.Thread(target=self._run, name=f"journal-{os.path.basename(self.journal_path)}",
+                                            daemon=True)
+            self._thread.start()
+            _writing.add(self)
+        self._queue.put(item)
+
+    def _check(self):
+        """Raise a background write error; swap in a finished background snapshot"""
+        if self._error is not None:
+            raise self._error
+        if self._compacted is not None:
+            rows, offset = self._compacted
+            self._compacted = None
+            self._live.rebase(self.snapshot_path, self.snapshot_path + ".tmp", rows)
+            self._put(("rotate", offset))
+            self._live = None
+            self.compacting = False
+
+    def _drain(self):
+        if self._thread is not None:
+            done = threading.Event()
+            self._queue.put(("sync", done))
+            done.wait()
+
+    def _stop(self):
+        """Drain the queue (finishing a compaction) and end the writer thread"""
+        self._drain()
+        if self._error is None and self._compacted is not None:
+            self._check()
+            self._drain()
+        if self._thread is not None:
+            self._queue.put(("stop",))
+            self._thread.join()
+            self._thread = self._queue = None
+            _writing.discard(self)
+
+    def _run(self):
+        while True:
+            # take everything queued so far: consecutive records become one write and one fsync
+            item = self._queue.get()
+            batch = []
+            while item is not None and item[0] == "append":
+                batch.append(item[1])
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    item = None
+            if batch:
+                self._guard(self._write, b"".join(batch))
+            if item is None:
+                continue
+            kind = item[0]
+            if kind == "compact":
+                self._guard(self._write_snapshot, item[1])
+            elif kind == "rotate":
+                self._guard(self._rotate, item[1])
+            elif kind == "sync":
+                item[1].set()
+            elif kind == "stop":
+                if self._file is not None:
+                    self._file.close()
+                    self._file = None
+                return
+
+    def _guard(self, write, arg):
+        # after a failed write nothing more is written: later records would follow a torn one
+        if self._error is None:
+            try:
+                write(arg)
+            except OSError as e:
+                self._error = e
+
+    def _open(self):
+        file = open(self.journal_path, "ab")
+        if file.tell() == 0:
+            file.write(HEADER.pack(MAGIC, VERSION))
+        return file
+
+    def _write(self, data: bytes):
+        if self._file is None:
+            self._file = self._open()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _write_snapshot(self, data: Dict):
+        snapshot.write(self.snapshot_path + ".tmp", data)
+        # every record up to journal_seq has been written; later ones will start here
+        offset = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        self._compacted = (len(data["transactions"]), offset)
+
+    def _rotate(self, offset: int):
+        """Rewrite the journal without its first `offset` bytes (now in the snapshot)"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        tmp_path = self.journal_path + ".tmp"
+        with open(self.journal_path, "rb") as src, open(tmp_path, "wb") as dst:
+            dst.write(HEADER.pack(MAGIC, VERSION))
+            src.seek(max(offset, HEADER.size))
+            dst.write(src.read())
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(tmp_path, self.journal_path)
+
+
+@atexit.register
+def _drain_all():
+    """Get queued records of journals nobody closed onto disk before the process exits"""
+    for journal in list(_writing):
+        journal._drain()
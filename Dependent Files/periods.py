@@ -0,0 +1,38 @@
+# periods.py
+# Month arithmetic shared by the transaction store, storage and the UI.
+# Days are stored as proleptic Gregorian ordinals (date.toordinal()) and
+# months as a single integer, year * 12 + (month - 1), so both fit in arrays
+# and compare and step with plain integer math.
+
+from __future__ import annotations
+from datetime import date
+from typing import Tuple
+
+
+def today() -> int:
+    return date.today().toordinal()
+
+
+def month_of_date(d: date) -> int:
+    return d.year * 12 + d.month - 1
+
+
+def month_of(day: int) -> int:
+    return month_of_date(date.fromordinal(day))
+
+
+def current_month() -> int:
+    return month_of_date(date.today())
+
+
+def month_days(month: int) -> Tuple[int, int]:
+    """First and last day ordinal of a month"""
+    year, m = divmod(month, 12)
+    first = date(year, m + 1, 1).toordinal()
+    ny, nm = divmod(month + 1, 12)
+    return first, date(ny, nm + 1, 1).toordinal() - 1
+
+
+def month_label(month: int) -> str:
+    year, m = divmod(month, 12)
+    return date(year, m + 1, 1).strftime("%B %Y")
@@ -0,0 +1,302 @@
+# search.py
+# Full-text search over transaction descriptions.
+# Histories repeat the same few descriptions endlessly ("Uber", "Rent"), so
+# the index works on distinct descriptions: each one keeps the ascending
+# positions of its transactions, words map to the descriptions that contain
+# them, and trigrams map to the words that contain them. A query word is
+# matched as a prefix (one or two letters), as a substring via its trigrams,
+# or, when nothing contains it, as a word within one or two typos. Categories
+# and amount ranges (log-spaced buckets) keep position lists as well. A
+# search walks the shortest of the lists its criteria select, newest first,
+# checks the other criteria per position and stops once enough results are
+# found, so it touches the matches it returns rather than the whole history.
+# A term found in very many descriptions (a one-letter prefix, say) is
+# checked against the descriptions walked instead of being listed.
+#
+# The index is built on the first search and then updated as transactions
+# are added (and truncated by undo).
+
+from __future__ import annotations
+import heapq
+import math
+import re
+from array import array
+from bisect import bisect_left
+from itertools import chain
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+WORD = re.compile(r"\w+")
+SEARCH_LIMIT = 50
+MERGE_MAX = 256         # position lists merged lazily; more are gathered and sorted
+GATHER_MAX = 50_000     # positions gathered at most; more means matches are dense enough to scan for
+BROAD_DESCS = 20_000    # a term found in more descriptions is checked per transaction instead
+
+
+def words(text: str) -> List[str]:
+    return WORD.findall(text.casefold())
+
+
+def trigrams(word: str) -> Set[str]:
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def amount_bucket(amount: float) -> int:
+    """Log-spaced bucket of an amount; each spans about 2%, e.g. $100-102.19.
+
+    Zero, negative and NaN amounts share the lowest bucket, infinity the highest."""
+    if not math.isfinite(amount):
+        return 1 << 20 if amount > 0 else -1 << 20
+    return math.floor(math.log2(amount) * 32) if amount > 0 else -1 << 20
+
+
+def within(a: str, b: str, limit: int) -> bool:
+    """Levenshtein distance of a and b is at most `limit` (banded, early exit)"""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i] + [0] * len(b)
+        for j, cb in enumerate(b, 1):
+            cur[j] = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+        if min(cur) > limit:
+            return False
+        prev = cur
+    return prev[-1] <= limit
+
+
+class SearchIndex:
+    """Inverted index over one history; positions count from the oldest transaction"""
+
+    def __init__(self):
+        self.desc_ids: Dict[str, int] = {}          # description -> id
+        self.desc_texts: List[str] = []             # id -> description
+        self.desc_positions: List[array] = []       # description id -> positions, ascending
+        self.word_descs: Dict[str, Set[int]] = {}   # word -> description ids
+        self.vocab: List[str] = []                  # every word, for prefix lookups
+        self.vocab_sorted = True                    # sorted by the first lookup after words are added
+        self.trigram_words: Dict[str, Set[str]] = {}
+        self.cat_positions: Dict[int, array] = {}
+        self.amount_positions: Dict[int, array] = {}
+        # per position, for filtering and truncation
+        self.desc_of = array("i")
+        self.cat_ids = array("i")
+        self.amounts = array("d")
+
+    @classmethod
+    def build(cls, transactions) -> "SearchIndex":
+        """Index a newest-first transaction sequence (a TransactionStore or a storage view)"""
+        index = cls()
+        raw_rows = getattr(transactions, "raw_rows", None)
+        if raw_rows is None:
+            for tx in reversed(transactions):
+                index.add(tx["category_id"], tx["desc"], tx["amount"])
+            return index
+        # the same loop as add(), with descriptions looked up before they are decoded
+        by_raw: Dict[bytes, int] = {}
+        desc_positions, cat_positions, amount_positions = index.desc_positions, index.cat_positions, \
+            index.amount_positions
+        desc_of, cat_ids, amounts = index.desc_of, index.cat_ids, index.amounts
+        by_amount: Dict[float, array] = {}     # amounts repeat too; skip the logarithm
+        for pos, (amount, cid, _, raw) in enumerate(raw_rows()):
+            did = by_raw.get(raw)
+            if did is None:
+                raw = bytes(raw)
+                did = by_raw[raw] = index._new_desc(raw.decode("utf-8"))
+            desc_positions[did].append(pos)
+            cat = cat_positions.get(cid)
+            if cat is None:
+                cat = cat_positions[cid] = array("i")
+            cat.append(pos)
+            same = by_amount.get(amount)
+            if same is None:
+                same = by_amount[amount] = amount_positions.setdefault(amount_bucket(amount), array("i"))
+            same.append(pos)
+            desc_of.append(did)
+            cat_ids.append(cid)
+            amounts.append(amount)
+        return index
+
+    def __len__(self):
+        return len(self.amounts)
+
+    # ---------- maintenance ----------
+    def _new_desc(self, desc: str) -> int:
+        did = self.desc_ids.get(desc)
+        if did is not None:
+            return did
+        did = self.desc_ids[desc] = len(self.desc_positions)
+        self.desc_texts.append(desc)
+        self.desc_positions.append(array("i"))
+        for word in set(words(desc)):
+            descs = self.word_descs.get(word)
+            if descs is None:
+                descs = self.word_descs[word] = set()
+                self.vocab.append(word)
+                self.vocab_sorted = False
+                for tri in trigrams(word):
+                    self.trigram_words.setdefault(tri, set()).add(word)
+            descs.add(did)
+        return did
+
+    def add(self, cat_id: int, desc: str, amount: float):
+        pos = len(self.amounts)
+        did = self.desc_ids.get(desc)
+        if did is None:
+            did = self._new_desc(desc)
+        self.desc_positions[did].append(pos)
+        self.cat_positions.setdefault(cat_id, array("i")).append(pos)
+        self.amount_positions.setdefault(amount_bucket(amount), array("i")).append(pos)
+        self.desc_of.append(did)
+        self.cat_ids.append(cat_id)
+        self.amounts.append(amount)
+
+    def truncate(self, count: int):
+        """Forget the newest positions so that `count` remain"""
+        for pos in range(len(self.amounts) - 1, count - 1, -1):
+            self.desc_positions[self.desc_of[pos]].pop()
+            self.cat_positions[self.cat_ids[pos]].pop()
+            self.amount_positions[amount_bucket(self.amounts[pos])].pop()
+        for column in (self.desc_of, self.cat_ids, self.amounts):
+            del column[count:]
+
+    # ---------- queries ----------
+    def _sorted_vocab(self) -> List[str]:
+        if not self.vocab_sorted:
+            self.vocab.sort()
+            self.vocab_sorted = True
+        return self.vocab
+
+    def _broad(self, found: Iterable[str]) -> bool:
+        total = 0
+        for word in found:
+            total += len(self.word_descs[word])
+            if total > BROAD_DESCS:
+                return True
+        return False
+
+    def _word_matches(self, term: str) -> Set[str] | None:
+        """Words of the vocabulary that `term` matches, or None when they are in too many descriptions"""
+        if len(term) < 3:
+            vocab = self._sorted_vocab()
+            found, total = set(), 0
+            for i in range(bisect_left(vocab, term), len(vocab)):
+                if not vocab[i].startswith(term):
+                    break
+                total += len(self.word_descs[vocab[i]])
+                if total > BROAD_DESCS:
+                    return None
+                found.add(vocab[i])
+            return found
+        tris = sorted(trigrams(term), key=lambda t: len(self.trigram_words.get(t, ())))
+        if len(tris) == 1 and len(self.trigram_words.get(tris[0], ())) > BROAD_DESCS:
+            return None     # each word is in at least one description
+        candidates = set(self.trigram_words.get(tris[0], ()))
+        for tri in tris[1:]:
+            if not candidates:
+                break
+            candidates &= self.trigram_words.get(tri, set())
+        found = {word for word in candidates if term in word}
+        if found:
+            return None if self._broad(found) else found
+        # typo tolerance, checked with a real edit distance on a few candidates:
+        # short words share few trigrams, so take the words with the same first letter
+        if len(term) < 6:
+            vocab = self._sorted_vocab()
+            start = bisect_left(vocab, term[0])
+            stop = bisect_left(vocab, chr(ord(term[0]) + 1), start)
+            return {vocab[i] for i in range(start, stop) if within(term, vocab[i], 1)}
+        # longer ones: words sharing most of their trigrams
+        limit = 1 if len(term) < 8 else 2
+        shared: Dict[str, int] = {}
+        for tri in tris:
+            for word in self.trigram_words.get(tri, ()):
+                shared[word] = shared.get(word, 0) + 1
+        need = max(1, len(tris) - 3 * limit)
+        return {word for word, n in shared.items() if n >= need and within(term, word, limit)}
+
+    def _matching_descs(self, terms: List[str]) -> Tuple[Set[int] | None, List[str]]:
+        """(ids of the descriptions matching every listable term, the terms too broad to list)"""
+        result, broad = None, []
+        for term in sorted(set(terms), key=len, reverse=True):
+            words_found = self._word_matches(term)
+            if words_found is None:
+                broad.append(term)
+                continue
+            matches = [self.word_descs[word] for word in words_found]
+            # a lone word's set is only read, never changed, so it needs no copy
+            descs = matches[0] if len(matches) == 1 else set().union(*matches)
+            result = descs if result is None else result & descs
+            if not result:
+                return set(), broad
+        return result, broad
+
+    def _has_terms(self, did: int, terms: List[str], seen: Dict[int, bool]) -> bool:
+        """Description `did` matches every (broad) term the way _word_matches would"""
+        ok = seen.get(did)
+        if ok is None:
+            desc_words = words(self.desc_texts[did])
+            ok = seen[did] = all(any(w.startswith(t) if len(t) < 3 else t in w for w in desc_words)
+                                 for t in terms)
+        return ok
+
+    def search(self, text: str = "", category_ids: Iterable[int] | None = None,
+               min_amount: float | None = None, max_amount: float | None = None,
+               limit: int = SEARCH_LIMIT) -> List[int]:
+        """Positions of the newest `limit` matching transactions, newest first"""
+        descs, broad = self._matching_descs(words(text))
+        cats = set(category_ids) if category_ids is not None else None
+        lo = float("-inf") if min_amount is None else min_amount
+        hi = float("inf") if max_amount is None else max_amount
+        if descs is not None and not descs or cats is not None and not cats or lo > hi:
+            return []
+        # each criterion selects some position lists: (lists by key, keys, positions in them)
+        selections = []
+        if descs is not None:
+            selections.append((self.desc_positions, descs))
+        if cats is not None:
+            selections.append((self.cat_positions, [c for c in cats if c in self.cat_positions]))
+        if min_amount is not None or max_amount is not None:
+            first = amount_bucket(lo) if min_amount is not None else -1 << 20
+            last = amount_bucket(hi) if max_amount is not None else 1 << 20
+            selections.append((self.amount_positions, [b for b in self.amount_positions if first <= b <= last]))
+        selections = [(lists, keys, self._size(lists, keys)) for lists, keys in selections]
+        # walk the shortest selection and check the other criteria per position
+        positions = self._newest_first(*min(selections, key=lambda s: s[2])) if selections else \
+            reversed(range(len(self.amounts)))
+        desc_of, cat_ids, amounts = self.desc_of, self.cat_ids, self.amounts
+        seen: Dict[int, bool] = {}
+        found = []
+        for pos in positions:
+            if descs is not None and desc_of[pos] not in descs:
+                continue
+            if broad and not self._has_terms(desc_of[pos], broad, seen):
+                continue
+            if cats is not None and cat_ids[pos] not in cats:
+                continue
+            if not lo <= amounts[pos] <= hi:
+                continue
+            found.append(pos)
+            if len(found) >= limit:
+                break
+        return found
+
+    @staticmethod
+    def _size(lists, keys) -> int:
+        """Positions in the selected lists, counted only as far as GATHER_MAX + 1"""
+        total = 0
+        for k in keys:
+            total += len(lists[k])
+            if total > GATHER_MAX:
+                break
+        return total
+
+    def _newest_first(self, lists, keys, total: int) -> Iterator[int]:
+        if len(keys) > MERGE_MAX and total > GATHER_MAX:
+            # many lists holding many positions: matches are dense, so scanning meets them soon
+            return reversed(range(len(self.amounts)))
+        sources = [lists[k] for k in keys if len(lists[k])]
+        if len(sources) <= 1:
+            return reversed(sources[0]) if sources else iter(())
+        if len(sources) <= MERGE_MAX:
+            return heapq.merge(*(reversed(s) for s in sources), reverse=True)
+        return iter(sorted(chain.from_iterable(sources), reverse=True))
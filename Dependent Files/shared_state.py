@@ -0,0 +1,631 @@
+# shared_state.py
+# One writer for a budget file, shared by every window that has it open.
+# The first budget window starts a small state daemon for its storage path;
+# the daemon owns the only BudgetEngine (and so the only writer) for that
+# file, and every window attaches to it over a local socket. A window keeps
+# a mirror of the income, categories and the shown month's totals, sends
+# its mutations to the daemon, and receives every other window's mutations
+# as broadcasts, so all windows see current state without reloading the
+# file and concurrent edits are never lost. The daemon exits a few seconds
+# after the last window detaches. Windows use it when BUDGET_SHARED_STATE=1.
+#
+# The daemon holds the file's writer lock, listens on a free local port and
+# leaves the port and a random session token in <file>.daemon, readable by
+# the owner only. A connection must open with a hello carrying that token;
+# anything else is dropped. A file that is open without a daemon cannot be
+# attached to.
+#
+# Messages are newline-delimited JSON. Requests carry an "id" and get a
+# {"reply": id, ...} answer; broadcasts carry an "event" instead.
+
+from __future__ import annotations
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import queue
+import secrets
+import socket
+import subprocess
+import sys
+import threading
+import time
+from datetime import date
+from typing import Dict, Iterable, List, Optional
+
+import exporter
+import importer
+from alerts import AlertEngine
+from budget_engine import BudgetEngine, BudgetError, Category, CategoryRegistry
+from periods import current_month, month_of, today
+from search import SEARCH_LIMIT
+from storage import StorageLocked, open_storage
+
+PROTOCOL = 1                # bumped whenever the messages change
+IDLE_EXIT = 5.0             # seconds the daemon lingers after the last window detaches
+START_TIMEOUT = 5.0
+HANDSHAKE_TIMEOUT = 2.0     # for the hello, so a stray listener cannot hang a window
+LOCK_WAIT = 1.0             # a daemon that is just exiting may still hold the file
+LOCKED_EXIT = 3             # exit status of a daemon that found the file open elsewhere
+REQUEST_TIMEOUT = 60.0
+
+
+def rendezvous_path(path: str) -> str:
+    """Where the daemon for a budget file leaves its port and session token"""
+    return os.path.abspath(path) + ".daemon"
+
+
+def read_rendezvous(path: str) -> Optional[Dict]:
+    """{"port", "token"} of the daemon for `path`, or None if there is none"""
+    try:
+        with open(rendezvous_path(path), encoding="utf-8") as file:
+            info = json.load(file)
+        return {"port": int(info["port"]), "token": str(info["token"])}
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def categories_json(categories: Iterable[Category]) -> List[Dict]:
+    return [{"id": c.id, "name": c.name, "limit": c.limit, "color": c.color} for c in categories]
+
+
+def totals_json(totals: Dict[int, float]) -> Dict[str, float]:
+    return {str(k): v for k, v in totals.items()}
+
+
+def row_json(row: Dict) -> Dict:
+    return {"category": row["category"], "category_id": row["category_id"], "desc": row["desc"],
+            "amount": row["amount"], "day": row["date"].toordinal()}
+
+
+# ---------- daemon ----------
+class StateDaemon:
+    def __init__(self, path: str):
+        self.path = os.path.abspath(path)
+        storage = open_storage(path)        # raises StorageLocked if the file is open elsewhere
+        data = storage.load()
+        self.loaded = data is not None
+        self.engine = BudgetEngine(storage, data)
+        self.token = secrets.token_hex(16)
+        self.clients: set = set()
+        self.idle_timer = None
+        self.stopped: asyncio.Event | None = None
+
+    def broadcast(self, event: Dict, sender=None):
+        line = (json.dumps(event) + "\n").encode("utf-8")
+        for writer in self.clients:
+            if writer is not sender:
+                writer.write(line)
+
+    def setup_event(self) -> Dict:
+        return {"event": "setup", "loaded": self.loaded, "income": self.engine.income,
+                "categories": categories_json(self.engine.categories)}
+
+    def category(self, cat_id: int) -> Category:
+        cat = self.engine.categories.get(cat_id)
+        if cat is None:
+            raise BudgetError("Category not found.")
+        return cat
+
+    def dispatch(self, msg: Dict, sender) -> Dict:
+        op = msg["op"]
+        engine = self.engine
+        if op == "hello":
+            if msg.get("protocol") != PROTOCOL:
+                raise BudgetError("This window and the running budget daemon are different versions; "
+                                  "close the other budget windows and try again.")
+            if os.path.abspath(msg["path"]) != self.path:
+                raise BudgetError(f"daemon serves {self.path}")
+            if not self.loaded and not engine.categories:
+                # a new budget starts from the first window's default categories
+                engine.use_defaults(Category(c["name"], c["limit"], c["color"]) for c in msg["defaults"])
+            month = msg["month"]
+            return {"protocol": PROTOCOL, "month": month, "loaded": self.loaded, "income": engine.income,
+                    "categories": categories_json(engine.categories),
+                    "totals": totals_json(engine.storage.month_totals(month))}
+        if op == "month_totals":
+            return {"totals": totals_json(engine.storage.month_totals(msg["month"]))}
+        if op in ("count", "history"):
+            month = msg.get("month")
+            rows = engine.transactions if month is None else engine.storage.month_transactions(month)
+            if op == "count":
+                return {"count": len(rows)}
+            if msg.get("oldest_first"):
+                # positions from the oldest end stay put while other windows add spending
+                n = len(rows)
+                page = rows[max(0, n - msg["stop"]):max(0, n - msg["start"])]
+                return {"rows": [row_json(r) for r in reversed(page)]}
+            return {"rows": [row_json(r) for r in rows[msg["start"]:msg["stop"]]]}
+        if op == "all_month_totals":
+            return {"months": [[month, totals_json(totals)] for month, totals in engine.storage.all_month_totals()],
+                    "names": {str(k): v for k, v in engine.storage.category_names().items()}}
+        if op == "spend":
+            tx = engine.spend(msg["category_id"], msg["amount"], msg["desc"], msg["day"])
+            self.broadcast({"event": "txs", "txs": [tx]}, sender)
+            return {"tx": tx}
+        if op in ("set_income", "add_category", "delete_category", "rename_category"):
+            # single setup edits are saved and undoable, as in the engine; every window sees them
+            reply = {}
+            if op == "set_income":
+                engine.set_income(msg["value"])
+            elif op == "add_category":
+                reply["id"] = engine.add_category(msg["name"], msg["limit"], msg["color"]).id
+            elif op == "delete_category":
+                engine.delete_category(self.category(msg["category_id"]))
+            else:
+                engine.rename_category(self.category(msg["category_id"]), msg["name"])
+            event = self.setup_event()
+            self.broadcast(event, sender)
+            return dict(event, **reply)
+        if op == "save_setup":
+            engine.save_setup(msg["categories"], msg["income"])
+            self.loaded = True
+            event = self.setup_event()
+            self.broadcast(event, sender)
+            return event
+        if op == "import_rows":
+            # the window reads the statement itself; only parsed rows come over the socket
+            engine.import_transactions([
+                {"category_id": tx["category_id"], "desc": str(tx["desc"]), "amount": tx["amount"],
+                 "day": int(tx["day"])} for tx in msg["txs"]])
+            self.broadcast({"event": "totals"}, sender)
+            return {"count": len(msg["txs"])}
+        if op == "search":
+            rows = engine.search(msg["text"], msg.get("category_ids"), msg.get("min_amount"),
+                                 msg.get("max_amount"), msg["limit"])
+            return {"rows": [row_json(r) for r in rows]}
+        if op in ("undo", "redo"):
+            # one history for the file: a window undoes the last change made from any window
+            label = engine.undo() if op == "undo" else engine.redo()
+            event = self.setup_event()
+            if label is not None:
+                self.broadcast(event, sender)
+                self.broadcast({"event": "totals"}, sender)
+            return dict(event, label=label)
+        if op == "reconcile":
+            engine.set_month(msg["month"])
+            fixed = engine.reconcile_spent()
+            if fixed:
+                self.broadcast({"event": "totals"}, sender)
+            return {"fixed": totals_json(fixed)}
+        raise BudgetError(f"Unknown request: {op}")
+
+    def authentic(self, msg) -> bool:
+        """Is this the hello of a window that could read the rendezvous file?"""
+        return (isinstance(msg, dict) and msg.get("op") == "hello"
+                and hmac.compare_digest(str(msg.get("token")).encode("utf-8"), self.token.encode("utf-8")))
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            msg = json.loads(await reader.readline())
+        except (ConnectionError, ValueError):
+            msg = None
+        if not self.authentic(msg):
+            writer.close()
+            return
+        self.clients.add(writer)
+        if self.idle_timer is not None:
+            self.idle_timer.cancel()
+            self.idle_timer = None
+        try:
+            while isinstance(msg, dict):
+                try:
+                    reply = self.dispatch(msg, writer)
+                except BudgetError as e:
+                    reply = {"error": str(e), "kind": "budget"}
+                except Exception as e:
+                    # a malformed request or a storage error fails that request, not the connection
+                    reply = {"error": f"The budget daemon could not do that ({type(e).__name__}: {e}).",
+                             "kind": "internal"}
+                reply["reply"] = msg.get("id")
+                writer.write((json.dumps(reply) + "\n").encode("utf-8"))
+                await writer.drain()
+                line = await reader.readline()
+                if not line:
+                    break
+                msg = json.loads(line)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+            if not self.clients:
+                self.idle_timer = asyncio.get_running_loop().call_later(IDLE_EXIT, self.stopped.set)
+
+    def publish(self, port: int):
+        """Write the rendezvous file, readable by this user only"""
+        target = rendezvous_path(self.path)
+        tmp = target + ".tmp"
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), "w", encoding="utf-8") as file:
+            json.dump({"port": port, "token": self.token, "pid": os.getpid()}, file)
+        os.replace(tmp, target)
+
+    def unpublish(self):
+        try:
+            os.remove(rendezvous_path(self.path))
+        except OSError:
+            pass
+
+    async def serve(self):
+        self.stopped = asyncio.Event()
+        server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        # nobody may attach at all (e.g. the starting window crashed)
+        self.idle_timer = asyncio.get_running_loop().call_later(IDLE_EXIT * 6, self.stopped.set)
+        try:
+            async with server:
+                self.publish(server.sockets[0].getsockname()[1])
+                await self.stopped.wait()
+        finally:
+            # the file goes before the lock, so it never points at the next daemon's port
+            self.unpublish()
+            self.engine.close()
+
+
+def start_daemon(path: str) -> subprocess.Popen:
+    kwargs = {"stdin": subprocess.DEVNULL, "stdout": subprocess.DEVNULL, "stderr": subprocess.DEVNULL}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.DETACHED_PROCESS | subprocess.CREATE_NEW_PROCESS_GROUP
+    else:
+        kwargs["start_new_session"] = True
+    return subprocess.Popen([sys.executable, os.path.abspath(__file__), "--storage", os.path.abspath(path)],
+                            **kwargs)
+
+
+# ---------- window side ----------
+class SharedBudget:
+    """Stand-in for BudgetEngine whose state lives in the daemon.
+
+    Reads come from the local mirror (categories, income, the shown month's
+    totals) or, for history, from the daemon. Mutations go to the daemon,
+    which applies them once and broadcasts them. poll() applies broadcasts
+    from other windows and returns them so the UI can redraw. Alerts fire
+    in every window, for its own spends and for the ones it is told about."""
+
+    def __init__(self, sock: socket.socket, file, hello: Dict, alerts: AlertEngine | None = None):
+        """Take over a connection that handshake() has greeted"""
+        self.sock = sock
+        self.alerts = alerts
+        self.file = file
+        self.send_lock = threading.Lock()
+        self.next_request = 0
+        self.replies: Dict[int, Dict] = {}
+        self.reply_ready = threading.Condition()
+        self.events: "queue.Queue[Dict]" = queue.Queue()
+        self.closed = False
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+        self.month = self.this_month = hello["month"]
+        self.loaded = hello["loaded"]
+        self.income = hello["income"]
+        self.categories = CategoryRegistry()
+        self._sync_categories(hello["categories"])
+        self._set_totals(hello["totals"], notify=False)
+        self.transactions = RemoteTransactions(self, None)
+
+    # ---------- wire ----------
+    def _read_loop(self):
+        try:
+            for line in self.file:
+                msg = json.loads(line)
+                if "reply" in msg:
+                    with self.reply_ready:
+                        self.replies[msg["reply"]] = msg
+                        self.reply_ready.notify_all()
+                else:
+                    self.events.put(msg)
+        except (OSError, ValueError):
+            pass
+        with self.reply_ready:
+            self.closed = True
+            self.reply_ready.notify_all()
+
+    def request(self, op: str, **fields) -> Dict:
+        with self.send_lock:
+            self.next_request += 1
+            rid = self.next_request
+            self.sock.sendall((json.dumps(dict(fields, op=op, id=rid)) + "\n").encode("utf-8"))
+        deadline = time.monotonic() + REQUEST_TIMEOUT
+        with self.reply_ready:
+            while rid not in self.replies:
+                if self.closed or not self.reply_ready.wait(deadline - time.monotonic()):
+                    raise BudgetError("Lost the connection to the budget daemon.")
+            reply = self.replies.pop(rid)
+        if "error" in reply:
+            raise BudgetError(reply["error"])
+        return reply
+
+    # ---------- mirror ----------
+    def _sync_categories(self, cats: List[Dict]):
+        """Make the mirror match the daemon's categories, keeping each one's spent"""
+        old = self.categories.by_id
+        registry = CategoryRegistry(next_id=self.categories.next_id)
+        for c in cats:
+            cat = old.get(c["id"])
+            if cat is None:
+                cat = Category(c["name"], c["limit"], c["color"], id=c["id"])
+            else:
+                cat.name, cat.limit, cat.color = c["name"], c["limit"], c["color"]
+            registry.add(cat)
+        self.categories = registry
+        self._recount()
+        self._rearm()
+
+    def _set_totals(self, totals: Dict[str, float], notify: bool = True):
+        for c in self.categories:
+            c.spent = totals.get(str(c.id), 0.0)
+        self._recount()
+        self._rearm(notify)
+
+    def _recount(self):
+        self.total_limit = sum(c.limit for c in self.categories)
+        self.total_spent = sum(c.spent for c in self.categories)
+
+    def _rearm(self, notify: bool = True):
+        if self.alerts is not None:
+            self.alerts.rearm(self.categories, self.total_limit, self.total_spent, self.month, notify)
+
+    def _count_tx(self, tx: Dict):
+        if month_of(tx["day"]) == self.month:
+            cat = self.categories.get(tx["category_id"])
+            if cat is not None:
+                cat.spent += tx["amount"]
+                self.total_spent += tx["amount"]
+                if self.alerts is not None:
+                    self.alerts.check(cat, self.total_spent)
+
+    def poll(self) -> List[Dict]:
+        """Apply broadcasts from other windows; returns the events applied"""
+        applied = []
+        while True:
+            try:
+                event = self.events.get_nowait()
+            except queue.Empty:
+                return applied
+            kind = event["event"]
+            if kind == "setup":
+                self._apply_setup(event)
+            elif kind == "txs":
+                for tx in event["txs"]:
+                    self._count_tx(tx)
+            elif kind == "totals":
+                self._set_totals(self.request("month_totals", month=self.month)["totals"])
+            applied.append(event)
+
+    def _apply_setup(self, event: Dict):
+        self.loaded = event["loaded"]
+        self.income = event["income"]
+        self._sync_categories(event["categories"])
+
+    # ---------- BudgetEngine interface ----------
+    def _setup_request(self, op: str, **fields) -> Dict:
+        reply = self.request(op, **fields)
+        self._apply_setup(reply)
+        return reply
+
+    def set_income(self, value: float):
+        self._setup_request("set_income", value=value)
+
+    def add_category(self, name="Category", limit=0.0, color="#22c55e") -> Category:
+        reply = self._setup_request("add_category", name=name, limit=limit, color=color)
+        return self.categories.get(reply["id"])
+
+    def delete_category(self, cat: Category):
+        self._setup_request("delete_category", category_id=cat.id)
+
+    def rename_category(self, cat: Category, name: str):
+        self._setup_request("rename_category", category_id=cat.id, name=name)
+
+    def save_setup(self, cats_data: List[Dict], income: float):
+        self._setup_request("save_setup", categories=[
+            {"id": d.get("id"), "name": d["name"], "limit": d["limit"], "color": d["color"]}
+            for d in cats_data], income=income)
+
+    def spend(self, cat_id: int, amount: float, desc: str = "", day: int | None = None) -> Dict:
+        tx = self.request("spend", category_id=cat_id, amount=amount, desc=desc, day=day or today())["tx"]
+        self._count_tx(tx)
+        return tx
+
+    def add_transaction(self, cat_name: str, desc: str, amount: float, day: int | None = None) -> Dict:
+        cat = self.categories.by_name(cat_name)
+        if not cat:
+            raise BudgetError("Category not found.")
+        return self.spend(cat.id, amount, desc, day)
+
+    def set_month(self, month: int):
+        self.month = month
+        self._set_totals(self.request("month_totals", month=month)["totals"], notify=False)
+
+    def month_transactions(self):
+        return RemoteTransactions(self, self.month)
+
+    def check_rollover(self) -> bool:
+        now = current_month()
+        moved = False
+        if now != self.this_month:
+            if self.month == self.this_month:
+                self.set_month(now)
+                moved = True
+            self.this_month = now
+        return moved
+
+    def search(self, text: str = "", category_ids: Iterable[int] | None = None,
+               min_amount: float | None = None, max_amount: float | None = None,
+               limit: int = SEARCH_LIMIT) -> List[Dict]:
+        rows = self.request("search", text=text, limit=limit, min_amount=min_amount, max_amount=max_amount,
+                            category_ids=None if category_ids is None else list(category_ids))["rows"]
+        for r in rows:
+            r["date"] = date.fromordinal(r.pop("day"))
+        return rows
+
+    def _undo_redo(self, op: str) -> str | None:
+        reply = self.request(op)
+        if reply["label"] is not None:
+            self._apply_setup(reply)
+            self._set_totals(self.request("month_totals", month=self.month)["totals"], notify=False)
+        return reply["label"]
+
+    def undo(self) -> str | None:
+        return self._undo_redo("undo")
+
+    def redo(self) -> str | None:
+        return self._undo_redo("redo")
+
+    def import_statement(self, path: str, default_cat_name: str) -> importer.ImportResult:
+        """Read the statement here and send the daemon its rows a batch at a time"""
+        default = self.categories.by_name(default_cat_name)
+        if not default:
+            raise BudgetError("Category not found.")
+        try:
+            return importer.import_statement(path, self, self.categories.ids.get, default.id)
+        finally:
+            self._set_totals(self.request("month_totals", month=self.month)["totals"])
+
+    def add_transactions(self, txs: List[Dict]) -> int:
+        """The storage end of importer.import_statement"""
+        if txs:
+            self.request("import_rows", txs=txs)
+        return len(txs)
+
+    def reconcile_spent(self) -> Dict[int, float]:
+        fixed = self.request("reconcile", month=self.month)["fixed"]
+        self._set_totals(self.request("month_totals", month=self.month)["totals"])
+        return {int(k): v for k, v in fixed.items()}
+
+    def _oldest_first(self, size: int = exporter.CHUNK_SIZE):
+        start = 0
+        while True:
+            rows = self.request("history", month=None, oldest_first=True, start=start, stop=start + size)["rows"]
+            if not rows:
+                return
+            yield [(date.fromordinal(r["day"]), r["category_id"], r["category"], r["desc"], r["amount"])
+                   for r in rows]
+            start += len(rows)
+
+    # the files are written here, from rows the daemon sends; it never writes where a window asks
+    def export_transactions(self, path: str, fmt: str | None = None) -> exporter.ExportResult:
+        return exporter.write(path, exporter.TRANSACTION_COLUMNS, self._oldest_first(), fmt)
+
+    def export_summary(self, path: str, fmt: str | None = None) -> exporter.ExportResult:
+        reply = self.request("all_month_totals")
+        months = ((month, {int(k): v for k, v in totals.items()}) for month, totals in reply["months"])
+        names = {int(k): v for k, v in reply["names"].items()}
+        return exporter.export_summary(path, months, self.categories, names, fmt)
+
+    def export_for_mysql(self):
+        return {"income": self.income,
+                "categories": [dict(c, spent=self.categories.get(c["id"]).spent)
+                               for c in categories_json(self.categories)],
+                "transactions": self.transactions}
+
+    def close(self):
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+        self.sock.close()
+
+
+class RemoteTransactions:
+    """Newest-first transactions (all, or one month's) read from the daemon on demand"""
+
+    def __init__(self, budget: SharedBudget, month: int | None):
+        self.budget = budget
+        self.month = month
+
+    def __len__(self):
+        return self.budget.request("count", month=self.month)["count"]
+
+    def __bool__(self):
+        return len(self) > 0
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            rows = self.budget.request("history", month=self.month, start=start, stop=stop)["rows"]
+            for r in rows:
+                r["date"] = date.fromordinal(r.pop("day"))
+            return rows[::step]
+        n = len(self)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("transaction index out of range")
+        return self[index:index + 1][0]
+
+
+def handshake(sock: socket.socket, token: str, path: str, defaults: Iterable[Category] = ()):
+    """Say hello and return (reader, reply) within HANDSHAKE_TIMEOUT.
+
+    Raises OSError or ValueError if the other end is not a budget daemon."""
+    sock.settimeout(HANDSHAKE_TIMEOUT)
+    hello = {"op": "hello", "id": 0, "protocol": PROTOCOL, "token": token, "path": os.path.abspath(path),
+             "month": current_month(), "defaults": categories_json(defaults)}
+    sock.sendall((json.dumps(hello) + "\n").encode("utf-8"))
+    file = sock.makefile("rb")
+    reply = json.loads(file.readline())
+    if not isinstance(reply, dict) or reply.get("reply") != 0:
+        raise ValueError("not a budget daemon")
+    if "error" in reply:
+        raise BudgetError(reply["error"])
+    if reply.get("protocol") != PROTOCOL:
+        raise ValueError("not a budget daemon")
+    sock.settimeout(None)
+    return file, reply
+
+
+def attach(path: str, defaults: Iterable[Category] = (), alerts: AlertEngine | None = None) -> SharedBudget:
+    """Attach to the daemon for `path`, starting it if needed.
+
+    Raises BudgetError if the file is open without a daemon or no daemon answers."""
+    deadline = time.monotonic() + START_TIMEOUT
+    daemon = None
+    while True:
+        info = read_rendezvous(path)
+        if info is not None:
+            sock = None
+            try:
+                sock = socket.create_connection(("127.0.0.1", info["port"]), timeout=HANDSHAKE_TIMEOUT)
+                file, hello = handshake(sock, info["token"], path, defaults)
+                return SharedBudget(sock, file, hello, alerts)
+            except (OSError, ValueError):
+                # a stale file: that daemon has exited, and the port may be someone else's now
+                if sock is not None:
+                    sock.close()
+            except BudgetError:
+                sock.close()
+                raise
+        if daemon is None:
+            daemon = start_daemon(path)
+        elif daemon.poll() not in (None, LOCKED_EXIT):
+            raise BudgetError("The budget daemon could not start.")
+        if time.monotonic() > deadline:
+            if daemon.poll() == LOCKED_EXIT:
+                # the lock is held, and not by a daemon that would have answered
+                raise BudgetError(f"{os.path.basename(path)} is already open in another window or program.")
+            raise BudgetError("The budget daemon did not answer.")
+        time.sleep(0.05)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Single-writer state daemon for one budget file.")
+    parser.add_argument("--storage", required=True)
+    args = parser.parse_args(argv)
+    deadline = time.monotonic() + LOCK_WAIT
+    while True:
+        try:
+            daemon = StateDaemon(args.storage)
+            break
+        except StorageLocked:
+            if time.monotonic() > deadline:
+                sys.exit(LOCKED_EXIT)
+            time.sleep(0.1)
+    asyncio.run(daemon.serve())
+
+
+if __name__ == "__main__":
+    main()
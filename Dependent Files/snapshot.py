@@ -0,0 +1,416 @@
+# snapshot.py
+# Binary snapshot format for the journal (Saved_Data.DAT).
+# The snapshot is opened with mmap instead of being unpickled: opening it
+# reads the header, the category table and the month index, and transaction
+# records are paged in by the OS only when a row is looked at, so startup no
+# longer grows with the history and loading the file never runs code.
+#
+# Layout (little-endian, offsets in bytes from the start of the file):
+#
+#   header        HEADER, at offset 0
+#   categories    n_categories CATEGORY records (current ones first, in order,
+#                 then ids that only old transactions still refer to)
+#   transactions  n_transactions TRANSACTION records, oldest first
+#   months        n_months MONTH records, ascending
+#   positions     int64 transaction positions, grouped by month
+#   totals        TOTAL records (category id, spent), grouped by month
+#   heap          UTF-8 names, colours and descriptions addressed by (offset, length)
+#
+#   python snapshot.py [Saved_Data.DAT ...]
+# migrates pickle snapshots in place (by default the root and Dependent Files/ copies).
+
+from __future__ import annotations
+import mmap
+import os
+from bisect import bisect_left
+import struct
+import sys
+from array import array
+from datetime import date
+from typing import Dict, Iterator, Optional
+
+from txstore import MonthView, TransactionStore
+from periods import month_of
+
+MAGIC = b"BUDGSNAP"
+VERSION = 1
+
+HEADER = struct.Struct("<8sHHIdQQQQQQQQQQQQ")
+# id, still in the budget, limit, name offset/length, colour offset/length
+CATEGORY = struct.Struct("<iB3xdQIQI")
+# amount, category id, day ordinal, description offset/length
+TRANSACTION = struct.Struct("<diiQI4x")
+# month key, first position, position count, first total, total count
+MONTH = struct.Struct("<i4xQQQQ")
+TOTAL = struct.Struct("<id")
+POSITION = struct.Struct("<q")
+
+
+class SnapshotError(ValueError):
+    """The file is not a snapshot this version can read"""
+
+
+def is_snapshot(path: str) -> bool:
+    with open(path, "rb") as file:
+        return file.read(len(MAGIC)) == MAGIC
+
+
+class SnapshotReader:
+    """A snapshot file mapped into memory; rows are decoded on demand"""
+
+    def __init__(self, path: str):
+        self.file = open(path, "rb")
+        try:
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise SnapshotError(f"{path} is empty")
+        if self.map.size() < HEADER.size:
+            self.close()
+            raise SnapshotError(f"{path} is truncated")
+        (magic, version, header_size, _, self.income, self.journal_seq, self.next_category_id,
+         self.n_categories, self.n_transactions, self.n_months, self.cat_off, self.tx_off,
+         self.month_off, self.pos_off, self.tot_off, self.heap_off, heap_size) = HEADER.unpack_from(self.map)
+        if magic != MAGIC:
+            self.close()
+            raise SnapshotError(f"{path} is not a budget snapshot")
+        if version > VERSION:
+            self.close()
+            raise SnapshotError(f"{path} was written by a newer version (format {version})")
+        if self.heap_off + heap_size > self.map.size():
+            self.close()
+            raise SnapshotError(f"{path} is truncated")
+
+    def text(self, offset: int, length: int) -> str:
+        start = self.heap_off + offset
+        return self.map[start:start + length].decode("utf-8")
+
+    def categories(self):
+        """([current category dicts in order], {id: name} for every id in the file)"""
+        current, names = [], {}
+        for k in range(self.n_categories):
+            cid, active, limit, name_off, name_len, color_off, color_len = \
+                CATEGORY.unpack_from(self.map, self.cat_off + k * CATEGORY.size)
+            name = names[cid] = self.text(name_off, name_len)
+            if active:
+                current.append({"id": cid, "name": name, "limit": limit,
+                                "color": self.text(color_off, color_len)})
+        return current, names
+
+    def months(self):
+        """({month: positions}, {month: {category id: spent}}); positions are read from the map"""
+        positions, totals = {}, {}
+        for k in range(self.n_months):
+            month, pos_start, pos_count, tot_start, tot_count = \
+                MONTH.unpack_from(self.map, self.month_off + k * MONTH.size)
+            positions[month] = MappedPositions(self, self.pos_off + pos_start * POSITION.size, pos_count)
+            totals[month] = dict(TOTAL.unpack_from(self.map, self.tot_off + (tot_start + j) * TOTAL.size)
+                                 for j in range(tot_count))
+        return positions, totals
+
+    def record(self, i: int):
+        return TRANSACTION.unpack_from(self.map, self.tx_off + i * TRANSACTION.size)
+
+    def records(self, count: int) -> Iterator[tuple]:
+        """The first `count` transaction records, oldest first, unpacked a chunk at a time"""
+        step = 4096
+        for first in range(0, count, step):
+            start = self.tx_off + first * TRANSACTION.size
+            stop = self.tx_off + min(count, first + step) * TRANSACTION.size
+            yield from TRANSACTION.iter_unpack(self.map[start:stop])
+
+    def raw_rows(self, count: int) -> Iterator[tuple]:
+        for amount, cid, day, desc_off, desc_len in self.records(count):
+            start = self.heap_off + desc_off
+            yield amount, cid, day, self.map[start:start + desc_len]
+
+    def close(self):
+        if getattr(self, "map", None) is not None:
+            self.map.close()
+            self.map = None
+        self.file.close()
+
+
+class MappedPositions:
+    """One month's transaction positions, read from the map as they are indexed"""
+
+    def __init__(self, reader: SnapshotReader, offset: int, count: int):
+        self.reader = reader
+        self.offset = offset
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, k: int) -> int:
+        if k < 0:
+            k += self.count
+        if not 0 <= k < self.count:
+            raise IndexError("position index out of range")
+        return POSITION.unpack_from(self.reader.map, self.offset + k * POSITION.size)[0]
+
+    def __iter__(self):
+        start = self.offset
+        for (pos,) in POSITION.iter_unpack(self.reader.map[start:start + self.count * POSITION.size]):
+            yield pos
+
+
+class MappedStore(TransactionStore):
+    """TransactionStore whose older rows live in a mapped snapshot.
+
+    Rows appended since the snapshot are kept in the inherited columns;
+    positions count the mapped rows first, so the store reads like one
+    history. After a compaction remap() moves it onto the new snapshot, or,
+    when the snapshot was written in the background from a frozen() copy,
+    rebase() does while keeping the rows added since."""
+
+    def __init__(self, reader: Optional[SnapshotReader] = None):
+        super().__init__()
+        self.reader = None
+        self.base_n = 0
+        self.base_months: Dict[int, object] = {}
+        self.low_water = 0      # fewest rows held since the last frozen()
+        if reader is not None:
+            self._attach(reader)
+
+    def _attach(self, reader: SnapshotReader):
+        TransactionStore.__init__(self)     # nothing appended yet
+        self.reader = reader
+        self.base_n = reader.n_transactions
+        _, self.names = reader.categories()
+        self.base_months, self.month_totals = reader.months()
+
+    def remap(self, path: str):
+        """Drop the rows held in memory and read everything from the snapshot at `path`"""
+        self.close()
+        self._attach(SnapshotReader(path))
+
+    def frozen(self) -> "MappedStore":
+        """A copy that later changes to this store do not affect, for writing a snapshot.
+
+        It shares the (read-only) map and copies only the rows held in memory,
+        and must not be closed."""
+        copy = MappedStore()
+        copy.reader, copy.base_n = self.reader, self.base_n
+        copy.base_months = {m: MappedPositions(p.reader, p.offset, p.count) for m, p in self.base_months.items()}
+        copy.amounts, copy.cat_ids, copy.days = self.amounts[:], self.cat_ids[:], self.days[:]
+        copy.desc_ends, copy.desc_pool = self.desc_ends[:], bytearray(self.desc_pool)
+        copy.names = dict(self.names)
+        copy.months = {m: rows[:] for m, rows in self.months.items()}
+        copy.month_totals = {m: dict(totals) for m, totals in self.month_totals.items()}
+        self.low_water = len(self)
+        return copy
+
+    def rebase(self, path: str, tmp_path: str, count: int):
+        """Replace `path` with `tmp_path`, a snapshot of a frozen() copy holding `count` rows, and read from it.
+
+        Rows this store added, or replaced after an undo, since the copy are
+        kept in memory; totals and names stay as they are now."""
+        keep = min(count, self.low_water)
+        names, totals = self.names, self.month_totals
+        if keep < self.base_n:
+            # an undo dropped mapped rows during the compaction: re-add what follows row by row
+            kept = [self.row(i) for i in range(keep, len(self))]
+            columns = months = None
+        else:
+            # the rows to keep are all in memory; positions do not change, so their months are slices
+            first = keep - self.base_n
+            start = self.desc_ends[first - 1] if first else 0
+            columns = (self.amounts[first:], self.cat_ids[first:], self.days[first:],
+                       array("q", [end - start for end in self.desc_ends[first:]]), self.desc_pool[start:])
+            months = {m: rows[bisect_left(rows, keep):] for m, rows in self.months.items()}
+        self.close()
+        os.replace(tmp_path, path)
+        self._attach(SnapshotReader(path))
+        for positions in self.base_months.values():
+            # positions ascend, so the rows past `keep` are each month's last ones
+            while positions.count and positions[positions.count - 1] >= keep:
+                positions.count -= 1
+        self.base_n = keep
+        if columns is None:
+            for row in kept:
+                self.append(row["category_id"], row["desc"], row["amount"], row["date"].toordinal())
+        else:
+            self.amounts, self.cat_ids, self.days, self.desc_ends, self.desc_pool = columns
+            self.months = {m: rows for m, rows in months.items() if rows}
+        # totals were kept up to date all along; the snapshot's may be older
+        self.names, self.month_totals = names, totals
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+    def __len__(self):
+        return self.base_n + len(self.amounts)
+
+    def truncate(self, count: int):
+        """Drop the newest transactions so that `count` remain.
+
+        Mapped rows past `count` are simply no longer counted; the file is
+        rewritten at the next compaction."""
+        TransactionStore.truncate(self, max(0, count - self.base_n))
+        for i in range(self.base_n - 1, count - 1, -1):
+            amount, cid, day, _, _ = self.reader.record(i)
+            month = month_of(day)
+            # a month's positions ascend, so the dropped rows are its last ones
+            self.base_months[month].count -= 1
+            totals = self.month_totals[month]
+            totals[cid] = totals.get(cid, 0.0) - amount
+        self.base_n = min(self.base_n, count)
+        self.low_water = min(self.low_water, count)
+
+    def _index(self, i: int):
+        month = month_of(self.days[i])
+        rows = self.months.get(month)
+        if rows is None:
+            rows = self.months[month] = array("q")
+        rows.append(self.base_n + i)
+        totals = self.month_totals.setdefault(month, {})
+        cid = self.cat_ids[i]
+        totals[cid] = totals.get(cid, 0.0) + self.amounts[i]
+
+    def row(self, i: int) -> Dict:
+        if i >= self.base_n:
+            return super().row(i - self.base_n)
+        amount, cid, day, desc_off, desc_len = self.reader.record(i)
+        return {"category": self.names.get(cid, ""),
+                "category_id": cid,
+                "desc": self.reader.text(desc_off, desc_len),
+                "amount": amount,
+                "date": date.fromordinal(day)}
+
+    def raw_rows(self) -> Iterator[tuple]:
+        if self.reader is not None:
+            yield from self.reader.raw_rows(self.base_n)
+        yield from super().raw_rows()
+
+    def month_rows(self, month: int):
+        base = self.base_months.get(month)
+        tail = self.months.get(month)
+        if tail is None:
+            return base if base is not None else array("q")
+        return array("q", base) + tail if base is not None else tail
+
+    def month_view(self, month: int) -> MonthView:
+        return MonthView(self, self.month_rows(month))
+
+    def columns(self):
+        """(amounts, category ids, days) as NumPy arrays, oldest first; needs numpy.
+
+        The mapped records are read as one strided array instead of being
+        unpacked row by row. The result is a copy, so the map can be closed."""
+        import numpy as np
+        amounts, cat_ids, days = [self.amounts], [self.cat_ids], [self.days]
+        if self.reader is not None and self.base_n:
+            # the amount, category id and day fields of TRANSACTION
+            record = np.dtype({"names": ["amount", "category_id", "day"], "formats": ["<f8", "<i4", "<i4"],
+                               "offsets": [0, 8, 12], "itemsize": TRANSACTION.size})
+            base = np.frombuffer(self.reader.map, dtype=record, count=self.base_n, offset=self.reader.tx_off)
+            amounts.insert(0, base["amount"])
+            cat_ids.insert(0, base["category_id"])
+            days.insert(0, base["day"])
+        return (np.concatenate(amounts).astype(np.float64, copy=False),
+                np.concatenate(cat_ids).astype(np.int32, copy=False),
+                np.concatenate(days).astype(np.int32, copy=False))
+
+    def category_totals(self) -> Dict[int, float]:
+        sums = TransactionStore.category_totals(self)
+        if self.reader is not None:
+            for amount, cid, _, _, _ in self.reader.records(self.base_n):
+                sums[cid] = sums.get(cid, 0.0) + amount
+        return sums
+
+
+# ---------- reading and writing whole snapshots ----------
+def load(path: str) -> Dict:
+    """Open a snapshot: {"income", "categories", "next_category_id", "journal_seq", "transactions"}"""
+    reader = SnapshotReader(path)
+    categories, _ = reader.categories()
+    return {"income": reader.income,
+            "categories": categories,
+            "next_category_id": reader.next_category_id,
+            "journal_seq": reader.journal_seq,
+            "transactions": MappedStore(reader)}
+
+
+def write(path: str, data: Dict):
+    """Write `data` (as passed to Journal.compact) as a snapshot at `path`"""
+    store = data.get("transactions") or TransactionStore()
+    heap = bytearray()
+
+    def put(text) -> tuple:
+        raw = text.encode("utf-8") if isinstance(text, str) else text
+        heap.extend(raw)
+        return len(heap) - len(raw), len(raw)
+
+    categories = list(data.get("categories", []))
+    current = {c["id"] for c in categories}
+    old = [(cid, name) for cid, name in store.names.items() if cid not in current]
+    months = sorted(store.month_totals.keys() | store.months.keys() | getattr(store, "base_months", {}).keys())
+    n = len(store)
+
+    cat_off = HEADER.size
+    tx_off = cat_off + (len(categories) + len(old)) * CATEGORY.size
+    month_off = tx_off + n * TRANSACTION.size
+    pos_off = month_off + len(months) * MONTH.size
+
+    with open(path, "wb") as file:
+        file.seek(cat_off)
+        for c in categories:
+            file.write(CATEGORY.pack(c["id"], 1, c["limit"], *put(c["name"]), *put(c["color"])))
+        for cid, name in old:
+            file.write(CATEGORY.pack(cid, 0, 0.0, *put(name), 0, 0))
+        for amount, cid, day, desc in store.raw_rows():
+            file.write(TRANSACTION.pack(amount, cid, day, *put(desc)))
+
+        month_recs, n_pos, totals = [], 0, []
+        for month in months:
+            rows = store.month_rows(month)
+            month_totals = store.month_totals.get(month, {})
+            month_recs.append(MONTH.pack(month, n_pos, len(rows), len(totals), len(month_totals)))
+            n_pos += len(rows)
+            totals.extend(month_totals.items())
+        file.writelines(month_recs)
+        for month in months:
+            file.writelines(POSITION.pack(p) for p in store.month_rows(month))
+        tot_off = pos_off + n_pos * POSITION.size
+        file.writelines(TOTAL.pack(cid, total) for cid, total in totals)
+        heap_off = tot_off + len(totals) * TOTAL.size
+        file.write(heap)
+
+        file.seek(0)
+        file.write(HEADER.pack(MAGIC, VERSION, HEADER.size, 0, data.get("income", 0.0),
+                               data.get("journal_seq", 0), data.get("next_category_id", 1),
+                               len(categories) + len(old), n, len(months),
+                               cat_off, tx_off, month_off, pos_off, tot_off, heap_off, len(heap)))
+        file.flush()
+        os.fsync(file.fileno())
+
+
+# ---------- migration ----------
+def migrate(path: str) -> bool:
+    """Convert a pickle snapshot (and its journal) to this format; False if nothing to do"""
+    if not os.path.exists(path) or is_snapshot(path):
+        return False
+    from storage import JournalStorage
+    storage = JournalStorage(path)
+    # loading a pickle snapshot rewrites it in this format
+    storage.load()
+    storage.close()
+    return is_snapshot(path)
+
+
+def main(argv=None):
+    here = os.path.dirname(os.path.abspath(__file__))
+    paths = argv if argv else [os.path.join(os.path.dirname(here), "Saved_Data.DAT"),
+                               os.path.join(here, "Saved_Data.DAT")]
+    for path in paths:
+        if migrate(path):
+            print(f"{path}: migrated")
+        else:
+            print(f"{path}: nothing to migrate")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
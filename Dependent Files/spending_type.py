@@ -1,37 +1,62 @@
+import budget_engine
+
 class spending_type:
+    # A spending category for scripts. The numbers live in a budget_engine.Category;
+    # once the category is added to a budget, changes go through that budget's engine.
+    __slots__ = ("category", "entry", "engine")
+
     def __init__(self, name, category, amount):
-        self.name = name
         self.category = category
-        self.amount = amount
-        self.budget_used = 0
+        self.entry = budget_engine.Category(name, amount)
+        self.engine = None
+
+    @property
+    def name(self):
+        return self.entry.name
+
+    @property
+    def amount(self):
+        return self.entry.limit
+
+    @property
+    def budget_used(self):
+        return self.entry.spent
 
     def get_name(self):
-        return self.name
+        return self.entry.name
 
     def get_category(self):
         return self.category
 
     def get_amount(self):
-        return self.amount
+        return self.entry.limit
 
     def set_name(self, name):
-        self.name = name
+        if self.engine is None:
+            self.entry.name = name
+        else:
+            self.engine.rename_category(self.entry, name)
 
     def set_category(self, category):
         self.category = category
 
     def set_amount(self, amount):
-        self.amount = amount
+        if self.engine is None:
+            self.entry.limit = amount
+        else:
+            self.engine.apply([("allocate", self.entry.id, amount)])
 
     def get_budget_used(self):
-        return self.budget_used
+        return self.entry.spent
     
-    # Adds the money spent in a transaction in this spending category to the budget_used variable, prints in console if spent money exceeds amount
+    # Adds the money spent in a transaction in this spending category to the budget_used variable;
+    # once the category is in a budget, going over its amount raises an alert on budget.alerts
     def spend(self, spent):
-        self.budget_used += spent
-        if self.budget_used > self.amount:
-            print("You have spent more than your budget!")
+        if self.engine is None:
+            self.entry.spent += spent
+        else:
+            self.engine.spend(self.entry.id, spent, self.category)
     
     # Returns a percentage of how much of the total budget has been spent
     def calculate_budget_percentage(self):
-        return (self.budget_used / self.amount) * 100    
\ No newline at end of file
+        return (self.entry.spent / self.entry.limit) * 100
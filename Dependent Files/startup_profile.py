@@ -0,0 +1,45 @@
+# startup_profile.py
+# Phase timings for BudgetApp's startup.
+# Set BUDGET_PROFILE_STARTUP=1 to print how long each phase took (loading
+# storage, building state, styles, page construction, first refresh) and
+# the time to first paint. When disabled, phase() costs one attribute check.
+
+from __future__ import annotations
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import List, Tuple
+
+ENV_VAR = "BUDGET_PROFILE_STARTUP"
+
+
+class StartupProfile:
+    def __init__(self, enabled: bool | None = None):
+        self.enabled = os.environ.get(ENV_VAR) == "1" if enabled is None else enabled
+        self.start = time.perf_counter()
+        self.phases: List[Tuple[str, float]] = []
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - t0))
+
+    def report(self, file=None):
+        """Print the phases and the time since the profile started, then stop recording"""
+        if not self.enabled:
+            return
+        file = file or sys.stderr
+        total = time.perf_counter() - self.start
+        width = max((len(name) for name, _ in self.phases), default=0)
+        print("BudgetApp startup:", file=file)
+        for name, seconds in self.phases:
+            print(f"  {name:<{width}}  {seconds * 1000:8.1f} ms", file=file)
+        print(f"  {'first paint':<{width}}  {total * 1000:8.1f} ms (total)", file=file)
+        self.enabled = False
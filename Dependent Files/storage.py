@@ -0,0 +1,625 @@
+# storage.py
+# Storage backends for the budget app.
+# A backend persists the income, the categories, the dated transaction
+# history and per-month, per-category spending totals that are kept up to
+# date as transactions are added. BudgetApp only talks to the small interface
+# on Storage, so the journal and SQLite are interchangeable.
+
+from __future__ import annotations
+import os
+import pickle
+import sqlite3
+from datetime import date
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from journal import Journal, JournalError, SNAPSHOT_FILE, journal_path_for
+from periods import month_days, month_of, today
+from snapshot import MappedStore, SnapshotError, SnapshotReader
+from txstore import TransactionStore
+
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+
+
+class Storage:
+    """Interface shared by every storage backend.
+
+    Categories are identified by a stable integer id that BudgetApp assigns.
+    `transactions` is a newest-first sequence of
+    {"category", "category_id", "desc", "amount", "date"} dicts that supports
+    len() and slicing. Transaction days are date.toordinal() values and months
+    are periods.month_of() keys."""
+
+    transactions = ()
+    writer_lock = None      # the file's lock, held from open_storage until close()
+
+    def load(self) -> Optional[Dict]:
+        """Return {"income", "categories", "next_category_id", "transactions"}
+        or None if nothing is saved yet"""
+        raise NotImplementedError
+
+    def save_setup(self, income: float, categories: List[Dict]):
+        """Replace income and categories ({"id", "name", "limit", "color"} dicts)"""
+        raise NotImplementedError
+
+    def add_transaction(self, tx: Dict):
+        """Record {"category_id", "desc", "amount", "day"} and add it to that month's totals.
+
+        Raises UnknownCategory if the category is not in the saved setup."""
+        raise NotImplementedError
+
+    def add_transactions(self, txs: List[Dict]) -> int:
+        """Record a batch of transactions; backends commit it in one go (or none of it).
+
+        Returns how many rows were stored."""
+        for tx in txs:
+            self.add_transaction(tx)
+        return len(txs)
+
+    def truncate_transactions(self, count: int):
+        """Delete the newest transactions so that `count` remain, and take them out of the totals"""
+        raise NotImplementedError
+
+    def month_totals(self, month: int) -> Dict[int, float]:
+        """Spending per category id in one month, from the precomputed aggregates"""
+        raise NotImplementedError
+
+    def month_transactions(self, month: int):
+        """Newest-first sequence of one month's transactions"""
+        raise NotImplementedError
+
+    def set_month_totals(self, month: int, totals: Dict[int, float]):
+        """Overwrite the aggregates of the given category ids for one month"""
+        raise NotImplementedError
+
+    def all_month_totals(self) -> Iterator[Tuple[int, Dict[int, float]]]:
+        """(month, spending per category id) for every month with aggregates, oldest first"""
+        raise NotImplementedError
+
+    def category_names(self) -> Dict[int, str]:
+        """Names of every category id the history refers to, removed categories included"""
+        raise NotImplementedError
+
+    def flush(self):
+        """Wait until everything recorded so far is on disk"""
+
+    def close(self):
+        self._unlock()
+
+    def _unlock(self):
+        if self.writer_lock is not None:
+            self.writer_lock.close()
+            self.writer_lock = None
+
+
+class StorageLocked(OSError):
+    """The budget file is already open for writing elsewhere"""
+
+
+class UnknownCategory(ValueError):
+    """A transaction refers to a category that is not in the saved setup"""
+
+
+def check_categories(txs: List[Dict], known):
+    for tx in txs:
+        if tx["category_id"] not in known:
+            raise UnknownCategory(f"No saved category with id {tx['category_id']}.")
+
+
+def lock_writer(path: str):
+    """Take the single-writer lock of a budget file and return the open lock file.
+
+    The lock is held until that file is closed or the process exits, so two
+    windows or processes never write the same journal or database."""
+    lock = open(path + ".lock", "a+b")
+    try:
+        if os.name == "nt":
+            import msvcrt
+            lock.seek(0)
+            msvcrt.locking(lock.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(lock.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        lock.close()
+        raise StorageLocked(f"{os.path.basename(path)} is already open in another window or program.") from None
+    return lock
+
+
+def open_storage(path: str = SNAPSHOT_FILE, legacy_snapshot: Optional[str] = SNAPSHOT_FILE) -> Storage:
+    """Pick a backend from the file name: SQLite for .db/.sqlite, the journal otherwise.
+
+    A new SQLite file starts with the data of `legacy_snapshot` if that
+    snapshot or its journal exists; pass None to start empty. Raises StorageLocked
+    if the file is already open; close() releases it."""
+    lock = lock_writer(path)
+    try:
+        storage = _open_backend(path, legacy_snapshot)
+    except BaseException:
+        lock.close()
+        raise
+    storage.writer_lock = lock
+    return storage
+
+
+def _open_backend(path: str, legacy_snapshot: Optional[str]) -> Storage:
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        storage = SQLiteStorage(path)
+        if storage.is_empty() and legacy_snapshot and (os.path.exists(legacy_snapshot)
+                                                       or os.path.exists(journal_path_for(legacy_snapshot))):
+            # first run on SQLite: bring the existing journal data across once
+            legacy = JournalStorage(legacy_snapshot)
+            data = legacy.load()
+            if data is not None:
+                storage.import_data(data)
+            legacy.close()
+        return storage
+    return JournalStorage(path)
+
+
+def assign_ids(categories: List[Dict], known: Dict[str, int], next_id: int) -> int:
+    """Give id-less category dicts (older saves) the id of a known name or a new one.
+
+    Returns the next unused id."""
+    for c in categories:
+        if c.get("id") is None:
+            c["id"] = known.get(c["name"]) or next_id
+        next_id = max(next_id, c["id"] + 1)
+    return next_id
+
+
+class JournalStorage(Storage):
+    """Keeps the state in memory and persists through an append-only journal.
+
+    Transactions from the snapshot stay in the mapped file; only the ones
+    added since the last compaction are held in memory. Journal writes and
+    compactions happen on the journal's writer thread; close() (or flush())
+    waits for them."""
+
+    def __init__(self, path: str = SNAPSHOT_FILE):
+        self.journal = Journal(path)
+        self.income = 0.0
+        self.categories: Dict[int, Dict] = {}
+        self.next_id = 1
+        self.transactions = MappedStore()
+
+    def load(self) -> Optional[Dict]:
+        try:
+            data, records = self.journal.load()
+        except (OSError, pickle.UnpicklingError, EOFError, SnapshotError, JournalError):
+            data, records = None, []
+        if data is None and not records:
+            return None
+        if data is not None:
+            self.income = data.get("income", 0.0)
+            cats = [dict(c) for c in data.get("categories", [])]
+            self.next_id = assign_ids(cats, {}, data.get("next_category_id", 1))
+            self.categories = {c["id"]: c for c in cats}
+            txs = data.get("transactions", [])
+            if isinstance(txs, TransactionStore):
+                self.transactions = txs
+            else:
+                # older snapshots hold a newest-first list of name-keyed dicts
+                ids = {c["name"]: c["id"] for c in cats}
+                self.transactions = TransactionStore.from_dicts(txs, ids)
+                self.next_id = max([self.next_id] + [cid + 1 for cid in ids.values()])
+        for rec in records:
+            if rec["op"] == "setup":
+                self._apply_setup(rec["income"], rec["categories"])
+            elif rec["op"] == "transaction":
+                self._apply_transaction(rec)
+            elif rec["op"] == "month_totals":
+                self._apply_month_totals(rec["month"], rec["totals"])
+            elif rec["op"] == "truncate":
+                self.transactions.truncate(rec["count"])
+            elif rec["op"] == "transactions":
+                for row in rec["rows"]:
+                    # rows written before dates were (category_id, desc, amount)
+                    cid, desc, amount = row[:3]
+                    day = row[3] if len(row) > 3 else today()
+                    self._apply_transaction({"category_id": cid, "desc": desc, "amount": amount, "day": day})
+        if not isinstance(self.transactions, MappedStore):
+            # a pickle snapshot: rewrite it in the binary format once and map that
+            self._compact()
+            self.transactions = MappedStore(SnapshotReader(self.journal.snapshot_path))
+        elif self.journal.legacy:
+            # a pickle journal: fold it into the snapshot so only the binary format is appended
+            self._compact()
+        return {"income": self.income,
+                "categories": [{k: c[k] for k in ("id", "name", "limit", "color")}
+                               for c in self.categories.values()],
+                "next_category_id": self.next_id,
+                "transactions": self.transactions}
+
+    def save_setup(self, income: float, categories: List[Dict]):
+        self._apply_setup(income, categories)
+        self._record({"op": "setup", "income": income,
+                      "categories": [{"id": c["id"], "name": c["name"], "limit": c["limit"], "color": c["color"]}
+                                     for c in categories]})
+
+    def add_transaction(self, tx: Dict):
+        check_categories([tx], self.categories)
+        self._apply_transaction(tx)
+        self._record({"op": "transaction", "category_id": tx["category_id"],
+                      "desc": tx["desc"], "amount": tx["amount"], "day": tx["day"]})
+
+    def add_transactions(self, txs: List[Dict]) -> int:
+        if not txs:
+            return 0
+        check_categories(txs, self.categories)
+        for tx in txs:
+            self._apply_transaction(tx)
+        self._record({"op": "transactions",
+                      "rows": [(tx["category_id"], tx["desc"], tx["amount"], tx["day"]) for tx in txs]},
+                     len(txs))
+        return len(txs)
+
+    def truncate_transactions(self, count: int):
+        if count >= len(self.transactions):
+            return
+        self.transactions.truncate(count)
+        self._record({"op": "truncate", "count": count})
+
+    def month_totals(self, month: int) -> Dict[int, float]:
+        return dict(self.transactions.month_totals.get(month, {}))
+
+    def month_transactions(self, month: int):
+        return self.transactions.month_view(month)
+
+    def set_month_totals(self, month: int, totals: Dict[int, float]):
+        self._apply_month_totals(month, totals)
+        self._record({"op": "month_totals", "month": month, "totals": dict(totals)})
+
+    def all_month_totals(self) -> Iterator[Tuple[int, Dict[int, float]]]:
+        totals = self.transactions.month_totals
+        for month in sorted(totals):
+            yield month, dict(totals[month])
+
+    def category_names(self) -> Dict[int, str]:
+        return dict(self.transactions.names)
+
+    def _apply_month_totals(self, month: int, totals: Dict[int, float]):
+        self.transactions.month_totals.setdefault(month, {}).update(totals)
+
+    def _apply_setup(self, income: float, categories: List[Dict]):
+        self.income = income
+        known = {c["name"]: cid for cid, c in self.categories.items()}
+        categories = [dict(c) for c in categories]
+        self.next_id = assign_ids(categories, known, self.next_id)
+        self.categories = {}
+        for c in categories:
+            self.categories[c["id"]] = {"id": c["id"], "name": c["name"], "limit": c["limit"], "color": c["color"]}
+            self.transactions.names[c["id"]] = c["name"]
+
+    def _apply_transaction(self, rec: Dict):
+        cid = rec.get("category_id")
+        if cid is None:
+            # journals written before category ids referenced the name
+            cid = next((i for i, c in self.categories.items() if c["name"] == rec["category"]), None)
+        if cid not in self.categories:
+            return      # only replayed records get here: old journals could name deleted categories
+        # journals written before dates have no "day"
+        self.transactions.append(cid, rec["desc"], rec["amount"], rec.get("day") or today())
+
+    def _record(self, rec: Dict, rows: int = 1):
+        self.journal.append(rec, rows)
+        if self.journal.needs_compaction():
+            self._compact(background=self.journal.write_behind)
+
+    def _compact(self, background: bool = False):
+        data = {"income": self.income,
+                "categories": list(self.categories.values()),
+                "next_category_id": self.next_id,
+                "transactions": self.transactions}
+        if background:
+            self.journal.compact_behind(data)
+        else:
+            self.journal.compact(data)
+
+    def flush(self):
+        self.journal.flush()
+
+    def close(self):
+        try:
+            self.journal.close()
+        finally:
+            self.transactions.close()
+            self._unlock()
+
+
+class MemoryStorage(JournalStorage):
+    """JournalStorage without the journal: nothing is read or written.
+
+    For scripts and batch jobs that only need the in-memory model."""
+
+    def __init__(self):
+        super().__init__()
+        self.journal = None
+
+    def load(self) -> Optional[Dict]:
+        return None
+
+    def _record(self, rec: Dict, rows: int = 1):
+        pass
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+ROW_QUERY = ('SELECT c.name, t.category_id, t."desc", t.amount, t.day FROM transactions t '
+             "JOIN categories c ON c.id = t.category_id ")
+
+
+def row_dict(row) -> Dict:
+    name, cid, desc, amount, day = row
+    return {"category": name, "category_id": cid, "desc": desc, "amount": amount, "date": date.fromordinal(day)}
+
+
+class SQLiteTransactions:
+    """Newest-first view over the transactions table; only the requested rows are read.
+
+    Transaction ids are dense (1..n, never deleted), so position i from the
+    newest maps straight to id n - i and every slice is an index range scan."""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.count = conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+    def __len__(self):
+        return self.count
+
+    def __bool__(self):
+        return self.count > 0
+
+    def __iter__(self):
+        step = 256
+        for start in range(0, self.count, step):
+            yield from self[start:start + step]
+
+    def raw_rows(self):
+        """(amount, category id, day, UTF-8 description) per transaction, oldest first"""
+        cur = self.conn.execute('SELECT amount, category_id, day, CAST("desc" AS BLOB) FROM transactions '
+                                "WHERE id <= ? ORDER BY id", (self.count,))
+        while True:
+            rows = cur.fetchmany(65536)
+            if not rows:
+                return
+            yield from rows
+
+    def columns(self):
+        """(amounts, category ids, days) as NumPy arrays, oldest first; needs numpy.
+
+        One query fills a record array straight from the cursor."""
+        import numpy as np
+        cur = self.conn.execute("SELECT amount, category_id, day FROM transactions WHERE id <= ? ORDER BY id",
+                                (self.count,))
+        rows = np.fromiter(cur, dtype=[("amount", np.float64), ("category_id", np.int32), ("day", np.int32)],
+                           count=self.count)
+        return rows["amount"], rows["category_id"], rows["day"]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if step != 1:
+                return self[start:stop][::step] if start < stop else []
+            if start >= stop:
+                return []
+            rows = self.conn.execute(
+                ROW_QUERY + "WHERE t.id <= ? AND t.id > ? ORDER BY t.id DESC",
+                (self.count - start, self.count - stop)).fetchall()
+            return [row_dict(r) for r in rows]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("transaction index out of range")
+        return self[index:index + 1][0]
+
+
+class SQLiteMonthView:
+    """Newest-first view over one month's transactions, read through the day index"""
+
+    def __init__(self, conn: sqlite3.Connection, month: int):
+        self.conn = conn
+        self.first, self.last = month_days(month)
+        self.count = conn.execute("SELECT COUNT(*) FROM transactions WHERE day BETWEEN ? AND ?",
+                                  (self.first, self.last)).fetchone()[0]
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self.count)
+            if start >= stop:
+                return []
+            rows = self.conn.execute(
+                ROW_QUERY + "WHERE t.day BETWEEN ? AND ? ORDER BY t.id DESC LIMIT ? OFFSET ?",
+                (self.first, self.last, stop - start, start)).fetchall()
+            return [row_dict(r) for r in rows][::step]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("transaction index out of range")
+        return self[index:index + 1][0]
+
+
+class SQLiteStorage(Storage):
+    """SQLite in WAL mode; monthly category totals are kept in the month_totals table"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value
+        );
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            "limit" REAL NOT NULL DEFAULT 0,
+            color TEXT NOT NULL,
+            position INTEGER            -- NULL once removed from the budget
+        );
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY,     -- insertion order
+            category_id INTEGER NOT NULL REFERENCES categories(id),
+            "desc" TEXT NOT NULL,
+            amount REAL NOT NULL,
+            day INTEGER NOT NULL        -- date.toordinal()
+        );
+        CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions(category_id, id);
+        CREATE TABLE IF NOT EXISTS month_totals (
+            month INTEGER NOT NULL,     -- periods.month_of(day)
+            category_id INTEGER NOT NULL,
+            total REAL NOT NULL,
+            PRIMARY KEY (month, category_id)
+        ) WITHOUT ROWID;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self._migrate()
+        self.conn.executescript(self.SCHEMA)
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_transactions_day ON transactions(day)")
+        self.conn.commit()
+        self.cat_ids = set()   # ids of the categories currently in the budget
+        self.transactions = SQLiteTransactions(self.conn)
+
+    def _migrate(self):
+        """Bring databases written before transactions had dates up to date"""
+        cols = [r[1] for r in self.conn.execute("PRAGMA table_info(transactions)")]
+        if not cols or "day" in cols:
+            return
+        with self.conn:
+            # undated rows are treated as made today
+            self.conn.execute(f"ALTER TABLE transactions ADD COLUMN day INTEGER NOT NULL DEFAULT {today()}")
+            self.conn.executescript(self.SCHEMA)
+            self._add_month_totals(self.conn.execute(
+                "SELECT day, category_id, SUM(amount) FROM transactions GROUP BY day, category_id"))
+
+    def _add_month_totals(self, rows):
+        """Fold (day, category_id, amount) rows into month_totals"""
+        totals: Dict[tuple, float] = {}
+        for day, cid, amount in rows:
+            key = (month_of(day), cid)
+            totals[key] = totals.get(key, 0.0) + amount
+        self.conn.executemany(
+            "INSERT INTO month_totals (month, category_id, total) VALUES (?, ?, ?) "
+            "ON CONFLICT(month, category_id) DO UPDATE SET total = total + excluded.total",
+            ((month, cid, total) for (month, cid), total in totals.items()))
+
+    def is_empty(self) -> bool:
+        return self.conn.execute("SELECT 1 FROM meta WHERE key = 'income'").fetchone() is None
+
+    def load(self) -> Optional[Dict]:
+        if self.is_empty():
+            return None
+        income = self.conn.execute("SELECT value FROM meta WHERE key = 'income'").fetchone()[0]
+        next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM categories").fetchone()[0]
+        rows = self.conn.execute(
+            'SELECT id, name, "limit", color FROM categories '
+            "WHERE position IS NOT NULL ORDER BY position").fetchall()
+        self.cat_ids = {cid for cid, _, _, _ in rows}
+        return {"income": income,
+                "categories": [{"id": cid, "name": name, "limit": limit, "color": color}
+                               for cid, name, limit, color in rows],
+                "next_category_id": next_id,
+                "transactions": self.transactions}
+
+    def save_setup(self, income: float, categories: List[Dict]):
+        with self.conn:
+            self._save_setup(income, categories)
+
+    def _save_setup(self, income: float, categories: List[Dict]):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('income', ?)", (income,))
+        kept = set()
+        for pos, c in enumerate(categories):
+            self.conn.execute(
+                'INSERT INTO categories (id, name, "limit", color, position) VALUES (?, ?, ?, ?, ?) '
+                'ON CONFLICT(id) DO UPDATE SET name = excluded.name, "limit" = excluded."limit", '
+                "color = excluded.color, position = excluded.position",
+                (c["id"], c["name"], c["limit"], c["color"], pos))
+            kept.add(c["id"])
+        # dropped categories keep their rows so old transactions still resolve
+        for cid in self.cat_ids - kept:
+            self.conn.execute("UPDATE categories SET position = NULL WHERE id = ?", (cid,))
+        self.cat_ids = kept
+
+    def add_transaction(self, tx: Dict):
+        self.add_transactions([tx])
+
+    def add_transactions(self, txs: List[Dict]) -> int:
+        if not txs:
+            return 0
+        check_categories(txs, self.cat_ids)
+        first = self.transactions.count + 1
+        with self.conn:
+            self.conn.executemany(
+                'INSERT INTO transactions (id, category_id, "desc", amount, day) VALUES (?, ?, ?, ?, ?)',
+                ((first + i, tx["category_id"], tx["desc"], tx["amount"], tx["day"]) for i, tx in enumerate(txs)))
+            self._add_month_totals((tx["day"], tx["category_id"], tx["amount"]) for tx in txs)
+        self.transactions.count += len(txs)
+        return len(txs)
+
+    def truncate_transactions(self, count: int):
+        if count >= self.transactions.count:
+            return
+        with self.conn:
+            self._add_month_totals(self.conn.execute(
+                "SELECT day, category_id, -amount FROM transactions WHERE id > ?", (count,)).fetchall())
+            self.conn.execute("DELETE FROM transactions WHERE id > ?", (count,))
+        self.transactions.count = count
+
+    def month_totals(self, month: int) -> Dict[int, float]:
+        return dict(self.conn.execute("SELECT category_id, total FROM month_totals WHERE month = ?", (month,)))
+
+    def month_transactions(self, month: int):
+        return SQLiteMonthView(self.conn, month)
+
+    def all_month_totals(self) -> Iterator[Tuple[int, Dict[int, float]]]:
+        rows = self.conn.execute("SELECT month, category_id, total FROM month_totals ORDER BY month")
+        for month, group in groupby(rows, key=lambda r: r[0]):
+            yield month, {cid: total for _, cid, total in group}
+
+    def category_names(self) -> Dict[int, str]:
+        return dict(self.conn.execute("SELECT id, name FROM categories"))
+
+    def set_month_totals(self, month: int, totals: Dict[int, float]):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO month_totals (month, category_id, total) VALUES (?, ?, ?)",
+                ((month, cid, total) for cid, total in totals.items()))
+
+    def import_data(self, data: Dict):
+        """Copy a loaded JournalStorage state into an empty database"""
+        seen = set()
+
+        def rows():
+            # the store is newest-first; ids must grow with age so walk it reversed
+            for i, tx in enumerate(reversed(data.get("transactions", [])), 1):
+                cid = tx["category_id"]
+                if cid not in seen:
+                    self.conn.execute(
+                        "INSERT INTO categories (id, name, color, position) VALUES (?, ?, ?, NULL)",
+                        (cid, tx["category"], "#22c55e"))
+                    seen.add(cid)
+                yield i, cid, tx["desc"], tx["amount"], tx["date"].toordinal()
+
+        with self.conn:
+            self._save_setup(data.get("income", 0.0), data.get("categories", []))
+            seen.update(self.cat_ids)
+            self.conn.executemany(
+                'INSERT INTO transactions (id, category_id, "desc", amount, day) VALUES (?, ?, ?, ?, ?)', rows())
+            self._add_month_totals(self.conn.execute(
+                "SELECT day, category_id, SUM(amount) FROM transactions GROUP BY day, category_id"))
+        self.transactions.count = self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM transactions").fetchone()[0]
+
+    def close(self):
+        try:
+            self.conn.close()
+        finally:
+            self._unlock()
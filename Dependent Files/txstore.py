@@ -0,0 +1,178 @@
+# txstore.py
+# Compact, column-oriented transaction history.
+# Amounts sit in a typed array, categories are stored by their integer id,
+# dates as day ordinals, and descriptions are packed into one UTF-8 string
+# pool addressed by end offsets. A transaction costs roughly 24 bytes plus its
+# description instead of a dict with boxed values.
+#
+# The store is also partitioned by month: each month keeps the positions of
+# its transactions and a per-category total that is updated on append, so a
+# month's spending is a dict lookup rather than a scan of the history.
+
+from __future__ import annotations
+from array import array
+from datetime import date
+from typing import Dict, Iterable, Iterator
+
+from periods import month_of, today
+
+
+class TransactionStore:
+    """Append-only transaction history with a newest-first view.
+
+    Indexing and slicing count from the most recent transaction and return
+    {"category", "category_id", "desc", "amount", "date"} dicts, like the list
+    it replaces. `names` maps category ids to their current names, so renaming
+    a category is a single dict update."""
+
+    def __init__(self):
+        self.amounts = array("d")
+        self.cat_ids = array("i")
+        self.days = array("i")        # date.toordinal() of each transaction
+        self.desc_ends = array("q")   # end offset of each description in desc_pool
+        self.desc_pool = bytearray()
+        self.names: Dict[int, str] = {}
+        self.months: Dict[int, array] = {}                   # month -> positions, oldest first
+        self.month_totals: Dict[int, Dict[int, float]] = {}  # month -> category id -> spent
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "days" not in state:
+            # saved before transactions had dates: treat them as made on load
+            self.days = array("i", [today()]) * len(self.amounts)
+            self.months, self.month_totals = {}, {}
+            for i in range(len(self.amounts)):
+                self._index(i)
+
+    @classmethod
+    def from_dicts(cls, txs: Iterable[Dict], ids: Dict[str, int], newest_first: bool = True) -> "TransactionStore":
+        """Build a store from name-keyed dicts (the old snapshot format).
+
+        `ids` maps category names to ids; names it does not know (categories
+        deleted since) get fresh ids, which are added to it. Undated rows are
+        dated today."""
+        store = cls()
+        store.names = {cid: name for name, cid in ids.items()}
+        next_id = max(ids.values(), default=0) + 1
+        default_day = today()
+        txs = list(txs)
+        for t in (reversed(txs) if newest_first else txs):
+            cid = ids.get(t["category"])
+            if cid is None:
+                cid = ids[t["category"]] = next_id
+                store.names[cid] = t["category"]
+                next_id += 1
+            day = t["date"].toordinal() if t.get("date") else default_day
+            store.append(cid, t["desc"], t["amount"], day)
+        return store
+
+    def append(self, cat_id: int, desc: str, amount: float, day: int):
+        self.amounts.append(amount)
+        self.cat_ids.append(cat_id)
+        self.days.append(day)
+        self.desc_pool += desc.encode("utf-8")
+        self.desc_ends.append(len(self.desc_pool))
+        self._index(len(self.amounts) - 1)
+
+    def truncate(self, count: int):
+        """Drop the newest transactions so that `count` remain (used by undo)"""
+        for i in range(len(self.amounts) - 1, count - 1, -1):
+            month = month_of(self.days[i])
+            self.months[month].pop()
+            totals = self.month_totals[month]
+            cid = self.cat_ids[i]
+            totals[cid] = totals.get(cid, 0.0) - self.amounts[i]
+        if count < len(self.amounts):
+            del self.desc_pool[self.desc_ends[count - 1] if count else 0:]
+            for column in (self.amounts, self.cat_ids, self.days, self.desc_ends):
+                del column[count:]
+
+    def _index(self, i: int):
+        month = month_of(self.days[i])
+        rows = self.months.get(month)
+        if rows is None:
+            rows = self.months[month] = array("q")
+            self.month_totals[month] = {}
+        rows.append(i)
+        totals = self.month_totals[month]
+        cid = self.cat_ids[i]
+        totals[cid] = totals.get(cid, 0.0) + self.amounts[i]
+
+    # ---------- row access (position 0 is the newest) ----------
+    def row(self, i: int) -> Dict:
+        """Transaction number i in insertion order (0 is the oldest)"""
+        start = self.desc_ends[i - 1] if i > 0 else 0
+        cid = self.cat_ids[i]
+        return {"category": self.names.get(cid, ""),
+                "category_id": cid,
+                "desc": self.desc_pool[start:self.desc_ends[i]].decode("utf-8"),
+                "amount": self.amounts[i],
+                "date": date.fromordinal(self.days[i])}
+
+    def __len__(self):
+        return len(self.amounts)
+
+    def __getitem__(self, index):
+        n = len(self)
+        if isinstance(index, slice):
+            return [self.row(n - 1 - i) for i in range(*index.indices(n))]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("transaction index out of range")
+        return self.row(n - 1 - index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(len(self) - 1, -1, -1):
+            yield self.row(i)
+
+    def __reversed__(self) -> Iterator[Dict]:
+        for i in range(len(self)):
+            yield self.row(i)
+
+    def raw_rows(self) -> Iterator[tuple]:
+        """(amount, category id, day, UTF-8 description) per transaction, oldest first"""
+        start = 0
+        for amount, cid, day, end in zip(self.amounts, self.cat_ids, self.days, self.desc_ends):
+            yield amount, cid, day, bytes(self.desc_pool[start:end])
+            start = end
+
+    def month_rows(self, month: int):
+        """Positions of one month's transactions, oldest first"""
+        return self.months.get(month, array("q"))
+
+    def month_view(self, month: int) -> "MonthView":
+        return MonthView(self, self.month_rows(month))
+
+    # ---------- aggregation ----------
+    def columns(self):
+        """(amounts, category ids, days) as typed arrays, oldest first; no copy"""
+        return self.amounts, self.cat_ids, self.days
+
+    def category_totals(self) -> Dict[int, float]:
+        """Sum of amounts per category id, straight off the columns"""
+        sums: Dict[int, float] = {}
+        for cid, amount in zip(self.cat_ids, self.amounts):
+            sums[cid] = sums.get(cid, 0.0) + amount
+        return sums
+
+
+class MonthView:
+    """Newest-first view over one month's partition of a TransactionStore"""
+
+    def __init__(self, store: TransactionStore, rows: array):
+        self.store = store
+        self.rows = rows
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        n = len(self.rows)
+        if isinstance(index, slice):
+            return [self.store.row(self.rows[n - 1 - i]) for i in range(*index.indices(n))]
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError("transaction index out of range")
+        return self.store.row(self.rows[n - 1 - index])
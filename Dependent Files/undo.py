@@ -0,0 +1,75 @@
+# undo.py
+# Undo/redo history for BudgetEngine.
+# A Version is an immutable view of the budget: income, the categories as a
+# tuple of (id, name, limit, color) tuples, and how many transactions the
+# history held. The history is append-only, so a length is enough to name
+# any earlier state of it, and the categories tuple is only rebuilt when the
+# setup changes; every version in between shares it. Taking a version after
+# a spend therefore costs O(1) whatever the size of the history, and a
+# change keeps only the transactions it added (so it can be redone).
+
+from __future__ import annotations
+from collections import deque
+from typing import Dict, List, Tuple
+
+UNDO_LEVELS = 500
+
+CategoryRow = Tuple[int, str, float, str]
+
+
+class Version:
+    __slots__ = ("income", "categories", "tx_count")
+
+    def __init__(self, income: float, categories: Tuple[CategoryRow, ...], tx_count: int):
+        self.income = income
+        self.categories = categories
+        self.tx_count = tx_count
+
+    def same_setup(self, other: "Version") -> bool:
+        # categories tuples are shared between versions, so this is usually an identity check
+        return self.income == other.income and (self.categories is other.categories
+                                                or self.categories == other.categories)
+
+
+class Change:
+    """One undoable action: the versions before and after it, and the transactions it added"""
+    __slots__ = ("label", "before", "after", "txs")
+
+    def __init__(self, label: str, before: Version, after: Version, txs: List[Dict]):
+        self.label = label
+        self.before = before
+        self.after = after
+        self.txs = txs
+
+
+class UndoHistory:
+    """Bounded undo and redo stacks of Changes"""
+
+    def __init__(self, levels: int = UNDO_LEVELS):
+        self.done: deque = deque(maxlen=levels)
+        self.undone: List[Change] = []
+
+    def __bool__(self):
+        return self.done.maxlen > 0
+
+    def push(self, change: Change):
+        self.done.append(change)
+        self.undone.clear()
+
+    def undo(self) -> Change | None:
+        if not self.done:
+            return None
+        change = self.done.pop()
+        self.undone.append(change)
+        return change
+
+    def redo(self) -> Change | None:
+        if not self.undone:
+            return None
+        change = self.undone.pop()
+        self.done.append(change)
+        return change
+
+    def clear(self):
+        self.done.clear()
+        self.undone.clear()
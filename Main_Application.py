@@ -1,9 +1,33 @@
-import subprocess, sys
-from PIL import Image, ImageTk
+import importlib, os, sys
 from tkinter import Tk, StringVar, Entry, Label, Button, Text, Frame, Toplevel, END, DISABLED, NORMAL, TOP
 
+from icon_cache import load_icon
+
+APPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Dependent Files")
+
+
+def load_app_module(name):
+    """Import one of the tools on first use; later calls get the cached module"""
+    if APPS_DIR not in sys.path:
+        sys.path.insert(0, APPS_DIR)
+    return importlib.import_module(name)
+
+
+def focus_window(window):
+    """Bring an already open tool to the front; False if it has been closed"""
+    if window is None or not window.winfo_exists():
+        return False
+    window.deiconify()
+    window.lift()
+    window.focus_force()
+    return True
+
+
 class MainApp:
     def __init__(self):
+        # the tools run as Toplevels in this process, one window each
+        self.budget_app = None
+        self.calculator = None
         self.app_window = Tk()
         self.app_window.title("FinBuddy")
         self.app_window.geometry("617x330")
@@ -11,35 +35,39 @@ class MainApp:
         self.app_window.mainloop()
 
     def open_budget(self):
-        subprocess.Popen([sys.executable, "Dependent Files/NewApp.py"])
+        if focus_window(self.budget_app):
+            return
+        BudgetApp = load_app_module("NewApp").BudgetApp
+        self.budget_app = BudgetApp(self.app_window, on_close=self.budget_closed)
 
+    def budget_closed(self):
+        self.budget_app = None
 
     def open_calculator(self):
-        subprocess.Popen([sys.executable, 'Dependent Files/AP_CSP_copy.py'])
+        if self.calculator is not None and focus_window(self.calculator.app_window):
+            return
+        CalculatorUI = load_app_module("AP_CSP_copy").CalculatorUI
+        self.calculator = CalculatorUI(self.app_window)
 
     def create_widgets(self):
-        check_budg_img = Image.open('Icons/Icon_Check_Budget.jpg').resize((300, 300))
-        check_budg_icon = ImageTk.PhotoImage(check_budg_img)
+        check_budg_icon = load_icon('Icons/Icon_Check_Budget.jpg', (300, 300), self.app_window)
         check_budg_button = Button(self.app_window, image=check_budg_icon, text="Budget Tracker", compound=TOP, command=self.open_budget)
         check_budg_button.image = check_budg_icon
         check_budg_button.grid(row=0, column=0, padx=0, pady=0)
 
         '''
-        add_spending_img = Image.open('Icons/Icon_Spending_Type.png').resize((300, 300))
-        add_spending_icon = ImageTk.PhotoImage(add_spending_img)
+        add_spending_icon = load_icon('Icons/Icon_Spending_Type.png', (300, 300), self.app_window)
         add_spending_button = Button(self.app_window, image=add_spending_icon, text="Add a Transaction", compound=TOP) #, command=self.open_spending)
         add_spending_button.image = add_spending_icon
         add_spending_button.grid(row=0, column=1, padx=0, pady=0)
 
-        config_budg_img = Image.open('Icons/Icon_Config_Budget.png').resize((300, 300))
-        config_budg_icon = ImageTk.PhotoImage(config_budg_img)
+        config_budg_icon = load_icon('Icons/Icon_Config_Budget.png', (300, 300), self.app_window)
         config_budg_button = Button(self.app_window, image=config_budg_icon, text="Configure Budget", compound=TOP) #, command=self.open_config()
         config_budg_button.image = config_budg_icon
         config_budg_button.grid(row=1, column=0, padx=0, pady=0)
         '''
 
-        calc_icon_img = Image.open('Icons/Icon_Calculator.png').resize((300, 300))
-        calc_icon = ImageTk.PhotoImage(calc_icon_img)
+        calc_icon = load_icon('Icons/Icon_Calculator.png', (300, 300), self.app_window)
         calc_button = Button(self.app_window, image=calc_icon, text="Calculator App", compound=TOP, command=self.open_calculator)
         calc_button.image = calc_icon
         calc_button.grid(row=0, column=1, padx=0, pady=0)
@@ -49,3 +77,5 @@ class MainApp:
 
 if __name__ == "__main__":
     app = MainApp()
+    if app.budget_app is not None:
+        app.budget_app.close()
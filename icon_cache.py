@@ -0,0 +1,44 @@
+# icon_cache.py
+# Pre-scaled launcher icons.
+# Each source icon is resized once and saved as a PNG that Tk can load
+# natively. The cached file name is derived from the source path, its mtime
+# and the target size, so a warm start is one os.stat and one PhotoImage per
+# icon and never imports PIL. Editing or replacing an icon changes its mtime,
+# which regenerates the cached copy on the next start.
+
+from __future__ import annotations
+import hashlib
+import os
+from tkinter import PhotoImage
+from typing import Tuple
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "Icons", ".cache")
+
+
+def cached_path(path: str, size: Tuple[int, int]) -> Tuple[str, str]:
+    """(cached file for the current version of `path`, prefix shared by all its versions)"""
+    source = os.path.abspath(path)
+    mtime = os.stat(source).st_mtime_ns
+    prefix = f"{hashlib.sha1(source.encode('utf-8')).hexdigest()[:16]}-{size[0]}x{size[1]}-"
+    return os.path.join(CACHE_DIR, f"{prefix}{mtime}.png"), prefix
+
+
+def render(path: str, size: Tuple[int, int], target: str, prefix: str):
+    """Scale `path` to `size`, save it as `target` and drop outdated versions"""
+    from PIL import Image     # only needed when the cache is cold
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    tmp_path = target + ".tmp"
+    with Image.open(path) as img:
+        img.convert("RGBA").resize(size).save(tmp_path, format="PNG")
+    os.replace(tmp_path, target)
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and os.path.join(CACHE_DIR, name) != target:
+            os.remove(os.path.join(CACHE_DIR, name))
+
+
+def load_icon(path: str, size: Tuple[int, int], master=None) -> PhotoImage:
+    target, prefix = cached_path(path, size)
+    if not os.path.exists(target):
+        render(path, size, target, prefix)
+    return PhotoImage(master=master, file=target)
@@ -0,0 +1,5 @@
+# The app's modules live in "Dependent Files" and import each other by name.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Dependent Files"))
@@ -0,0 +1,170 @@
+# legacy_calculator.py
+# The calculator's evaluator as it was before calc_engine (the original
+# CalculatorLogic, without its Tk imports), kept as the reference for the
+# parity tests in test_calc_engine.py.
+
+from math import sin, cos, tan, log, log10, pi
+
+class CalculatorLogic:
+    def __init__(self):
+        self.operand = ""
+        self.operands = []
+        self.z_error = False
+
+    def search_char(self, char, lst):
+        for element in lst:
+            if type(element) != int and type(element) != float:
+                if element in char:
+                    return True
+        return False
+
+    def simplify_pow(self, expression_list):
+        reverse_list = expression_list[::-1]
+        while self.search_char("^", reverse_list):
+            for element in reverse_list:
+                if type(element) == int or type(element) == float:
+                    continue
+                elif element == "^":
+                    index = reverse_list.index(element)
+                    result = reverse_list[index+1] ** reverse_list[index-1]
+                    del reverse_list[index-1], reverse_list[index-1]
+                    reverse_list[index-1] = result
+                    break
+        return reverse_list[::-1]
+
+    def simplify_mult_div(self, expression_list):
+        while self.search_char("*/%", expression_list):
+            for element in expression_list:
+                if type(element) == int or type(element) == float:
+                    continue
+                elif element in "*/%":
+                    index = expression_list.index(element)
+                    if element == "*":
+                        result = expression_list[index-1] * expression_list[index+1]
+                    elif element == "/":
+                        try:
+                            result = expression_list[index-1] / expression_list[index+1]
+                        except ZeroDivisionError:
+                            self.z_error = True
+                            return ()
+                    elif element == "%":
+                        result = expression_list[index-1] % expression_list[index+1]
+                    del expression_list[index-1], expression_list[index-1]
+                    expression_list[index-1] = result
+                    break
+        return expression_list
+
+    def simplify_add_sub(self, expression_list):
+        while self.search_char("+-", expression_list):
+            for element in expression_list:
+                if type(element) == int or type(element) == float:
+                    continue
+                elif element in "+-":
+                    index = expression_list.index(element)
+                    if element == "+":
+                        result = expression_list[index-1] + expression_list[index+1]
+                    elif element == "-":
+                        result = expression_list[index-1] - expression_list[index+1]
+                    del expression_list[index-1], expression_list[index-1]
+                    expression_list[index-1] = result
+                    break
+        return expression_list
+
+    def evaluate(self, expression):
+        expression_list = list(expression)
+        if expression_list[0] == "-":
+            expression_list.insert(0, "0")
+        self.operands = []
+        self.operand = ""
+        self.z_error = False
+
+        for index in range(len(expression_list)):
+            char = expression_list[index]
+            try:
+                if char == " ":
+                    continue
+                elif char == ".":
+                    self.operand += char
+                elif float(char) or char == "0":
+                    self.operand += char
+            except:
+                if char not in "+-*^/%":
+                    return "ERROR: INVALID FUNCTION USED"
+                if char == "-" and expression_list[index-1] in "+-*/%^":
+                    self.operand += char
+                else:
+                    self.operands += [float(self.operand), char]
+                    self.operand = ""
+        self.operands += [float(self.operand)]
+        expression_list = self.operands
+        expression_list = self.simplify_pow(expression_list)
+        expression_list = self.simplify_mult_div(expression_list)
+        expression_list = self.simplify_add_sub(expression_list)
+        if self.z_error:
+            return "ERROR: CANNOT DIVIDE BY ZERO"
+        return expression_list[0]
+
+    def calculator(self, expression, mode=0):
+        try:
+            while True:
+                start_index = end_index = index = 0
+                found_end = False
+                for element in expression:
+                    if element == ")":
+                        end_index = index
+                        found_end = True
+                        found_start = False
+                        reverse = expression[end_index::-1]
+                        break
+                    index += 1
+                else:
+                    if not found_end:
+                        break
+
+                index = 0
+                for element in expression[:end_index]:
+                    if element == "(":
+                        start_index = index
+                        found_start = True
+                    index += 1
+                else:
+                    if not found_start:
+                        return "Error: Unmatched Parenthesis"
+                arg = self.evaluate(expression[start_index+1:end_index])
+                if start_index >= 3:
+                    funct_id = expression[start_index-3:start_index]
+                    if funct_id in ["sin", "cos", "tan"]:
+                        if mode == 1:
+                            arg *= (pi/180)
+                        if funct_id == "sin":
+                            val = sin(arg)
+                        elif funct_id == "cos":
+                            val = cos(arg)
+                        else:
+                            val = tan(arg)
+                    elif funct_id == "qrt":
+                        val = (arg) ** 0.5
+                        funct_id = "sqrt"
+                    elif funct_id == "log":
+                        val = log10(arg)
+                    elif funct_id[1:] == "ln":
+                        funct_id = funct_id[1:]
+                        val = log(arg)
+                    elif funct_id[2] in "+-/**(":
+                        funct_id = ""
+                        val = arg
+                    else:
+                        return "Error: Invalid Function Used"
+                else:
+                    if "ln" in expression:
+                        expression = str(log(arg))
+                        continue
+                    else:
+                        funct_id = ''
+                        val = arg
+                expression = expression.replace(funct_id + "("+ expression[start_index+1:end_index] + ")", str(val))
+        except ZeroDivisionError:
+            return("Error: Cannot Divide By Zero")
+        except:
+            return("Error: Unmatched Parenthesis")
+        return self.evaluate(expression)
@@ -0,0 +1,118 @@
+from datetime import date
+
+import pytest
+
+from alerts import NEVER, AlertEngine
+from budget_engine import BudgetEngine, Category
+from periods import month_of
+
+DAY = date(2026, 3, 14).toordinal()
+NEXT_MONTH = date(2026, 4, 2).toordinal()
+
+
+@pytest.fixture
+def fired():
+    return []
+
+
+@pytest.fixture
+def engine(fired):
+    alerts = AlertEngine("Home")
+    alerts.subscribe(fired.append)
+    engine = BudgetEngine(defaults=[Category("Food", 100.0), Category("Rent", 1000.0)], alerts=alerts)
+    engine.set_month(month_of(DAY))
+    return engine
+
+
+def seen(fired):
+    levels = [(a.name, a.threshold) for a in fired]
+    fired.clear()
+    return levels
+
+
+def test_each_threshold_fires_once_on_crossing(engine, fired):
+    engine.spend(1, 40.0, "", DAY)
+    assert seen(fired) == []
+    engine.spend(1, 15.0, "", DAY)
+    assert seen(fired) == [("Food", 0.5)]
+    engine.spend(1, 1.0, "", DAY)
+    assert seen(fired) == []
+    engine.spend(1, 30.0, "", DAY)
+    assert seen(fired) == [("Food", 0.8)]
+    engine.spend(1, 50.0, "", DAY)
+    engine.spend(1, 50.0, "", DAY)
+    assert seen(fired) == [("Food", 1.0)]
+
+
+def test_one_spend_past_several_levels_reports_the_highest(engine, fired):
+    engine.spend(1, 120.0, "", DAY)
+    assert seen(fired) == [("Food", 1.0)]
+    engine.spend(2, 450.0, "", DAY)
+    assert seen(fired) == [("Home", 0.5)]          # Rent is at 45%, the budget at 570 of 1100
+
+
+def test_undo_rearms(engine, fired):
+    engine.spend(1, 60.0, "", DAY)
+    assert seen(fired) == [("Food", 0.5)]
+    engine.undo()
+    assert seen(fired) == []
+    engine.spend(1, 60.0, "", DAY)
+    assert seen(fired) == [("Food", 0.5)]
+    engine.undo()
+    engine.redo()                                  # back over the level, silently
+    assert seen(fired) == []
+    engine.spend(1, 25.0, "", DAY)
+    assert seen(fired) == [("Food", 0.8)]
+
+
+def test_month_change_rearms_silently(engine, fired):
+    engine.spend(1, 60.0, "", DAY)
+    assert seen(fired) == [("Food", 0.5)]
+    engine.set_month(month_of(NEXT_MONTH))
+    assert seen(fired) == []
+    engine.spend(1, 60.0, "", NEXT_MONTH)
+    assert seen(fired) == [("Food", 0.5)]
+    engine.set_month(month_of(DAY))
+    engine.spend(1, 1.0, "", DAY)
+    assert seen(fired) == []
+
+
+def test_lowered_limit_fires_when_notified(engine, fired):
+    engine.spend(1, 60.0, "", DAY)
+    seen(fired)
+    engine.apply([("allocate", 1, 70.0)])
+    assert seen(fired) == [("Food", 0.8)]
+
+
+def test_next_at_skips_categories_below_their_threshold(monkeypatch):
+    alerts = AlertEngine(thresholds=(0.8, 0.5))
+    food, rent = Category("Food", 100.0, spent=10.0, id=1), Category("Rent", 1000.0, spent=600.0, id=2)
+    alerts.rearm([food, rent], 1100.0, 610.0, month_of(DAY))
+    assert alerts.next_at == {1: 50.0, 2: 800.0, None: 880.0}
+
+    advanced = []
+    monkeypatch.setattr(alerts, "_advance", lambda key, spent: advanced.append(key))
+    food.spent = 49.0
+    alerts.check(food, 649.0)
+    rent.spent = 799.0
+    alerts.check(rent, 848.0)
+    assert advanced == []
+    food.spent = 50.0
+    alerts.check(food, 849.0)
+    assert advanced == [1]
+
+
+def test_levels_past_the_last_are_never_checked():
+    alerts = AlertEngine()
+    food = Category("Food", 100.0, spent=150.0, id=1)
+    alerts.rearm([food], 100.0, 150.0, month_of(DAY))
+    assert alerts.next_at == {1: NEVER, None: NEVER}
+
+
+def test_unsubscribe(engine, fired):
+    unsubscribe = engine.alerts.subscribe(fired.append)
+    engine.spend(1, 60.0, "", DAY)
+    assert len(seen(fired)) == 2
+    unsubscribe()
+    engine.spend(1, 30.0, "", DAY)
+    assert len(seen(fired)) == 1
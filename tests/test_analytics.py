@@ -0,0 +1,85 @@
+from datetime import date
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+import analytics
+import snapshot
+from budget_engine import Category
+from periods import month_of
+from storage import open_storage
+from txstore import TransactionStore
+
+MARCH, APRIL = date(2026, 3, 14).toordinal(), date(2026, 4, 2).toordinal()
+ROWS = [(1, "bread", 3.25, MARCH), (2, "rent", 1200.0, MARCH), (1, "lunch", 12.5, MARCH),
+        (3, "gym", 40.0, APRIL), (1, "dinner", 30.0, APRIL), (2, "deposit", 0.75, APRIL)]
+# worked out by hand from ROWS
+TOTALS = {1: 45.75, 2: 1200.75, 3: 40.0}
+MARCH_TOTALS = {1: 15.75, 2: 1200.0}
+CATEGORIES = [{"id": cid, "name": name, "limit": 100.0, "color": "#fff"}
+              for cid, name in ((1, "Food"), (2, "Rent"), (3, "Gym"))]
+
+
+def memory_store(tmp_path):
+    store = TransactionStore()
+    for row in ROWS:
+        store.append(*row)
+    return store, lambda: None
+
+
+def mapped_store(tmp_path):
+    # half the rows in the snapshot, half appended since
+    store = TransactionStore()
+    for row in ROWS[:3]:
+        store.append(*row)
+    path = str(tmp_path / "budget.DAT")
+    snapshot.write(path, {"income": 0.0, "categories": CATEGORIES, "next_category_id": 4,
+                          "journal_seq": 0, "transactions": store})
+    mapped = snapshot.load(path)["transactions"]
+    for row in ROWS[3:]:
+        mapped.append(*row)
+    return mapped, mapped.close
+
+
+def sqlite_store(tmp_path):
+    storage = open_storage(str(tmp_path / "budget.db"), legacy_snapshot=None)
+    storage.load()
+    storage.save_setup(0.0, CATEGORIES)
+    storage.add_transactions([{"category_id": c, "desc": d, "amount": a, "day": day} for c, d, a, day in ROWS])
+    return storage.transactions, storage.close
+
+
+@pytest.fixture(params=[memory_store, mapped_store, sqlite_store], ids=["memory", "mapped", "sqlite"])
+def transactions(tmp_path, request):
+    store, close = request.param(tmp_path)
+    yield store
+    close()
+
+
+def test_columns(transactions):
+    amounts, cat_ids, days = transactions.columns()
+    assert list(amounts) == [r[2] for r in ROWS]
+    assert list(cat_ids) == [r[0] for r in ROWS]
+    assert list(days) == [r[3] for r in ROWS]
+
+
+def test_totals(transactions):
+    report = analytics.Analytics.from_transactions(transactions)
+    assert report.totals() == pytest.approx(TOTALS)
+    assert report.month(month_of(MARCH)).totals() == pytest.approx(MARCH_TOTALS)
+    assert report.month(month_of(MARCH) - 1).totals() == {}
+
+
+def test_reconcile(transactions):
+    food = Category("Food", 100.0, spent=15.75, id=1)
+    rent = Category("Rent", 100.0, spent=1000.0, id=2)       # drifted
+    gym = Category("Gym", 100.0, spent=5.0, id=3)            # nothing in March
+    fixed = analytics.reconcile([food, rent, gym], transactions, month_of(MARCH))
+    assert fixed == {2: 1200.0, 3: 0.0}
+    assert (food.spent, rent.spent, gym.spent) == (15.75, 1200.0, 0.0)
+
+
+def test_empty_history():
+    report = analytics.Analytics.from_transactions(TransactionStore())
+    assert report.totals() == {}
@@ -0,0 +1,151 @@
+from datetime import date
+
+import pytest
+
+from budget_engine import BudgetEngine, BudgetError, Category
+from storage import UnknownCategory, open_storage
+
+DAY = date(2026, 3, 14).toordinal()
+
+
+def defaults():
+    return [Category("Food", 500.0), Category("Rent", 1200.0)]
+
+
+def reopen(path):
+    storage = open_storage(path, legacy_snapshot=None)
+    return BudgetEngine(storage, storage.load())
+
+
+@pytest.fixture(params=["budget.DAT", "budget.db"])
+def path(tmp_path, request):
+    return str(tmp_path / request.param)
+
+
+def test_spends_on_default_categories_are_stored(path):
+    engine = BudgetEngine(open_storage(path, legacy_snapshot=None), None, defaults())
+    engine.search("")
+    engine.add_transaction("Food", "lunch", 10.0)
+    assert len(engine.transactions) == 1
+    assert engine.total_spent == 10.0
+    assert [t["desc"] for t in engine.search("")] == ["lunch"]
+    engine.close()
+
+    engine = reopen(path)
+    try:
+        assert [c.name for c in engine.categories] == ["Food", "Rent"]
+        assert engine.categories.by_name("Food").spent == 10.0
+    finally:
+        engine.close()
+
+
+def test_setup_edits_are_saved_and_undoable(path):
+    engine = BudgetEngine(open_storage(path, legacy_snapshot=None), None, defaults())
+    gym = engine.add_category("Gym", 40.0)
+    engine.rename_category(engine.categories.by_name("Food"), "Groceries")
+    engine.set_income(2500.0)
+    engine.delete_category(engine.categories.by_name("Rent"))
+    engine.spend(gym.id, 40.0, "membership", DAY)
+    assert engine.total_limit == 540.0
+    engine.close()
+
+    engine = reopen(path)
+    try:
+        assert engine.income == 2500.0
+        assert [c.name for c in engine.categories] == ["Groceries", "Gym"]
+        assert len(engine.transactions) == 1
+    finally:
+        engine.close()
+
+    engine = BudgetEngine(defaults=defaults())
+    engine.add_category("Gym", 40.0)
+    engine.rename_category(engine.categories.by_name("Gym"), "Fitness")
+    assert engine.undo() == "Rename category"
+    assert engine.categories.by_name("Gym") is not None
+    assert engine.undo() == "Add category"
+    assert [c.name for c in engine.categories] == ["Food", "Rent"]
+    assert engine.undo() is None            # the defaults are where the budget starts
+
+
+def test_storage_refuses_unknown_categories(path):
+    storage = open_storage(path, legacy_snapshot=None)
+    try:
+        storage.load()
+        storage.save_setup(0.0, [{"id": 1, "name": "Food", "limit": 1.0, "color": "#fff"}])
+        with pytest.raises(UnknownCategory):
+            storage.add_transactions([{"category_id": 1, "desc": "a", "amount": 1.0, "day": DAY},
+                                      {"category_id": 9, "desc": "b", "amount": 1.0, "day": DAY}])
+        # nothing of a refused batch is stored
+        assert len(storage.transactions) == 0
+    finally:
+        storage.close()
+
+
+def test_spend_on_unknown_category():
+    engine = BudgetEngine(defaults=defaults())
+    with pytest.raises(BudgetError, match="Category not found"):
+        engine.spend(99, 5.0)
+    assert len(engine.transactions) == 0
+
+
+def setup_rows(engine):
+    return [(c.id, c.name, c.limit) for c in engine.categories]
+
+
+@pytest.mark.parametrize("bad", [("refund", 1, 5.0), ("allocate", 99, 5.0), ("spend", 2, "lots")])
+def test_apply_is_all_or_nothing(bad):
+    engine = BudgetEngine(defaults=defaults())
+    engine.search("")
+    rows, steps = setup_rows(engine), len(engine.history.done)
+    with pytest.raises((BudgetError, TypeError)):
+        engine.apply([("income", 4000.0), ("add", "Gym", 40.0), ("edit", 1, {"name": "Groceries"}),
+                      ("remove", 2), ("spend", 1, 5.0, "first", DAY), bad])
+    assert engine.income == 0.0
+    assert setup_rows(engine) == rows
+    assert len(engine.transactions) == 0
+    assert len(engine.history.done) == steps
+    assert engine.search("") == []
+
+
+def test_apply_refuses_spends_on_removed_categories():
+    engine = BudgetEngine(defaults=defaults())
+    with pytest.raises(BudgetError, match="removes"):
+        engine.apply([("spend", 2, 5.0, "gone", DAY), ("remove", 2)])
+    assert engine.categories.get(2) is not None
+    assert len(engine.transactions) == 0
+
+
+def test_apply_batch_is_stored_indexed_and_undone_together():
+    engine = BudgetEngine(defaults=defaults())
+    engine.spend(1, 3.0, "first", DAY)
+    engine.search("")
+    next_id = engine.categories.next_id
+    txs = engine.apply([("add", "Gym", 40.0), ("spend", next_id, 40.0, "second", DAY),
+                        ("allocate", 1, 450.0), ("spend", 1, 2.5, "third", DAY)])
+    assert [t["desc"] for t in txs] == ["second", "third"]
+    assert [t["desc"] for t in engine.search("second")] == ["second"]
+    assert [t["desc"] for t in engine.search("")] == ["third", "second", "first"]
+    assert engine.categories.get(1).limit == 450.0
+
+    assert engine.undo() == "Batch"
+    assert engine.categories.get(next_id) is None
+    assert engine.categories.get(1).limit == 500.0
+    assert [t["desc"] for t in engine.search("")] == ["first"]
+    assert engine.redo() == "Batch"
+    assert [t["desc"] for t in engine.search("second")] == ["second"]
+
+
+def test_search_index_follows_what_storage_stored(monkeypatch):
+    engine = BudgetEngine(defaults=defaults())
+    engine.spend(1, 3.0, "first", DAY)
+    engine.search("")
+    store = engine.storage.add_transactions
+
+    def keep_first(txs):
+        return store(txs[:1])                   # a backend that stored only part of the batch
+
+    monkeypatch.setattr(engine.storage, "add_transactions", keep_first)
+    engine.apply([("spend", 1, 2.0, "second", DAY), ("spend", 2, 1.0, "third", DAY)])
+    assert engine.index is None
+    assert [t["desc"] for t in engine.search("")] == ["second", "first"]
+    assert engine.search("third") == []
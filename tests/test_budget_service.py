@@ -0,0 +1,101 @@
+import asyncio
+import json
+
+import pytest
+
+from budget_service import BudgetPool, BudgetService
+
+SETUP = {"income": 3000, "categories": [{"name": "Food", "limit": 500}, {"name": "Rent", "limit": 1200}]}
+
+
+async def http(port, method, target, body=None):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    data = b"" if body is None else (body if isinstance(body, bytes) else json.dumps(body).encode())
+    writer.write(f"{method} {target} HTTP/1.1\r\nContent-Length: {len(data)}\r\nConnection: close\r\n\r\n"
+                 .encode() + data)
+    await writer.drain()
+    raw = await reader.read()
+    writer.close()
+    head, _, payload = raw.partition(b"\r\n\r\n")
+    return int(head.split()[1]), json.loads(payload)
+
+
+def serve(root, scenario):
+    """Run `scenario(call)` against a service on a free port; call(method, target, body=None)"""
+    async def main():
+        pool = BudgetPool(str(root))
+        server = await asyncio.start_server(BudgetService(pool).handle, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        try:
+            return await scenario(lambda *args: http(port, *args))
+        finally:
+            server.close()
+            await server.wait_closed()
+            await pool.close()
+    return asyncio.run(main())
+
+
+@pytest.mark.parametrize("amount", [-5, 0, "inf", "-inf", "nan", "1e999", "abc", None, [1]])
+def test_rejects_bad_amounts(tmp_path, amount):
+    async def scenario(call):
+        assert (await call("PUT", "/budgets/home", SETUP))[0] == 200
+        status, body = await call("POST", "/budgets/home/transactions", {"category": "Food", "amount": amount})
+        assert status == 400, body
+        # nothing was stored, and search still works
+        assert (await call("GET", "/budgets/home/transactions"))[1]["total"] == 0
+        assert (await call("GET", "/budgets/home/search?q=&min=1"))[0] == 200
+    serve(tmp_path, scenario)
+
+
+@pytest.mark.parametrize("query", ["min=inf", "max=nan", "min=x", "category_id=a", "limit=1.5"])
+def test_rejects_bad_search_parameters(tmp_path, query):
+    async def scenario(call):
+        await call("PUT", "/budgets/home", SETUP)
+        assert (await call("GET", f"/budgets/home/search?q=a&{query}"))[0] == 400
+    serve(tmp_path, scenario)
+
+
+@pytest.mark.parametrize("body", [
+    {"income": "inf", "categories": []},
+    {"income": 1, "categories": [{"name": "Food", "limit": "nan"}]},
+    {"income": 1, "categories": [{"limit": 5}]},
+    {"income": 1},
+    b"not json",
+    b"[1, 2]",
+])
+def test_rejects_bad_setup(tmp_path, body):
+    async def scenario(call):
+        assert (await call("PUT", "/budgets/home", body))[0] == 400
+    serve(tmp_path, scenario)
+
+
+def test_setup_without_ids_keeps_categories(tmp_path):
+    async def scenario(call):
+        first = (await call("PUT", "/budgets/home", SETUP))[1]
+        ids = {c["name"]: c["id"] for c in first["categories"]}
+        for amount in (12.5, 7.5):
+            assert (await call("POST", "/budgets/home/transactions", {"category": "Food", "amount": amount}))[0] == 201
+        # the same setup again, as a client that never saw the ids sends it
+        again = (await call("PUT", "/budgets/home", dict(SETUP, income=3100)))[1]
+        food = next(c for c in again["categories"] if c["name"] == "Food")
+        assert {c["name"]: c["id"] for c in again["categories"]} == ids
+        assert food["spent"] == 20.0
+        history = (await call("GET", "/budgets/home/transactions"))[1]["transactions"]
+        assert [t["category"] for t in history] == ["Food", "Food"]
+    serve(tmp_path, scenario)
+
+
+def test_spend_and_read_back(tmp_path):
+    async def scenario(call):
+        await call("PUT", "/budgets/home", SETUP)
+        status, tx = await call("POST", "/budgets/home/transactions",
+                                {"category": "Rent", "amount": 1200, "desc": "March rent", "date": "2026-03-01"})
+        assert status == 201 and tx["date"] == "2026-03-01"
+        march = (await call("GET", "/budgets/home/categories?month=2026-03"))[1]
+        assert march["total_spent"] == 1200
+        found = (await call("GET", "/budgets/home/search?q=rent&max=5000"))[1]["transactions"]
+        assert [t["desc"] for t in found] == ["March rent"]
+        assert (await call("POST", "/budgets/home/transactions", {"category": "Nope", "amount": 1}))[0] == 400
+        assert (await call("GET", "/budgets/home/categories?month=March"))[0] == 400
+        assert (await call("GET", "/budgets/missing/categories"))[0] == 404
+    serve(tmp_path, scenario)
@@ -0,0 +1,34 @@
+import calc_batch
+import calc_engine
+
+LINES = ["1+1", "1/0", "", "2^10", "(1+2", "sqrt(16)", "abc(2)", "7%3", "x", "3*4", "ln(0)", "10/4"] * 3
+
+
+def expected():
+    results = []
+    for line in LINES:
+        if not line:
+            results.append(("", True))
+            continue
+        value = calc_engine.evaluate(line)
+        results.append((value, False) if isinstance(value, str) else (str(value), True))
+    return results
+
+
+def test_pool_keeps_input_order():
+    # more chunks than the 2 per worker allowed in flight, and a short last one
+    results = list(calc_batch.evaluate_stream(LINES, jobs=2, chunk_size=5))
+    assert results == expected()
+    assert results[:3] == [("2.0", True), (calc_engine.DIVIDE_BY_ZERO, False), ("", True)]
+
+
+def test_single_process_matches_pool():
+    assert list(calc_batch.evaluate_stream(iter(LINES), jobs=1, chunk_size=4)) == expected()
+
+
+def test_main_reports_errors_by_line(tmp_path, capsys):
+    source, output = tmp_path / "formulas.txt", tmp_path / "results.txt"
+    source.write_text("1+2\n1/0\n4*5\n", encoding="utf-8")
+    assert calc_batch.main([str(source), "-o", str(output), "-j", "2", "--chunk-size", "1"]) == 1
+    assert output.read_text(encoding="utf-8").splitlines() == ["3.0", calc_engine.DIVIDE_BY_ZERO, "20.0"]
+    assert capsys.readouterr().err == f"line 2: {calc_engine.DIVIDE_BY_ZERO}\n"
@@ -0,0 +1,104 @@
+import pytest
+
+import calc_engine
+from calc_engine import DEG, RAD, evaluate
+from legacy_calculator import CalculatorLogic
+
+# expressions the old evaluator handled; the engine must give the same answers
+PARITY = ["2", "1+2*3", "2^3^2", "10/4", "7%3", "-5+2", "2*-3", "(1+2)*3", "((2))", "1.5*2", ".5+1",
+          "2^-1", "3 - 2 - 1", "8/4/2", "sin(1)", "cos(0)", "tan(1)", "log(100)", "ln(2)", "sqrt(16)",
+          "sqrt(2)*sqrt(2)", "ln(1)", "1/0", "2+3/0", "1+2)", "abc(2)", "3&4",
+          # trailing blanks
+          "2 ", "1 + 1 ", "sqrt(2) "]
+
+
+def same(a, b):
+    if isinstance(a, str) or isinstance(b, str):
+        return a == b
+    return a == pytest.approx(b, rel=1e-12)
+
+
+@pytest.mark.parametrize("text", PARITY)
+@pytest.mark.parametrize("mode", [RAD, DEG])
+def test_matches_old_evaluator(text, mode):
+    assert same(evaluate(text, mode), CalculatorLogic().calculator(text, mode))
+
+
+@pytest.mark.parametrize("text, value", [
+    ("1e3", 1000.0),                      # the old evaluator rejected exponents
+    ("2 * (3 + 4) - 5 / 2", 11.5),        # and blanks before a parenthesis
+    ("-2^2", -4.0),
+    ("4*5\t", 20.0),                      # and tabs
+])
+def test_fixed_since_old_evaluator(text, value):
+    assert evaluate(text) == value
+
+
+@pytest.mark.parametrize("text, message", [
+    ("(1+2", calc_engine.UNMATCHED_PARENTHESIS),
+    ("2^", calc_engine.UNMATCHED_PARENTHESIS),
+    ("x+1", calc_engine.INVALID_FUNCTION),
+    ("10^1000", calc_engine.NUMBER_TOO_LARGE),
+    ("ln(0)", calc_engine.MATH_DOMAIN),
+    ("log(-1)", calc_engine.MATH_DOMAIN),
+    ("(-8)^0.5", calc_engine.MATH_DOMAIN),
+    ("sqrt(-4)", calc_engine.MATH_DOMAIN),
+    ("sqrt(0-1)*0", calc_engine.MATH_DOMAIN),
+    ("sin((-8)^0.5)", calc_engine.MATH_DOMAIN),
+])
+def test_error_messages(text, message):
+    assert evaluate(text) == message
+
+
+def test_variables_and_cache():
+    assert evaluate("x^2 + y", x=3.0, y=1.0) == 10.0
+    assert calc_engine.compile_expression("x+1") is calc_engine.compile_expression("x+1")
+    assert calc_engine.compile_expression("x+1").names == {"x"}
+
+
+def test_long_expression_does_not_recurse():
+    assert evaluate("+".join(["1"] * 50_000)) == 50_000.0
+    assert evaluate("(" * 100 + "1" + ")" * 100) == 1.0
+
+
+@pytest.mark.parametrize("text, value", [
+    ("(" * 5000 + "1" + ")" * 5000, 1.0),
+    ("-" * 3000 + "2", 2.0),
+    ("-" * 3001 + "2", -2.0),
+    ("sqrt(" * 4000 + "1" + ")" * 4000, 1.0),
+    ("1^" * 3000 + "2", 1.0),
+    ("(" * 3000 + "1+" * 3000 + "1" + ")" * 3000, 3001.0),
+], ids=["parentheses", "minus", "odd-minus", "calls", "powers", "sums"])
+def test_deep_nesting(text, value):
+    assert evaluate(text) == value
+
+
+@pytest.mark.parametrize("text", ["(" * 5000 + "1" + ")" * 4999, "(" * 4999 + "1" + ")" * 5000, "2(3)", "2 x", ""],
+                         ids=["unclosed", "unopened", "juxtaposed", "two-operands", "empty"])
+def test_malformed_deep_or_shallow(text):
+    assert evaluate(text) == calc_engine.UNMATCHED_PARENTHESIS
+
+
+def test_unexpected_errors_are_not_reported_as_parentheses(monkeypatch):
+    def broken(a):
+        raise RuntimeError("bug")
+
+    monkeypatch.setitem(calc_engine.UNARY, "sqrt", broken)
+    calc_engine.compile_expression.cache_clear()
+    with pytest.raises(RuntimeError):
+        evaluate("sqrt(4)")
+    calc_engine.compile_expression.cache_clear()
+
+
+@pytest.mark.parametrize("text", ["sqrt(x)", "x^0.5", "ln(x)", "log(x)"])
+def test_domain_errors_agree_with_over(text):
+    np = pytest.importorskip("numpy")
+
+    xs = [4.0, -4.0]
+    values = calc_engine.compile_expression(text).over(x=xs)
+    for x, value in zip(xs, values):
+        scalar = evaluate(text, x=x)
+        if scalar == calc_engine.MATH_DOMAIN:
+            assert np.isnan(value)
+        else:
+            assert scalar == pytest.approx(value)
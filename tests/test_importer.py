@@ -0,0 +1,94 @@
+from datetime import date
+
+import pytest
+
+import importer
+from budget_engine import BudgetEngine, Category
+
+DAY = date(2026, 3, 14).toordinal()
+
+
+class Sink:
+    """Storage end that only collects batches"""
+
+    def __init__(self):
+        self.batches = []
+
+    def add_transactions(self, txs):
+        self.batches.append(txs)
+        return len(txs)
+
+    @property
+    def rows(self):
+        return [tx for batch in self.batches for tx in batch]
+
+
+def run(path, batch_size=importer.BATCH_SIZE):
+    sink = Sink()
+    result = importer.import_statement(str(path), sink, {"Food": 1, "Rent": 2}.get, 9, batch_size)
+    return result, sink
+
+
+@pytest.mark.parametrize("text", ["12.50", "$1,012.50", " 7 ", "(3.25)", "-3.25"])
+def test_parse_amount(text):
+    assert abs(importer.parse_amount(text)) in (12.5, 1012.5, 7.0, 3.25)
+
+
+@pytest.mark.parametrize("text", ["inf", "-inf", "nan", "NaN", "1e999", "", "abc"])
+def test_parse_amount_rejects(text):
+    with pytest.raises(ValueError):
+        importer.parse_amount(text)
+
+
+def test_csv_rows(tmp_path):
+    path = tmp_path / "statement.csv"
+    path.write_text("Date,Description,Amount,Category\n"
+                    "2026-03-14,lunch,12.50,Food\n"
+                    "03/15/2026,landlord,\"$1,200.00\",Rent\n"
+                    "2026-03-16,refund,-20.00,Food\n"        # a credit
+                    "2026-03-16,reversal,(5.00),\n"           # also a credit
+                    "2026-03-17,bad amount,inf,Food\n"
+                    "2026-03-17,not a number,nan,Food\n"
+                    "2026-03-17,free,0,Food\n"
+                    "yesterday,bad date,4.00,Food\n"
+                    "2026-03-18,,3.00,Other\n")
+    result, sink = run(path, batch_size=2)
+    assert (result.imported, result.rejected, result.skipped) == (3, 4, 2)
+    assert [(t["category_id"], t["desc"], t["amount"], t["day"]) for t in sink.rows] == [
+        (1, "lunch", 12.5, DAY), (2, "landlord", 1200.0, DAY + 1), (9, "(no description)", 3.0, DAY + 4)]
+
+
+def test_ofx_rows(tmp_path):
+    path = tmp_path / "statement.ofx"
+    path.write_text("OFXHEADER:100\n<OFX><BANKTRANLIST>\n"
+                    "<STMTTRN><TRNAMT>-12.50<DTPOSTED>20260314120000<NAME>lunch</STMTTRN>\n"
+                    "<STMTTRN><TRNAMT>2000.00<DTPOSTED>20260315<NAME>salary</STMTTRN>\n"
+                    "<STMTTRN><TRNAMT>-inf<DTPOSTED>20260315<NAME>broken</STMTTRN>\n"
+                    "<STMTTRN><TRNAMT>-4<DTPOSTED>2026xx15<NAME>bad date</STMTTRN>\n"
+                    "<STMTTRN><TRNAMT>-3.00<DTPOSTED>20260316<MEMO>coffee</STMTTRN>\n"
+                    "</BANKTRANLIST></OFX>\n")
+    result, sink = run(path)
+    assert (result.imported, result.rejected, result.skipped) == (2, 2, 1)
+    assert [(t["category_id"], t["desc"], t["amount"], t["day"]) for t in sink.rows] == [
+        (9, "lunch", 12.5, DAY), (9, "coffee", 3.0, DAY + 2)]
+
+
+def test_csv_needs_an_amount_column(tmp_path):
+    path = tmp_path / "statement.csv"
+    path.write_text("Date,Description\n2026-03-14,lunch\n")
+    with pytest.raises(ValueError):
+        run(path)
+
+
+def test_failure_part_way_keeps_stored_batches_and_refreshes_engine(tmp_path):
+    path = tmp_path / "statement.csv"
+    rows = "".join(f",row {i},1.00\n" for i in range(importer.BATCH_SIZE + 2000))
+    path.write_bytes(b"Date,Description,Amount\n" + rows.encode() + b",\xff\xfe broken,1.00\n")
+    engine = BudgetEngine(defaults=[Category("Food", 500.0)])
+    engine.spend(1, 2.0, "before")
+    with pytest.raises(ValueError):
+        engine.import_statement(str(path), "Food")
+    assert len(engine.transactions) == importer.BATCH_SIZE + 1
+    assert engine.total_spent == importer.BATCH_SIZE + 2.0
+    assert engine.undo() is None                 # an import ends the undo history
+    assert len(engine.search("row")) > 0
@@ -0,0 +1,188 @@
+import os
+import pickle
+from datetime import date
+
+import pytest
+
+import journal
+import snapshot
+from journal import journal_path_for
+from storage import JournalStorage
+
+SETUP = [{"id": 1, "name": "Food", "limit": 500.0, "color": "#22c55e"},
+         {"id": 2, "name": "Rent", "limit": 1200.0, "color": "#3b82f6"}]
+DAY = date(2026, 3, 14).toordinal()
+MONTH = 2026 * 12 + 2
+
+
+def fill(storage, n, start=0):
+    for i in range(start, start + n):
+        storage.add_transaction({"category_id": 1 + i % 2, "desc": f"item {i}", "amount": i + 0.5, "day": DAY + i % 3})
+
+
+def reopen(path):
+    storage = JournalStorage(path)
+    return storage, storage.load()
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "budget.DAT")
+
+
+@pytest.mark.parametrize("write_behind", [True, False])
+def test_journal_replays_after_reopen(path, write_behind):
+    storage = JournalStorage(path)
+    assert storage.load() is None
+    storage.journal.write_behind = write_behind
+    storage.save_setup(250.0, SETUP)
+    fill(storage, 10)
+    storage.add_transactions([{"category_id": 2, "desc": "batch", "amount": 7.0, "day": DAY}])
+    storage.truncate_transactions(9)
+    storage.set_month_totals(MONTH, {1: 99.0})
+    expected = list(storage.transactions)
+    storage.close()
+    assert not os.path.exists(path)    # nothing compacted yet: only the journal was written
+
+    storage, data = reopen(path)
+    try:
+        assert data["income"] == 250.0
+        assert data["categories"] == SETUP
+        assert data["next_category_id"] == 3
+        assert list(data["transactions"]) == expected
+        assert storage.month_totals(MONTH)[1] == 99.0
+    finally:
+        storage.close()
+
+
+@pytest.mark.parametrize("write_behind", [True, False])
+def test_compaction_round_trip(path, write_behind):
+    storage = JournalStorage(path)
+    storage.load()
+    storage.journal.write_behind = write_behind
+    storage.journal.compact_min = 8
+    storage.save_setup(0.0, SETUP)
+    fill(storage, 50)
+    storage.truncate_transactions(45)
+    fill(storage, 20, start=100)
+    expected = list(storage.transactions)
+    totals = storage.month_totals(MONTH)
+    storage.close()
+    assert snapshot.is_snapshot(path)
+
+    storage, data = reopen(path)
+    try:
+        assert list(data["transactions"]) == expected
+        assert storage.month_totals(MONTH) == pytest.approx(totals)
+        assert data["categories"] == SETUP
+        # records folded into the snapshot are not replayed twice
+        assert len(data["transactions"]) == 65
+    finally:
+        storage.close()
+
+
+def test_torn_tail_is_dropped(path):
+    storage = JournalStorage(path)
+    storage.load()
+    storage.save_setup(0.0, SETUP)
+    fill(storage, 3)
+    storage.close()
+    with open(journal_path_for(path), "ab") as file:
+        file.write(b"\x80\x04\x95garbage")    # a record cut short by a crash
+
+    storage, data = reopen(path)
+    try:
+        assert [t["desc"] for t in data["transactions"]] == ["item 2", "item 1", "item 0"]
+        fill(storage, 1, start=3)
+    finally:
+        storage.close()
+    storage, data = reopen(path)
+    try:
+        assert len(data["transactions"]) == 4
+    finally:
+        storage.close()
+
+
+@pytest.mark.parametrize("record", [
+    {"op": "setup", "seq": 1, "income": 250.0, "categories": SETUP},
+    {"op": "setup", "seq": 2, "income": 0.0, "categories": []},
+    {"op": "transaction", "seq": 3, "category_id": 2, "desc": "café", "amount": 4.5, "day": DAY},
+    {"op": "transactions", "seq": 4, "rows": [(1, "a", 1.0, DAY), (2, "", 2.5, DAY + 1)]},
+    {"op": "month_totals", "seq": 5, "month": MONTH, "totals": {1: 99.0, 2: 0.0}},
+    {"op": "truncate", "seq": 6, "count": 7},
+])
+def test_record_round_trip(record):
+    data = journal.encode(record)
+    length, _ = journal.FRAME.unpack_from(data)
+    assert len(data) == journal.FRAME.size + length
+    assert journal.decode(data[journal.FRAME.size:]) == record
+
+
+def test_journal_is_not_pickled(path):
+    storage = JournalStorage(path)
+    storage.load()
+    storage.save_setup(0.0, SETUP)
+    fill(storage, 3)
+    storage.close()
+    with open(journal_path_for(path), "rb") as file:
+        data = file.read()
+    assert data.startswith(journal.MAGIC)
+    assert b"\x80\x04" not in data and b"item 2" in data
+
+
+def test_corrupt_record_ends_the_replay(path):
+    storage = JournalStorage(path)
+    storage.load()
+    storage.journal.write_behind = False
+    storage.save_setup(0.0, SETUP)
+    fill(storage, 1)
+    good_size = os.path.getsize(journal_path_for(path))
+    fill(storage, 2, start=1)
+    storage.close()
+    with open(journal_path_for(path), "r+b") as file:
+        file.seek(good_size + journal.FRAME.size + 2)
+        file.write(b"\xff")                      # fails the CRC of the second transaction
+
+    storage, data = reopen(path)
+    try:
+        assert [t["desc"] for t in data["transactions"]] == ["item 0"]
+        assert os.path.getsize(journal_path_for(path)) == good_size
+    finally:
+        storage.close()
+
+
+def test_newer_journal_is_refused(path):
+    with open(journal_path_for(path), "wb") as file:
+        file.write(journal.HEADER.pack(journal.MAGIC, journal.VERSION + 1))
+    with pytest.raises(journal.JournalError):
+        journal.Journal(path).load()
+
+
+def test_pickle_journal_is_migrated_once(path):
+    records = [{"op": "setup", "seq": 1, "income": 90.0, "categories": SETUP},
+               {"op": "transaction", "seq": 2, "category_id": 1, "desc": "old", "amount": 2.0, "day": DAY},
+               # rows written before dates were (category_id, desc, amount)
+               {"op": "transactions", "seq": 3, "rows": [(2, "older", 3.0)]}]
+    with open(journal_path_for(path), "wb") as file:
+        for rec in records:
+            pickle.dump(rec, file)
+
+    storage, data = reopen(path)
+    try:
+        assert data["income"] == 90.0
+        assert [t["desc"] for t in data["transactions"]] == ["older", "old"]
+        # folded into a binary snapshot; the journal starts over in the binary format
+        assert snapshot.is_snapshot(path)
+        assert os.path.getsize(journal_path_for(path)) == 0
+        fill(storage, 1)
+    finally:
+        storage.close()
+    with open(journal_path_for(path), "rb") as file:
+        assert file.read().startswith(journal.MAGIC)
+
+    storage, data = reopen(path)
+    try:
+        assert [t["desc"] for t in data["transactions"]] == ["item 0", "older", "old"]
+        assert not storage.journal.legacy
+    finally:
+        storage.close()
@@ -0,0 +1,32 @@
+from datetime import date
+
+import pytest
+
+from periods import month_days, month_label, month_of, month_of_date
+
+
+@pytest.mark.parametrize("day, month", [
+    (date(2026, 1, 1), 2026 * 12),
+    (date(2026, 12, 31), 2026 * 12 + 11),
+    (date(2027, 1, 1), 2027 * 12),
+    (date(2024, 2, 29), 2024 * 12 + 1),
+])
+def test_month_of(day, month):
+    assert month_of_date(day) == month
+    assert month_of(day.toordinal()) == month
+
+
+def test_months_step_by_one_across_new_year():
+    december = month_of_date(date(2025, 12, 15))
+    assert december + 1 == month_of_date(date(2026, 1, 15))
+    assert month_days(december + 1) == (date(2026, 1, 1).toordinal(), date(2026, 1, 31).toordinal())
+    assert month_label(december) == "December 2025"
+    assert month_label(december + 1) == "January 2026"
+
+
+@pytest.mark.parametrize("year, month, last", [(2026, 12, 31), (2026, 2, 28), (2024, 2, 29), (2026, 4, 30)])
+def test_month_days(year, month, last):
+    first_day, last_day = month_days(month_of_date(date(year, month, 1)))
+    assert date.fromordinal(first_day) == date(year, month, 1)
+    assert date.fromordinal(last_day) == date(year, month, last)
+    assert month_of(last_day) + 1 == month_of(last_day + 1)
@@ -0,0 +1,85 @@
+import math
+
+import pytest
+
+import search
+from search import SearchIndex, amount_bucket
+
+ROWS = [  # (category id, description, amount), oldest first
+    (1, "Uber to airport", 32.0),
+    (2, "Whole Foods groceries", 84.2),
+    (1, "Uber Eats", 18.5),
+    (3, "Rent March", 1200.0),
+    (2, "Trader Joe's groceries", 61.0),
+    (1, "uber", 9.99),
+    (3, "Rent April", 1200.0),
+]
+
+
+@pytest.fixture
+def index():
+    index = SearchIndex()
+    for row in ROWS:
+        index.add(*row)
+    return index
+
+
+def test_prefix_and_substring(index):
+    assert index.search("ub") == [5, 2, 0]
+    assert index.search("r") == [6, 3]                  # a short term only starts a word
+    assert index.search("ocer") == [4, 1]                # inside "groceries"
+    assert index.search("UBER eats") == [2]              # every word must match, case-insensitive
+
+
+def test_typos(index):
+    assert index.search("ubr") == [5, 2, 0]              # one typo in a short word
+    assert index.search("grocreies") == [4, 1]           # two in a long one
+    assert index.search("zebra") == []
+
+
+def test_filters(index):
+    assert index.search(category_ids=[3]) == [6, 3]
+    assert index.search("rent", category_ids=[1]) == []
+    assert index.search(min_amount=50, max_amount=100) == [4, 1]
+    assert index.search("groceries", max_amount=70) == [4]
+    assert index.search(min_amount=100, max_amount=50) == []
+    assert index.search(category_ids=[]) == []
+
+
+def test_newest_first_and_limit(index):
+    assert index.search(limit=3) == [6, 5, 4]
+    assert index.search("uber", limit=1) == [5]
+
+
+def test_broad_terms_are_checked_per_row(index, monkeypatch):
+    monkeypatch.setattr(search, "BROAD_DESCS", 1)
+    assert index.search("ub") == [5, 2, 0]
+    assert index.search("groceries", category_ids=[2]) == [4, 1]
+
+
+def test_truncate(index):
+    index.truncate(4)
+    assert len(index) == 4
+    assert index.search("rent") == [3]
+    assert index.search("uber") == [2, 0]
+    index.add(1, "Uber", 12.0)
+    assert index.search("uber") == [4, 2, 0]
+
+
+def test_build_matches_add(index):
+    newest_first = [{"category_id": c, "desc": d, "amount": a} for c, d, a in reversed(ROWS)]
+    built = SearchIndex.build(newest_first)
+    for query in ("ub", "groceries", "rnt"):
+        assert built.search(query) == index.search(query)
+    assert built.search(min_amount=1000) == index.search(min_amount=1000) == [6, 3]
+
+
+def test_non_finite_amounts(index):
+    assert amount_bucket(math.inf) > amount_bucket(1e308) > amount_bucket(100.0)
+    assert amount_bucket(math.nan) == amount_bucket(-1.0) < amount_bucket(1e-300)
+    index.add(1, "odd", math.inf)
+    index.add(1, "odd", math.nan)
+    assert index.search("odd", min_amount=1e6) == [7]
+    assert index.search("odd", max_amount=math.inf) == [7]
+    index.truncate(7)
+    assert index.search("odd") == []
@@ -0,0 +1,209 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+import time
+from datetime import date
+
+import pytest
+
+import shared_state
+from budget_engine import BudgetError, Category
+from periods import month_of
+from storage import open_storage
+
+DEFAULTS = [Category("Food", 500), Category("Rent", 1200)]
+
+
+@pytest.fixture
+def daemon(tmp_path, monkeypatch):
+    """A state daemon for a budget file, served from a thread of this process"""
+    path = str(tmp_path / "budget.DAT")
+    daemon = shared_state.StateDaemon(path)
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_until_complete, args=(daemon.serve(),), daemon=True)
+    thread.start()
+    while shared_state.read_rendezvous(path) is None:
+        time.sleep(0.01)
+    # attach() must find this daemon, not start one
+    monkeypatch.setattr(shared_state, "start_daemon", None)
+    yield path, daemon
+    loop.call_soon_threadsafe(daemon.stopped.set)
+    thread.join(5)
+
+
+def attach(daemon):
+    path, _ = daemon
+    budget = shared_state.attach(path, DEFAULTS)
+    if not budget.loaded:
+        # a new budget is stored once its setup is saved
+        budget.save_setup(shared_state.categories_json(budget.categories), 3000.0)
+    return budget
+
+
+def test_bad_request_keeps_connection(daemon):
+    budget = attach(daemon)
+    try:
+        food = budget.categories.by_name("Food")
+        with pytest.raises(BudgetError, match="could not do that"):
+            budget.request("spend", category_id=food.id, amount="x", desc="", day=1)
+        with pytest.raises(BudgetError, match="could not do that"):
+            budget.request("history", start=0)      # no stop
+        with pytest.raises(BudgetError, match="Unknown request"):
+            budget.request("nonsense")
+        # the same connection still works
+        budget.add_transaction("Food", "lunch", 12.5)
+        assert [t["desc"] for t in budget.transactions[0:5]] == ["lunch"]
+    finally:
+        budget.close()
+
+
+def test_windows_share_state(daemon):
+    first, second = attach(daemon), attach(daemon)
+    try:
+        first.add_transaction("Rent", "march", 1200)
+        assert [e["event"] for e in _wait_events(second, 1)] == ["txs"]
+        assert second.categories.by_name("Rent").spent == 1200
+    finally:
+        first.close()
+        second.close()
+
+
+def test_setup_edits_go_through_daemon(daemon):
+    first, second = attach(daemon), attach(daemon)
+    try:
+        fun = first.add_category("Fun", 80.0, "#f97316")
+        first.rename_category(fun, "Games")
+        first.set_income(4000.0)
+        _wait_events(second, 3)
+        assert second.income == 4000.0
+        assert [(c.id, c.name) for c in second.categories][-1] == (fun.id, "Games")
+        # the daemon's engine has them too, so a later save keeps them
+        assert daemon[1].engine.categories.by_name("Games").id == fun.id
+        second.delete_category(second.categories.get(fun.id))
+        _wait_events(first, 1)
+        assert first.categories.get(fun.id) is None
+        with pytest.raises(BudgetError, match="Category not found"):
+            first.rename_category(fun, "Gone")
+    finally:
+        first.close()
+        second.close()
+
+
+def test_import_and_export_run_in_the_window(daemon, tmp_path):
+    first, second = attach(daemon), attach(daemon)
+    statement = tmp_path / "statement.csv"
+    statement.write_text("Date,Description,Amount,Category\n"
+                         "2026-03-01,groceries,42.50,Food\n"
+                         "2026-03-02,march,1200,Rent\n"
+                         "2026-03-03,mystery,7,Travel\n"
+                         "someday,broken,1,Food\n")
+    try:
+        result = first.import_statement(str(statement), "Food")
+        assert (result.imported, result.rejected) == (3, 1)
+        assert _wait_events(second, 1)[-1]["event"] == "totals"
+        # rows of unknown categories went to the default one
+        assert daemon[1].engine.storage.month_totals(month_of(date(2026, 3, 1).toordinal())) == {1: 49.5, 2: 1200.0}
+
+        second.add_transaction("Food", "snack", 2.0, date(2026, 3, 4).toordinal())
+        txs = second.export_transactions(str(tmp_path / "out.csv"))
+        summary = second.export_summary(str(tmp_path / "out_summary.jsonl"))
+        assert txs.rows == 4
+        lines = (tmp_path / "out.csv").read_text().splitlines()
+        assert lines[1:] == ["2026-03-01,1,Food,groceries,42.5", "2026-03-02,2,Rent,march,1200.0",
+                             "2026-03-03,1,Food,mystery,7.0", "2026-03-04,1,Food,snack,2.0"]
+        march = [json.loads(line) for line in (tmp_path / "out_summary.jsonl").read_text().splitlines()
+                 if json.loads(line)["month"] == "2026-03"]
+        assert summary.rows >= 2
+        assert [(r["category"], r["spent"]) for r in march] == [("Food", 51.5), ("Rent", 1200.0)]
+        # the daemon has no way to read or write a path a window names
+        with pytest.raises(BudgetError, match="Unknown request"):
+            first.request("export", what="summary", path=str(tmp_path / "x.csv"))
+    finally:
+        first.close()
+        second.close()
+
+
+def test_connection_needs_the_token(daemon):
+    path, _ = daemon
+    info = shared_state.read_rendezvous(path)
+    if os.name == "posix":
+        assert os.stat(shared_state.rendezvous_path(path)).st_mode & 0o077 == 0
+    for hello in ({"op": "hello", "id": 1, "token": "guess", "path": path, "month": 0, "defaults": []},
+                  {"op": "spend", "id": 1, "category_id": 1, "amount": 5, "desc": "", "day": 1}):
+        with socket.create_connection(("127.0.0.1", info["port"]), timeout=5) as sock:
+            sock.sendall((json.dumps(hello) + "\n").encode("utf-8"))
+            assert sock.recv(1024) == b""
+    budget = attach(daemon)
+    assert budget.categories.by_name("Food") is not None
+    budget.close()
+
+
+def test_direct_writer_is_not_shared(tmp_path, monkeypatch):
+    path = str(tmp_path / "budget.DAT")
+    monkeypatch.setattr(shared_state, "START_TIMEOUT", 3.0)
+    storage = open_storage(path)
+    try:
+        with pytest.raises(BudgetError, match="already open"):
+            shared_state.attach(path, DEFAULTS)
+    finally:
+        storage.close()
+
+
+def test_other_protocol_is_refused(daemon):
+    path, _ = daemon
+    info = shared_state.read_rendezvous(path)
+    with socket.create_connection(("127.0.0.1", info["port"]), timeout=5) as sock:
+        hello = {"op": "hello", "id": 0, "protocol": 0, "token": info["token"], "path": path, "month": 0,
+                 "defaults": []}
+        sock.sendall((json.dumps(hello) + "\n").encode("utf-8"))
+        reply = json.loads(sock.makefile("rb").readline())
+    assert "different versions" in reply["error"]
+
+
+class Starting:
+    """A daemon process that never finishes starting"""
+
+    def poll(self):
+        return None
+
+
+def test_silent_listener_does_not_hang(tmp_path, monkeypatch):
+    path = str(tmp_path / "budget.DAT")
+    monkeypatch.setattr(shared_state, "START_TIMEOUT", 0.5)
+    monkeypatch.setattr(shared_state, "HANDSHAKE_TIMEOUT", 0.2)
+    monkeypatch.setattr(shared_state, "start_daemon", lambda path: Starting())
+    with socket.socket() as listener:
+        # something else took the port of a daemon that has gone
+        listener.bind(("127.0.0.1", 0))
+        listener.listen()
+        with open(shared_state.rendezvous_path(path), "w") as file:
+            json.dump({"port": listener.getsockname()[1], "token": "stale"}, file)
+        started = time.monotonic()
+        with pytest.raises(BudgetError, match="did not answer"):
+            shared_state.attach(path, DEFAULTS)
+        assert time.monotonic() - started < 2.0
+
+
+def test_attach_starts_daemon(tmp_path):
+    path = str(tmp_path / "budget.DAT")
+    first = shared_state.attach(path, DEFAULTS)
+    second = shared_state.attach(path, DEFAULTS)
+    try:
+        assert not first.loaded
+        first.save_setup(shared_state.categories_json(first.categories), 3000.0)
+        first.add_transaction("Food", "bread", 3.0)
+        assert _wait_events(second, 2)[-1]["event"] == "txs"
+        assert second.categories.by_name("Food").spent == 3.0
+    finally:
+        first.close()
+        second.close()
+
+
+def _wait_events(budget, count, timeout=5.0):
+    deadline, events = time.monotonic() + timeout, []
+    while len(events) < count and time.monotonic() < deadline:
+        events += budget.poll()
+        time.sleep(0.01)
+    return events
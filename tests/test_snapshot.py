@@ -0,0 +1,78 @@
+import pickle
+from datetime import date
+
+import pytest
+
+import snapshot
+from periods import month_of
+from storage import JournalStorage
+from txstore import TransactionStore
+
+MARCH, APRIL = date(2026, 3, 14), date(2026, 4, 2)
+CATEGORIES = [{"id": 1, "name": "Food", "limit": 500.0, "color": "#22c55e"},
+              {"id": 2, "name": "Rent", "limit": 1200.0, "color": "#3b82f6"}]
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "budget.DAT")
+
+
+def test_write_and_load_round_trip(path):
+    store = TransactionStore()
+    store.names = {1: "Food", 2: "Rent", 7: "Gym"}      # Gym was deleted; its spending stays
+    store.append(1, "bread", 3.25, MARCH.toordinal())
+    store.append(7, "membership", 40.0, MARCH.toordinal())
+    store.append(2, "April rent", 1200.0, APRIL.toordinal())
+    store.append(1, "café crème", 4.5, APRIL.toordinal())
+    snapshot.write(path, {"income": 3000.0, "categories": CATEGORIES, "next_category_id": 8,
+                          "journal_seq": 42, "transactions": store})
+    assert snapshot.is_snapshot(path)
+
+    data = snapshot.load(path)
+    mapped = data["transactions"]
+    try:
+        assert (data["income"], data["categories"]) == (3000.0, CATEGORIES)
+        assert (data["next_category_id"], data["journal_seq"]) == (8, 42)
+        assert list(mapped) == list(store)
+        assert mapped[0] == {"category": "Food", "category_id": 1, "desc": "café crème", "amount": 4.5,
+                             "date": APRIL}
+        assert mapped.names[7] == "Gym"
+        for day in (MARCH, APRIL):
+            month = month_of(day.toordinal())
+            assert mapped.month_totals[month] == store.month_totals[month]
+            assert list(mapped.month_view(month)) == list(store.month_view(month))
+    finally:
+        mapped.close()
+
+
+def test_pickle_snapshot_is_migrated(path):
+    legacy = {"income": 2500.0,
+              # saves from before category ids
+              "categories": [{"name": "Food", "limit": 400.0, "color": "#22c55e"},
+                             {"name": "Rent", "limit": 1100.0, "color": "#3b82f6"}],
+              # newest first, keyed by category name
+              "transactions": [{"category": "Rent", "desc": "rent", "amount": 1100.0, "date": APRIL},
+                               {"category": "Gym", "desc": "gym", "amount": 30.0, "date": MARCH},
+                               {"category": "Food", "desc": "lunch", "amount": 12.0, "date": MARCH}]}
+    with open(path, "wb") as file:
+        pickle.dump(legacy, file)
+
+    assert snapshot.migrate(path)
+    assert snapshot.is_snapshot(path)
+    assert not snapshot.migrate(path)       # already done
+
+    storage = JournalStorage(path)
+    data = storage.load()
+    try:
+        assert data["income"] == 2500.0
+        assert [(c["id"], c["name"], c["limit"]) for c in data["categories"]] == [(1, "Food", 400.0),
+                                                                                (2, "Rent", 1100.0)]
+        assert data["next_category_id"] == 4
+        assert [(t["category"], t["desc"], t["amount"], t["date"]) for t in data["transactions"]] == [
+            ("Rent", "rent", 1100.0, APRIL), ("Gym", "gym", 30.0, MARCH), ("Food", "lunch", 12.0, MARCH)]
+        assert storage.category_names()[3] == "Gym"
+        assert storage.month_totals(month_of(MARCH.toordinal())) == {1: 12.0, 3: 30.0}
+        assert storage.month_totals(month_of(APRIL.toordinal())) == {2: 1100.0}
+    finally:
+        storage.close()
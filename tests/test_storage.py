@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+
+from storage import JournalStorage, StorageLocked, open_storage
+
+DAY = date(2026, 3, 14).toordinal()
+
+
+def test_sqlite_starts_from_journal_data(tmp_path):
+    legacy = str(tmp_path / "Saved_Data.DAT")
+    journal = JournalStorage(legacy)
+    journal.load()
+    journal.save_setup(100.0, [{"id": 1, "name": "Food", "limit": 50.0, "color": "#fff"},
+                               {"id": 2, "name": "Gone", "limit": 5.0, "color": "#fff"}])
+    for i in range(30):
+        journal.add_transaction({"category_id": 1 + i % 2, "desc": f"t{i}", "amount": i + 1.0, "day": DAY + i})
+    journal.save_setup(100.0, [{"id": 1, "name": "Food", "limit": 50.0, "color": "#fff"}])
+    expected = list(journal.transactions)
+    months = dict(journal.all_month_totals())
+    journal.close()
+
+    db = open_storage(str(tmp_path / "budget.db"), legacy_snapshot=legacy)
+    try:
+        data = db.load()
+        assert data["income"] == 100.0
+        assert [c["name"] for c in data["categories"]] == ["Food"]
+        assert list(db.transactions) == expected
+        # the removed category keeps its name for the history
+        assert db.category_names() == {1: "Food", 2: "Gone"}
+        assert dict(db.all_month_totals()) == months
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("name", ["budget.DAT", "budget.db"])
+def test_one_writer_per_file(tmp_path, name):
+    path = str(tmp_path / name)
+    storage = open_storage(path, legacy_snapshot=None)
+    with pytest.raises(StorageLocked, match="already open"):
+        open_storage(path, legacy_snapshot=None)
+    storage.close()
+    open_storage(path, legacy_snapshot=None).close()
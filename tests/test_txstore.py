@@ -0,0 +1,112 @@
+import pickle
+from datetime import date
+
+import pytest
+
+from periods import month_of
+from txstore import TransactionStore
+
+MARCH = date(2026, 3, 14)
+
+
+@pytest.fixture
+def store():
+    store = TransactionStore()
+    store.names = {1: "Food", 2: "Rent"}
+    store.append(1, "bread", 3.25, MARCH.toordinal())
+    store.append(2, "rent", 1200.0, MARCH.toordinal())
+    store.append(1, "café crème", 4.5, MARCH.toordinal() + 1)
+    return store
+
+
+def test_rows_are_newest_first(store):
+    assert len(store) == 3
+    assert store[0] == {"category": "Food", "category_id": 1, "desc": "café crème", "amount": 4.5,
+                        "date": date(2026, 3, 15)}
+    assert store[-1]["desc"] == "bread"
+    assert [t["desc"] for t in store[:2]] == ["café crème", "rent"]
+    assert [t["desc"] for t in store[::2]] == ["café crème", "bread"]
+    assert [t["desc"] for t in store] == ["café crème", "rent", "bread"]
+    assert [t["desc"] for t in reversed(store)] == ["bread", "rent", "café crème"]
+    with pytest.raises(IndexError):
+        store[3]
+
+
+def test_string_pool(store):
+    # descriptions are packed as UTF-8 and addressed by their end offsets
+    assert bytes(store.desc_pool) == "breadrentcafé crème".encode("utf-8")
+    assert list(store.desc_ends) == [5, 9, 9 + len("café crème".encode("utf-8"))]
+    store.append(2, "", 1.0, MARCH.toordinal())
+    assert store[0]["desc"] == ""
+    assert [r[3] for r in store.raw_rows()] == [b"bread", b"rent", "café crème".encode("utf-8"), b""]
+
+
+def test_renaming_a_category_is_one_update(store):
+    store.names[1] = "Groceries"
+    assert [t["category"] for t in store] == ["Groceries", "Rent", "Groceries"]
+
+
+def test_truncate(store):
+    store.truncate(1)
+    assert [t["desc"] for t in store] == ["bread"]
+    assert bytes(store.desc_pool) == b"bread"
+    assert (list(store.amounts), list(store.cat_ids), list(store.desc_ends)) == ([3.25], [1], [5])
+    store.append(2, "rent again", 1100.0, MARCH.toordinal())
+    assert store[0]["desc"] == "rent again"
+    store.truncate(5)                            # more than it holds: nothing to drop
+    assert len(store) == 2
+    store.truncate(0)
+    assert len(store) == 0 and not store.desc_pool
+
+
+def test_columns_and_category_totals(store):
+    amounts, cat_ids, days = store.columns()
+    assert (list(amounts), list(cat_ids)) == ([3.25, 1200.0, 4.5], [1, 2, 1])
+    assert list(days) == [MARCH.toordinal()] * 2 + [MARCH.toordinal() + 1]
+    assert store.category_totals() == {1: 7.75, 2: 1200.0}
+
+
+def test_from_dicts_gives_unknown_names_new_ids():
+    ids = {"Food": 1}
+    store = TransactionStore.from_dicts([{"category": "Gym", "desc": "gym", "amount": 30.0, "date": MARCH},
+                                         {"category": "Food", "desc": "lunch", "amount": 12.0, "date": MARCH}], ids)
+    assert ids == {"Food": 1, "Gym": 2}
+    assert [(t["category"], t["desc"]) for t in store] == [("Gym", "gym"), ("Food", "lunch")]
+
+
+def test_pickles(store):
+    copy = pickle.loads(pickle.dumps(store))
+    assert list(copy) == list(store)
+
+
+def test_month_partitions_across_a_boundary():
+    last_of_march, first_of_april = date(2026, 3, 31), date(2026, 4, 1)
+    store = TransactionStore()
+    store.names = {1: "Food", 2: "Rent"}
+    store.append(1, "late dinner", 20.0, last_of_march.toordinal())
+    store.append(2, "rent", 1200.0, first_of_april.toordinal())
+    store.append(1, "brunch", 15.0, first_of_april.toordinal())
+    store.append(1, "snack", 2.5, last_of_march.toordinal())        # entered late, still March
+    march, april = month_of(last_of_march.toordinal()), month_of(first_of_april.toordinal())
+    assert store.month_totals == {march: {1: 22.5}, april: {1: 15.0, 2: 1200.0}}
+    assert list(store.month_rows(march)) == [0, 3]
+    assert list(store.month_rows(april - 2)) == []
+
+    store.truncate(2)
+    assert store.month_totals == {march: {1: 20.0}, april: {1: 0.0, 2: 1200.0}}
+    assert list(store.month_rows(april)) == [1]
+
+
+def test_month_view_is_newest_first():
+    store = TransactionStore()
+    store.names = {1: "Food"}
+    for i, day in enumerate((MARCH, date(2026, 4, 1), MARCH, MARCH)):
+        store.append(1, f"t{i}", 1.0, day.toordinal())
+    view = store.month_view(month_of(MARCH.toordinal()))
+    assert len(view) == 3
+    assert [t["desc"] for t in view] == ["t3", "t2", "t0"]
+    assert view[0]["desc"] == "t3" and view[-1]["desc"] == "t0"
+    assert [t["desc"] for t in view[1:]] == ["t2", "t0"]
+    with pytest.raises(IndexError):
+        view[3]
+    assert len(store.month_view(0)) == 0
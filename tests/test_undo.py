@@ -0,0 +1,80 @@
+from datetime import date
+
+import budget
+import spending_type
+from budget_engine import BudgetEngine, Category
+from undo import Change, UndoHistory, Version
+
+DAY = date(2026, 3, 14).toordinal()
+
+
+def change(label):
+    version = Version(0.0, (), 0)
+    return Change(label, version, version, [])
+
+
+def test_history_undo_and_redo():
+    history = UndoHistory()
+    assert history.undo() is None and history.redo() is None
+    for label in "abc":
+        history.push(change(label))
+    assert [history.undo().label, history.undo().label] == ["c", "b"]
+    assert history.redo().label == "b"
+    history.push(change("d"))                   # a new change drops what was undone
+    assert history.redo() is None
+    assert [c.label for c in history.done] == ["a", "b", "d"]
+
+
+def test_history_keeps_the_newest_levels():
+    history = UndoHistory(3)
+    for label in "abcde":
+        history.push(change(label))
+    undone = [history.undo() for _ in range(4)]
+    assert [c.label if c else None for c in undone] == ["e", "d", "c", None]
+    assert not UndoHistory(0)
+
+
+def test_engine_undo_redo():
+    engine = BudgetEngine(defaults=[Category("Food", 500.0)])
+    engine.spend(1, 10.0, "lunch", DAY)
+    engine.set_income(3000.0)
+    engine.spend(1, 5.0, "coffee", DAY)
+    assert [t["desc"] for t in engine.transactions] == ["coffee", "lunch"]
+
+    assert engine.undo() == "Add expense"
+    assert engine.undo() == "Set income"
+    assert (engine.income, len(engine.transactions)) == (0.0, 1)
+    assert engine.redo() == "Set income"
+    assert engine.redo() == "Add expense"
+    assert engine.redo() is None
+    assert engine.income == 3000.0
+    assert [t["desc"] for t in engine.transactions] == ["coffee", "lunch"]
+
+
+def test_engine_trims_to_undo_levels():
+    engine = BudgetEngine(defaults=[Category("Food", 500.0)], undo_levels=2)
+    for i in range(4):
+        engine.spend(1, 1.0, f"t{i}", DAY)
+    assert engine.undo() == engine.undo() == "Add expense"
+    assert engine.undo() is None
+    assert [t["desc"] for t in engine.transactions] == ["t1", "t0"]
+
+    engine = BudgetEngine(defaults=[Category("Food", 500.0)], undo_levels=0)
+    engine.spend(1, 1.0, "kept", DAY)
+    assert engine.undo() is None
+    assert len(engine.transactions) == 1
+
+
+def test_script_renames_are_saved_and_undoable():
+    home = budget.budget("Home", 3000.0)
+    food = spending_type.spending_type("Food", "Groceries", 400.0)
+    home.add_new_spending_category(food)
+    food.set_name("Groceries")
+    assert [row[1] for row in home.engine.saved_setup] == ["Unallocated Spending", "Groceries"]
+    assert home.engine.undo() == "Rename category"
+    assert food.get_name() == "Food"
+    assert [row[1] for row in home.engine.saved_setup] == ["Unallocated Spending", "Food"]
+    assert home.engine.redo() == "Rename category"
+    food.spend(12.0)
+    assert home.total_spent == 12.0
+    assert len(home.engine.transactions) == 1